@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+
+
+def _as_array(values):
+    """Возвращает значения в виде массива float и признак того, что вход был одномерным."""
+    array = np.asarray(values, dtype=float)
+    return (array[:, None], True) if array.ndim == 1 else (array, False)
+
+
+def _wrap(array, like, squeeze):
+    """Возвращает результат в форме исходных данных: Series, DataFrame или массив."""
+    if squeeze:
+        array = array[:, 0]
+    if isinstance(like, pd.DataFrame):
+        return pd.DataFrame(array, index=like.index, columns=like.columns)
+    if isinstance(like, pd.Series):
+        return pd.Series(array, index=like.index, name=like.name)
+    return array
+
+
+def stack_column(frames, column):
+    """
+    Собирает один столбец нескольких тикеров в таблицу (бары x тикеры) с выравниванием по датам.
+
+    :param frames: Словарь {тикер: DataFrame}, например результаты fetch_stock_data.
+    :param column: Имя столбца (например, 'Close' или 'RSI').
+    :return: DataFrame с тикерами в столбцах.
+    """
+    return pd.concat({ticker: frame[column] for ticker, frame in frames.items()}, axis=1)
+
+
+def hold_positions(entries, exits):
+    """
+    Превращает сигналы входа и выхода в позиции, удерживаемые до сигнала выхода.
+
+    Состояние протягивается вперед векторно: для каждого бара берется индекс последнего сигнала.
+    При одновременных сигналах приоритет у входа.
+
+    :param entries: Булев массив (бары или бары x тикеры) сигналов входа.
+    :param exits: Булев массив той же формы сигналов выхода.
+    :return: Массив позиций 0/1 той же формы.
+    """
+    entries, squeeze = _as_array(entries)
+    exits, _ = _as_array(exits)
+    signal = entries.astype(bool) | exits.astype(bool)
+
+    rows = np.arange(len(signal))[:, None]
+    last_signal = np.where(signal, rows, -1)
+    np.maximum.accumulate(last_signal, axis=0, out=last_signal)
+
+    columns = np.arange(signal.shape[1])[None, :]
+    positions = entries[np.maximum(last_signal, 0), columns]
+    positions[last_signal < 0] = 0.0
+    return positions[:, 0] if squeeze else positions
+
+
+def rsi_rule(rsi, lower=30, upper=70):
+    """
+    Позиции по RSI: вход при перепроданности, выход при перекупленности.
+
+    :param rsi: RSI (Series, DataFrame тикеров или массив).
+    :param lower: Уровень перепроданности (по умолчанию 30).
+    :param upper: Уровень перекупленности (по умолчанию 70).
+    :return: Позиции 0/1 в форме входных данных.
+    """
+    values, squeeze = _as_array(rsi)
+    with np.errstate(invalid='ignore'):
+        positions = hold_positions(values < lower, values > upper)
+    return _wrap(positions, rsi, squeeze)
+
+
+def macd_rule(macd, signal, allow_short=False):
+    """
+    Позиции по MACD: длинная позиция, пока MACD выше сигнальной линии.
+
+    :param macd: Линия MACD.
+    :param signal: Сигнальная линия.
+    :param allow_short: Открывать ли короткую позицию, когда MACD ниже сигнальной линии.
+    :return: Позиции 0/1 (или -1/1) в форме входных данных.
+    """
+    macd_values, squeeze = _as_array(macd)
+    signal_values, _ = _as_array(signal)
+    with np.errstate(invalid='ignore'):
+        above = macd_values > signal_values
+        positions = above.astype(float)
+        if allow_short:
+            positions[macd_values < signal_values] = -1.0
+    return _wrap(positions, macd, squeeze)
+
+
+def bollinger_rule(close, lower_band, middle_band):
+    """
+    Позиции по полосам Боллинджера: вход ниже нижней полосы, выход при возврате к средней.
+
+    :param close: Цены закрытия.
+    :param lower_band: Нижняя полоса Боллинджера.
+    :param middle_band: Средняя полоса Боллинджера.
+    :return: Позиции 0/1 в форме входных данных.
+    """
+    close_values, squeeze = _as_array(close)
+    lower_values, _ = _as_array(lower_band)
+    middle_values, _ = _as_array(middle_band)
+    with np.errstate(invalid='ignore'):
+        positions = hold_positions(close_values < lower_values, close_values >= middle_values)
+    return _wrap(positions, close, squeeze)
+
+
+def stochastic_rule(stochastic_k, stochastic_d, lower=20, upper=80):
+    """
+    Позиции по стохастическому осциллятору: вход, когда %K выше %D в зоне перепроданности, выход в зоне
+    перекупленности.
+
+    :param stochastic_k: Линия %K.
+    :param stochastic_d: Линия %D.
+    :param lower: Граница зоны перепроданности (по умолчанию 20).
+    :param upper: Граница зоны перекупленности (по умолчанию 80).
+    :return: Позиции 0/1 в форме входных данных.
+    """
+    k_values, squeeze = _as_array(stochastic_k)
+    d_values, _ = _as_array(stochastic_d)
+    with np.errstate(invalid='ignore'):
+        positions = hold_positions((k_values < lower) & (k_values > d_values), k_values > upper)
+    return _wrap(positions, stochastic_k, squeeze)
+
+
+def run_backtest(close, positions, cost=0.0, lag=1):
+    """
+    Рассчитывает доходность, капитал, просадку и оборот стратегии для одного или многих тикеров.
+
+    Позиция, определенная на закрытии бара, применяется к доходности следующих lag баров.
+    Все расчеты выполняются операциями над массивами без циклов по барам и тикерам.
+
+    :param close: Цены закрытия (Series, DataFrame тикеров или массив).
+    :param positions: Позиции той же формы (например, результат rsi_rule).
+    :param cost: Издержки на единицу оборота в долях (по умолчанию 0).
+    :param lag: Задержка исполнения в барах (по умолчанию 1).
+    :return: Словарь с ключами returns, equity, drawdown, turnover и summary.
+    """
+    prices, squeeze = _as_array(close)
+    held, _ = _as_array(positions)
+    if prices.shape != held.shape:
+        raise ValueError("Формы цен и позиций не совпадают.")
+
+    bars = len(prices)
+    asset_returns = np.zeros_like(prices)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(prices[1:], prices[:-1], out=asset_returns[1:])
+    asset_returns[1:] -= 1
+    asset_returns[~np.isfinite(asset_returns)] = 0.0
+
+    exposure = np.zeros_like(held)
+    if lag < bars:
+        exposure[lag:] = np.nan_to_num(held[:bars - lag])
+
+    trades = np.abs(np.diff(exposure, axis=0, prepend=0.0))
+    strategy_returns = exposure * asset_returns - cost * trades
+    equity = np.cumprod(1.0 + strategy_returns, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1.0
+
+    columns = close.columns if isinstance(close, pd.DataFrame) else None
+    summary = pd.DataFrame({
+        'total_return': equity[-1] - 1.0 if bars else np.zeros(prices.shape[1]),
+        'max_drawdown': drawdown.min(axis=0) if bars else np.zeros(prices.shape[1]),
+        'turnover': trades.sum(axis=0),
+        'trades': np.count_nonzero(trades, axis=0),
+    }, index=columns)
+
+    return {
+        'returns': _wrap(strategy_returns, close, squeeze),
+        'equity': _wrap(equity, close, squeeze),
+        'drawdown': _wrap(drawdown, close, squeeze),
+        'turnover': _wrap(trades, close, squeeze),
+        'summary': summary,
+    }
@@ -0,0 +1,35 @@
+"""
+Замер скорости векторного бэктеста на синтетических данных.
+
+Запуск: python3 benchmarks/bench_backtest.py [баров] [тикеров]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backtest  # noqa: E402
+
+
+def main():
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    tickers = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (bars, tickers)), axis=0))
+    rsi = rng.uniform(0, 100, (bars, tickers))
+
+    start = time.perf_counter()
+    positions = backtest.rsi_rule(rsi)
+    backtest.run_backtest(close, positions, cost=0.001)
+    elapsed = time.perf_counter() - start
+
+    total = bars * tickers
+    print(f"Баров: {total:,}, время: {elapsed:.3f} с, скорость: {total / elapsed / 1e6:.1f} млн баров/с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Сравнение времени и пиковой памяти расчета индикаторов функциями calculate_* до и после перехода
+на заранее выделенный блок.
+
+Прежний порядок: add_indicators добавлял столбцы в исходный DataFrame по одному (в том числе присваиванием
+кортежей), после чего main повторно вызывал add_moving_average для результата fetch_stock_data.
+
+Запуск: python3 benchmarks/bench_enrichment.py [баров]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_download as dd  # noqa: E402
+import numpy_backend  # noqa: E402
+from fixtures import make_ohlcv  # noqa: E402
+
+
+def legacy_enrich(data):
+    """Прежний порядок обогащения данных (fetch_stock_data и повторный add_moving_average в main)."""
+    data = dd.add_moving_average(data)
+    data['RSI'] = dd.calculate_rsi(data)
+    data['MACD'], data['Signal'] = dd.calculate_macd(data)
+    data['Bollinger_Upper'], data['Bollinger_Middle'], data['Bollinger_Lower'] = dd.calculate_bollinger_bands(data)
+    data['Stochastic_K'], data['Stochastic_D'] = dd.calculate_stochastic_oscillator(data)
+    data['VWAP'] = dd.calculate_vwap(data)
+    data['ATR'] = dd.calculate_atr(data)
+    data['OBV'] = dd.calculate_obv(data)
+    data['CCI'] = dd.calculate_cci(data)
+    data['MFI'] = dd.calculate_mfi(data)
+    data['ADL'] = dd.calculate_adl(data)
+    data['Parabolic_SAR'] = dd.calculate_parabolic_sar(data)
+    data['Ichimoku_Conversion'], data['Ichimoku_Base'], data['Ichimoku_Leading_Span_A'], data[
+        'Ichimoku_Leading_Span_B'], data['Ichimoku_Lagging_Span'] = dd.calculate_ichimoku_cloud(data)
+    data['Std_Deviation'] = dd.calculate_std_deviation(data)
+    summary = dd.calculate_closing_price_summary(data)
+    data['Mean_Closing_Price'] = summary.mean
+    data['Variance_Closing_Price'] = summary.variance
+    data['Coefficient_of_Variation'] = summary.coefficient_of_variation
+    return dd.add_moving_average(data)
+
+
+def measure(function, data):
+    """Возвращает результат, время и пиковый объем памяти, выделенной во время вызова."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(data)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def main():
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    data = make_ohlcv(bars, freq='min')
+
+    # CCI (rolling.apply) и параболический SAR (цикл по барам) занимают почти все время расчета в обоих
+    # вариантах и не зависят от способа записи столбцов, поэтому на время замера они заменяются расчетом
+    # тех же значений по массивам
+    block = numpy_backend.compute_indicators(*(data[name].to_numpy(dtype=float)
+                                               for name in ('High', 'Low', 'Close', 'Volume')))
+    fast = {name: pd.Series(block[:, numpy_backend.INDICATOR_COLUMNS.index(column)], index=data.index)
+            for name, column in (('calculate_cci', 'CCI'), ('calculate_parabolic_sar', 'Parabolic_SAR'))}
+    original = {name: getattr(dd, name) for name in fast}
+    for name, series in fast.items():
+        setattr(dd, name, lambda frame, series=series, **params: series.copy())
+
+    try:
+        expected, legacy_seconds, legacy_peak = measure(legacy_enrich, data.copy())
+        result, seconds, peak = measure(dd.add_indicators, data)
+    finally:
+        for name, function in original.items():
+            setattr(dd, name, function)
+
+    pd.testing.assert_frame_equal(result, expected[result.columns], check_freq=False)
+    size = data.memory_usage().sum() / 2 ** 20
+    print(f"Баров: {bars:,}, исходные данные: {size:.1f} МБ, результат: {result.memory_usage().sum() / 2 ** 20:.1f} МБ")
+    for label, frame, elapsed, allocated in (('Прежний порядок', expected, legacy_seconds, legacy_peak),
+                                             ('Блок индикаторов', result, seconds, peak)):
+        # Чтение всех индикаторов одним массивом (построение графиков, экспорт, передача в NumPy)
+        start = time.perf_counter()
+        frame[numpy_backend.INDICATOR_COLUMNS].to_numpy()
+        read = time.perf_counter() - start
+        print(f"{label}: {elapsed:.3f} с, пиковая память {allocated / 2 ** 20:.1f} МБ, "
+              f"блоков в DataFrame: {len(frame._mgr.blocks)}, чтение индикаторов массивом: {read:.3f} с")
+
+if __name__ == "__main__":
+    main()
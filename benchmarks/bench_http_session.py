@@ -0,0 +1,93 @@
+"""
+Сравнение загрузки через новое соединение на каждый запрос, через общую сессию с пулом и через дисковый кэш
+на локальном HTTP-сервере. Сервер задерживает каждое новое соединение на HANDSHAKE_SECONDS, имитируя
+рукопожатие TCP и TLS с удаленным сервером.
+
+Запуск: python3 benchmarks/bench_http_session.py [запросов] [потоков]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_session import HttpCache, create_session  # noqa: E402
+
+# Имитируемая длительность установки соединения с TLS
+HANDSHAKE_SECONDS = 0.03
+
+# Тело ответа размером с годовую историю дневных баров в JSON
+BODY = b'{"close": [' + b','.join(b'123.456789' for _ in range(2_520)) + b']}'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        time.sleep(HANDSHAKE_SECONDS)
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.send_header('Cache-Control', 'max-age=60')
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(get, urls, workers):
+    """Выполняет запросы в пуле потоков и возвращает затраченное время."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for response in executor.map(get, urls):
+            assert response.status_code == 200
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.lock = threading.Lock()
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base_url}/chart/T{i:04d}" for i in range(count)]
+    folder = tempfile.mkdtemp()
+
+    try:
+        print(f"Запросов: {count:,}, потоков: {workers}")
+        seconds = run(requests.get, urls, workers)
+        print(f"Новое соединение на запрос: {seconds:.2f} с, соединений: {server.connections:,}")
+
+        server.connections = 0
+        session = create_session(pool_size=workers)
+        seconds = run(session.get, urls, workers)
+        print(f"Общая сессия с пулом: {seconds:.2f} с, соединений: {server.connections}")
+
+        cached = create_session(pool_size=workers, cache=HttpCache(folder))
+        run(cached.get, urls, workers)
+        server.connections = 0
+        seconds = run(cached.get, urls, workers)
+        print(f"Повтор из дискового кэша: {seconds:.2f} с, соединений: {server.connections}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
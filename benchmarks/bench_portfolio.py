@@ -0,0 +1,63 @@
+"""
+Замер построения корзины и ее индикаторов в сравнении с циклом по тикерам.
+
+Запуск: python3 benchmarks/bench_portfolio.py [тикеров] [баров]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy_backend  # noqa: E402
+import portfolio  # noqa: E402
+from fixtures import make_ohlcv  # noqa: E402
+
+
+def loop_basket(frames, weights, base=100.0):
+    """Покупка и удержание корзины циклом по тикерам, как при объединении результатов по одному тикеру."""
+    total = None
+    for ticker, frame in frames.items():
+        value = frame[['Open', 'High', 'Low', 'Close']] * (base * weights[ticker] / frame['Close'].iloc[0])
+        total = value if total is None else total.add(value, fill_value=0.0)
+    return total
+
+
+def main():
+    tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 3_000
+    bars = int(sys.argv[2]) if len(sys.argv) > 2 else 2_520
+    frames = {f"T{seed:04d}": make_ohlcv(bars, seed=seed) for seed in range(tickers)}
+    weights = pd.Series(np.random.default_rng(0).uniform(0.5, 1.5, tickers), index=list(frames))
+    weights /= weights.sum()
+
+    start = time.perf_counter()
+    panels = portfolio.align(frames)
+    aligned = time.perf_counter() - start
+
+    start = time.perf_counter()
+    basket = portfolio.basket_ohlcv(panels, weights)
+    built = time.perf_counter() - start
+
+    start = time.perf_counter()
+    numpy_backend.add_indicators(basket)
+    indicators = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = loop_basket(frames, weights)
+    looped = time.perf_counter() - start
+    assert np.allclose(basket['Close'], expected['Close'], rtol=1e-9)
+
+    print(f"Тикеров: {tickers:,}, баров: {bars:,}")
+    print(f"Выравнивание: {aligned:.2f} с, корзина: {built:.3f} с, индикаторы корзины: {indicators:.3f} с")
+    print(f"Цикл по тикерам (только OHLC): {looped:.2f} с, ускорение построения: {looped / built:.0f}x")
+
+    start = time.perf_counter()
+    portfolio.basket_ohlcv(panels, weights, rebalance='M')
+    print(f"Корзина с ежемесячной ребалансировкой: {time.perf_counter() - start:.3f} с")
+
+
+if __name__ == "__main__":
+    main()
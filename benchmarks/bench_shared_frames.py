@@ -0,0 +1,46 @@
+"""
+Сравнение передачи данных рабочим процессам сериализацией DataFrame и через общую память.
+
+Запуск: python3 benchmarks/bench_shared_frames.py [баров] [задач]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_download as dd  # noqa: E402
+import numpy_backend  # noqa: E402
+import shared_frames  # noqa: E402
+from fixtures import make_ohlcv  # noqa: E402
+
+FUNCTIONS = [dd.calculate_rsi, dd.calculate_atr, dd.calculate_macd, dd.calculate_bollinger_bands, dd.calculate_obv,
+             dd.calculate_vwap, dd.calculate_adl, dd.calculate_std_deviation]
+
+
+def main():
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    tasks = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    data = numpy_backend.add_indicators(make_ohlcv(bars, freq='min'))
+    functions = [FUNCTIONS[i % len(FUNCTIONS)] for i in range(tasks)]
+    print(f"Баров: {bars:,}, столбцов: {data.shape[1]}, размер: {data.memory_usage().sum() / 2 ** 20:.0f} МБ, "
+          f"задач: {tasks}")
+
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        executor.submit(len, []).result()
+        start = time.perf_counter()
+        for future in [executor.submit(function, data) for function in functions]:
+            future.result()
+        pickled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    shared_frames.compute_in_workers(data, functions, max_workers=4)
+    shared = time.perf_counter() - start
+
+    print(f"Сериализация DataFrame: {pickled:.2f} с, общая память (вместе с запуском пула): {shared:.2f} с, "
+          f"ускорение: {pickled / shared:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
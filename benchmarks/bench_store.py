@@ -0,0 +1,59 @@
+"""
+Сравнение отбора тикеров запросом к хранилищу SQLite и просмотром CSV-файлов в pandas.
+
+Запуск: python3 benchmarks/bench_store.py [тикеров] [баров]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy_backend  # noqa: E402
+from fixtures import make_ohlcv  # noqa: E402
+from store import IndicatorStore, STORE_COLUMNS, screen_frames  # noqa: E402
+
+CONDITIONS = ['RSI < 30', 'Close < Bollinger_Lower']
+
+
+def main():
+    tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    bars = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = IndicatorStore(os.path.join(folder, 'stocks.db'))
+        paths = {}
+        upsert_seconds = 0.0
+        for seed in range(tickers):
+            ticker = f"T{seed:04d}"
+            data = numpy_backend.add_indicators(make_ohlcv(bars, seed=seed))
+            paths[ticker] = os.path.join(folder, f"{ticker}.csv")
+            data.to_csv(paths[ticker])
+            start = time.perf_counter()
+            store.upsert(ticker, data)
+            upsert_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        frames = {ticker: pd.read_csv(path, index_col=0, parse_dates=True, usecols=['Date'] + STORE_COLUMNS)
+                  for ticker, path in paths.items()}
+        expected = screen_frames(frames, CONDITIONS)
+        scan_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = store.screen(CONDITIONS)
+        query_seconds = time.perf_counter() - start
+        store.close()
+
+    assert list(result['Ticker']) == list(expected['Ticker'])
+    total = tickers * bars
+    print(f"Баров: {total:,}, запись: {upsert_seconds:.2f} с ({total / upsert_seconds:,.0f} баров/с)")
+    print(f"Отобрано тикеров: {len(result)}")
+    print(f"pandas (чтение CSV): {scan_seconds:.3f} с, SQLite: {query_seconds:.4f} с, "
+          f"ускорение: {scan_seconds / query_seconds:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Сравнение скользящих окон по времени (time_windows) с rolling по времени в pandas на нерегулярных минутных барах
+с пропусками.
+
+Для каждого показателя выводится время расчета (с поиском границ окон) и наибольшее относительное отклонение
+от точного расчета по выборке окон: pandas обновляет суммы при добавлении и удалении каждого бара, поэтому на
+длинном ряде с большим разбросом цен его стандартное отклонение накапливает погрешность.
+Затем сравнивается расчет индикаторов RSI, Боллинджера, стохастика, ATR, MFI и отклонения с окном '30min'.
+
+Запуск: python3 benchmarks/bench_time_windows.py [баров]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_download as dd  # noqa: E402
+import time_windows  # noqa: E402
+from fixtures import make_ohlcv  # noqa: E402
+
+# Функции точного расчета окна для оценки погрешности
+EXACT = {'sum': np.nansum, 'mean': np.nanmean, 'std': lambda x: np.nanstd(x, ddof=1), 'min': np.nanmin,
+         'max': np.nanmax}
+
+
+def best_of(function, repeat=3):
+    """Возвращает результат и лучшее время из repeat запусков."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def exact_error(result, values, starts, method, sample):
+    """Наибольшее относительное отклонение от точного расчета по выборке окон."""
+    exact = np.array([EXACT[method](values[starts[i]:i + 1]) for i in sample])
+    known = ~np.isnan(exact) & (exact != 0)
+    return np.max(np.abs(result[sample][known] - exact[known]) / np.abs(exact[known]))
+
+
+def indicators(data, window):
+    dd.calculate_rsi(data, window)
+    dd.calculate_bollinger_bands(data, window)
+    dd.calculate_stochastic_oscillator(data, window, window)
+    dd.calculate_atr(data, window)
+    dd.calculate_mfi(data, window)
+    dd.calculate_std_deviation(data, window)
+
+
+def main():
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    data = make_ohlcv(bars * 2, start='2024-01-02 09:30', freq='min')
+    data = data.iloc[np.sort(np.random.default_rng(0).choice(len(data), bars, replace=False))]
+    close = data['Close']
+    values = close.to_numpy()
+    sample = np.random.default_rng(1).choice(bars, 2_000, replace=False)
+
+    print(f"Баров: {bars:,} (половина минут пропущена)")
+    for window in ('30min', '20D'):
+        starts = time_windows.window_starts(close.index, window)
+        for method in EXACT:
+            expected, pandas_seconds = best_of(lambda: getattr(close.rolling(window), method)())
+            result, seconds = best_of(lambda: getattr(time_windows.rolling(close, window), method)())
+            print(f"{window:>6} {method:<5} pandas: {pandas_seconds * 1000:6.1f} мс "
+                  f"(погрешность {exact_error(expected.to_numpy(), values, starts, method, sample):.1e}), "
+                  f"time_windows: {seconds * 1000:6.1f} мс "
+                  f"(погрешность {exact_error(result.to_numpy(), values, starts, method, sample):.1e}), "
+                  f"ускорение {pandas_seconds / seconds:.1f}x")
+
+    # Индикаторы: те же функции calculate_* с rolling по времени pandas вместо time_windows
+    engine = time_windows.rolling
+    time_windows.rolling = lambda series, window, starts=None: series.rolling(window)
+    try:
+        _, pandas_seconds = best_of(lambda: indicators(data, '30min'))
+    finally:
+        time_windows.rolling = engine
+    _, seconds = best_of(lambda: indicators(data, '30min'))
+    print(f"Индикаторы с окном '30min': pandas {pandas_seconds:.3f} с, time_windows {seconds:.3f} с, "
+          f"ускорение {pandas_seconds / seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
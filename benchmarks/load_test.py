@@ -0,0 +1,98 @@
+"""
+Нагрузочный тест HTTP-сервиса индикаторов.
+
+Запуск: python3 benchmarks/load_test.py --url "http://127.0.0.1:8000/indicators?ticker=AAPL&period=1y" \
+            --concurrency 32 --requests 2000
+"""
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+async def _read_response(reader):
+    """Читает один ответ HTTP/1.1 и возвращает его статус."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Соединение закрыто сервером.")
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+
+async def _client(host, port, request, count, latencies, errors):
+    """Отправляет count запросов по одному соединению keep-alive."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+def percentile(values, fraction):
+    """Возвращает перцентиль отсортированного списка."""
+    if not values:
+        return float('nan')
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+async def run_load_test(url, concurrency=16, requests=1000):
+    """
+    Выполняет нагрузочный тест и возвращает сводку.
+
+    :param url: Адрес запроса (http://host:port/path?query).
+    :param concurrency: Количество одновременных соединений.
+    :param requests: Общее количество запросов.
+    :return: Словарь с количеством запросов, ошибок, p50, p99 (в мс) и запросами в секунду.
+    """
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else '')
+    request = f"GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\n\r\n".encode('latin-1')
+
+    per_client = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(parts.hostname, parts.port or 80, request, count, latencies, errors)
+                           for count in per_client if count))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'requests_per_second': len(latencies) / elapsed if elapsed else float('nan'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест HTTP-сервиса индикаторов.")
+    parser.add_argument('--url', default='http://127.0.0.1:8000/indicators?ticker=AAPL&period=1y')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_load_test(args.url, args.concurrency, args.requests))
+    print(f"Запросов: {summary['requests']}, ошибок: {summary['errors']}")
+    print(f"p50: {summary['p50_ms']:.2f} мс, p99: {summary['p99_ms']:.2f} мс")
+    print(f"Запросов в секунду: {summary['requests_per_second']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
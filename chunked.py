@@ -0,0 +1,226 @@
+"""
+Расчет индикаторов по частям для историй, которые не помещаются в память.
+
+Данные OHLCV читаются с диска блоками по chunk_size баров. К каждому блоку добавляются HALO предыдущих баров,
+нужных оконным индикаторам (самое длинное окно — 52 бара ведущей линии B Ишимоку), и LOOKAHEAD следующих баров
+для запаздывающей линии Ишимоку. Индикаторы, зависящие от всей истории (EMA для MACD, накопленные суммы
+VWAP, OBV и ADL, параболический SAR), продолжаются с перенесенного состояния. Среднее, дисперсия и коэффициент
+вариации цены закрытия рассчитываются отдельным первым проходом по столбцу Close.
+
+В памяти одновременно находятся не более двух блоков, результаты записываются по мере расчета.
+"""
+import numpy as np
+import pandas as pd
+
+from numpy_backend import INDICATOR_COLUMNS, compute_indicators, ewm_mean, join_indicators, parabolic_sar
+from summary_statistics import SummaryStatistics
+
+# Количество предыдущих баров, нужное самому длинному оконному индикатору
+HALO = 52
+
+# Количество следующих баров, нужное запаздывающей линии Ишимоку
+LOOKAHEAD = 26
+
+REQUIRED_COLUMNS = ['High', 'Low', 'Close', 'Volume']
+
+
+def read_csv_chunks(path, chunk_size=100_000):
+    """
+    Читает CSV-файл с данными OHLCV блоками.
+
+    :param path: Путь к файлу в формате export_data_to_csv (первый столбец — дата).
+    :param chunk_size: Количество строк в блоке.
+    :return: Итератор DataFrame.
+    """
+    return pd.read_csv(path, index_col=0, parse_dates=True, chunksize=chunk_size, float_precision='round_trip')
+
+
+def close_statistics(chunks):
+    """
+    Рассчитывает среднее и выборочную дисперсию цены закрытия за один проход, объединяя статистики блоков.
+
+    :param chunks: Итерируемый объект с блоками DataFrame.
+    :return: Кортеж (среднее, дисперсия); NaN, если значений недостаточно.
+    """
+    summary = SummaryStatistics()
+    for chunk in chunks:
+        summary.update(chunk['Close'])
+    return summary.mean, summary.variance
+
+
+def _carried_cumsum(values, carry):
+    """
+    Рассчитывает накопленную сумму с пропуском NaN, продолжая ее со значения carry.
+
+    Суммирование идет в том же порядке, что и при расчете всего ряда, поэтому результат совпадает побитово.
+
+    :return: Кортеж (накопленная сумма, перенос для следующего блока).
+    """
+    missing = np.isnan(values)
+    sums = np.where(missing, 0.0, values)
+    if len(sums):
+        sums[0] += carry
+        np.cumsum(sums, out=sums)
+        carry = sums[-1]
+    sums[missing] = np.nan
+    return sums, carry
+
+
+class CarriedState:
+    """
+    Состояние индикаторов, зависящих от всей истории, между блоками.
+    """
+
+    def __init__(self):
+        self.previous_close = np.nan
+        self.ema_short = None
+        self.ema_long = None
+        self.signal = None
+        self.sums = {'price_volume': 0.0, 'volume': 0.0, 'obv': 0.0, 'adl': 0.0}
+        self.sar = {}
+
+    def update(self, high, low, close, volume, column):
+        """Рассчитывает индикаторы блока с перенесенным состоянием и записывает их в столбцы column."""
+        n = len(close)
+        if not n:
+            return
+
+        delta = np.empty(n)
+        delta[0] = close[0] - self.previous_close
+        np.subtract(close[1:], close[:-1], out=delta[1:])
+        self.previous_close = close[-1]
+
+        # MACD: EMA продолжаются с последних значений предыдущего блока
+        macd = column['MACD']
+        scratch = np.empty(n)
+        ewm_mean(close, 12, macd, self.ema_short)
+        self.ema_short = macd[-1]
+        ewm_mean(close, 26, scratch, self.ema_long)
+        self.ema_long = scratch[-1]
+        macd -= scratch
+        ewm_mean(macd, 9, column['Signal'], self.signal)
+        self.signal = column['Signal'][-1]
+
+        # VWAP
+        price_volume = volume * (high + low + close)
+        price_volume /= 3
+        price_volume, self.sums['price_volume'] = _carried_cumsum(price_volume, self.sums['price_volume'])
+        total_volume, self.sums['volume'] = _carried_cumsum(volume, self.sums['volume'])
+        np.divide(price_volume, total_volume, out=column['VWAP'])
+
+        # OBV
+        obv = np.sign(delta)
+        obv *= volume
+        column['OBV'][:], self.sums['obv'] = _carried_cumsum(obv, self.sums['obv'])
+
+        # ADL
+        adl = close - low
+        adl -= high - close
+        adl /= high - low
+        adl *= volume
+        column['ADL'][:], self.sums['adl'] = _carried_cumsum(adl, self.sums['adl'])
+
+        # Parabolic SAR
+        column['Parabolic_SAR'][:] = parabolic_sar(high, low, close, state=self.sar)
+
+
+def compute_block(halo, chunk, following, state):
+    """
+    Рассчитывает индикаторы блока баров, продолжая индикаторы из STATEFUL_COLUMNS с перенесенного состояния.
+
+    Столбцы среднего, дисперсии и коэффициента вариации цены закрытия не заполняются.
+
+    :param halo: Не более HALO предыдущих баров или None для первого блока.
+    :param chunk: Блок баров DataFrame.
+    :param following: Следующие бары для запаздывающей линии Ишимоку (может быть пустым или None).
+    :param state: CarriedState; обновляется последними значениями блока.
+    :return: Массив формы (len(chunk), len(INDICATOR_COLUMNS)).
+    """
+    parts = [part for part in (halo, chunk, following) if part is not None and len(part)]
+    extended = pd.concat(parts)[REQUIRED_COLUMNS] if len(parts) > 1 else chunk[REQUIRED_COLUMNS]
+    arrays = [extended[name].to_numpy(dtype=float) for name in REQUIRED_COLUMNS]
+    start = 0 if halo is None else len(halo)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        block = compute_indicators(*arrays, stateful=False)[start:start + len(chunk)]
+        column = {name: block[:, i] for i, name in enumerate(INDICATOR_COLUMNS)}
+        state.update(*(array[start:start + len(chunk)] for array in arrays), column)
+    return block
+
+
+def _buffered(chunks, chunk_size):
+    """
+    Перераспределяет блоки произвольной длины так, чтобы каждый выдаваемый блок длины chunk_size
+    сопровождался следующими LOOKAHEAD барами.
+
+    :return: Итератор кортежей (блок, следующие бары).
+    """
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        while buffered >= chunk_size + LOOKAHEAD:
+            data = pd.concat(buffer) if len(buffer) > 1 else buffer[0]
+            yield data.iloc[:chunk_size], data.iloc[chunk_size:chunk_size + LOOKAHEAD]
+            buffer = [data.iloc[chunk_size:]]
+            buffered = len(buffer[0])
+
+    data = pd.concat(buffer) if len(buffer) > 1 else (buffer[0] if buffer else None)
+    while data is not None and len(data):
+        yield data.iloc[:chunk_size], data.iloc[chunk_size:chunk_size + LOOKAHEAD]
+        data = data.iloc[chunk_size:]
+
+
+def iter_indicator_chunks(open_chunks, chunk_size=100_000):
+    """
+    Рассчитывает индикаторы по частям и возвращает блоки данных с добавленными столбцами INDICATOR_COLUMNS.
+
+    Результат совпадает с numpy_backend.add_indicators для всего ряда: оконные индикаторы рассчитываются
+    с запасом HALO предыдущих баров, индикаторы из STATEFUL_COLUMNS — с перенесенным состоянием. Накопленные
+    суммы и SAR совпадают побитово, остальные столбцы — с точностью до округления при суммировании.
+
+    :param open_chunks: Функция без аргументов, возвращающая новый итератор блоков DataFrame; вызывается дважды
+        (первый проход рассчитывает статистики цены закрытия).
+    :param chunk_size: Количество баров в выдаваемом блоке (по умолчанию 100 000).
+    :return: Итератор DataFrame.
+    """
+    if chunk_size < 1:
+        raise ValueError("Размер блока должен быть положительным.")
+
+    mean, variance = close_statistics(open_chunks())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        coefficient_of_variation = np.sqrt(variance) / mean * 100
+
+    state = CarriedState()
+    halo = None
+    for chunk, following in _buffered(open_chunks(), chunk_size):
+        missing = [name for name in REQUIRED_COLUMNS if name not in chunk.columns]
+        if missing:
+            raise ValueError(f"Столбцы {missing} отсутствуют в данных.")
+
+        block = compute_block(halo, chunk, following, state)
+        column = {name: block[:, i] for i, name in enumerate(INDICATOR_COLUMNS)}
+        column['Mean_Closing_Price'][:] = mean
+        column['Variance_Closing_Price'][:] = variance
+        column['Coefficient_of_Variation'][:] = coefficient_of_variation
+
+        yield join_indicators(chunk, block)
+
+        halo = chunk.iloc[-HALO:] if halo is None or len(chunk) >= HALO else pd.concat([halo, chunk]).iloc[-HALO:]
+
+
+def add_indicators_chunked(input_path, output_path, chunk_size=100_000):
+    """
+    Рассчитывает индикаторы для CSV-файла с данными OHLCV по частям и записывает результат в CSV по мере расчета.
+
+    :param input_path: Путь к исходному CSV-файлу (первый столбец — дата).
+    :param output_path: Путь к файлу результата.
+    :param chunk_size: Количество баров в блоке (по умолчанию 100 000).
+    :return: Количество записанных баров.
+    """
+    rows = 0
+    for chunk in iter_indicator_chunks(lambda: read_csv_chunks(input_path, chunk_size), chunk_size):
+        chunk.to_csv(output_path, mode='w' if rows == 0 else 'a', header=rows == 0)
+        rows += len(chunk)
+    return rows
@@ -0,0 +1,30 @@
+# Допустимые периоды загрузки данных yfinance
+VALID_PERIODS = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
+
+# Способы расчета индикаторов
+BACKENDS = ('pandas', 'numpy')
+
+# Соответствие интервалов yfinance частотам pandas для агрегации баров
+TIMEFRAMES = {
+    '1d': 'D',
+    '1wk': 'W-FRI',
+    '1mo': 'ME',
+}
+
+# Допустимые интервалы баров yfinance
+VALID_INTERVALS = ['1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h', '1d', '5d', '1wk', '1mo', '3mo']
+
+# Ограничения yfinance для внутридневных интервалов: (дней в одном запросе, глубина истории в днях)
+INTRADAY_LIMITS = {
+    '1m': (7, 30),
+    '2m': (60, 60),
+    '5m': (60, 60),
+    '15m': (60, 60),
+    '30m': (60, 60),
+    '60m': (730, 730),
+    '90m': (60, 60),
+    '1h': (730, 730),
+}
+
+# Длительность периодов yfinance в днях
+PERIOD_DAYS = {'1d': 1, '5d': 5, '1mo': 30, '3mo': 90, '6mo': 182, '1y': 365, '2y': 730, '5y': 1826, '10y': 3652}
@@ -0,0 +1,146 @@
+"""
+Учет сплитов и дивидендов при дополнении сохраненной истории новыми барами.
+
+yfinance возвращает скорректированные цены: после сплита или дивиденда меняются все более ранние бары. Вместо
+повторной загрузки всей истории сохраненные бары пересчитываются локально тем же правилом, что использует
+yfinance, после чего индикаторы тикера рассчитываются заново:
+
+* сплит с коэффициентом r: цены более ранних баров делятся на r, объемы умножаются на r;
+* дивиденд D: цены более ранних баров умножаются на 1 - D / C, где C — цена закрытия предыдущего бара,
+  скорректированная только на сплиты.
+"""
+import pandas as pd
+
+from data_download import add_indicators
+from numpy_backend import INDICATOR_COLUMNS
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+ACTION_COLUMNS = ['Dividends', 'Stock Splits']
+
+
+def _actions(data):
+    """Возвращает столбцы дивидендов и сплитов (нули, если столбцов нет)."""
+    return pd.DataFrame({column: data[column] if column in data.columns else 0.0 for column in ACTION_COLUMNS},
+                        index=data.index).fillna(0.0)
+
+
+def new_actions(stored, fresh):
+    """
+    Находит корпоративные события в новых барах, которых нет в сохраненной истории.
+
+    Новыми считаются только события после последнего сохраненного бара: событие известно источнику с даты
+    своего бара, поэтому сохраненные бары уже скорректированы на события по эту дату включительно, даже если
+    в сохраненной истории нет столбцов Dividends и Stock Splits.
+
+    :param stored: Сохраненный DataFrame с историей.
+    :param fresh: Новые бары из источника.
+    :return: DataFrame с событиями (столбцы Dividends и Stock Splits) в порядке дат.
+    """
+    actions = _actions(fresh)
+    if not stored.empty:
+        actions = actions[actions.index > stored.index[-1]]
+    has_action = (actions['Dividends'] > 0) | ~actions['Stock Splits'].isin([0.0, 1.0])
+    return actions[has_action]
+
+
+def adjustment_factors(stored, fresh, actions):
+    """
+    Рассчитывает коэффициенты корректировки сохраненных баров на новые события.
+
+    Все новые события относятся к новым барам, то есть позже любого сохраненного, поэтому все сохраненные бары
+    корректируются одними и теми же коэффициентами.
+
+    :param stored: Сохраненные бары, предшествующие новым.
+    :param fresh: Новые бары (уже скорректированные источником на все свои события).
+    :param actions: События из new_actions.
+    :return: Кортеж (множитель цен, множитель объемов).
+    """
+    splits = actions['Stock Splits'].where(~actions['Stock Splits'].isin([0.0, 1.0]), 1.0)
+    split_factor = float(splits.prod())
+
+    # Дивиденды обрабатываются от последнего к первому: цена закрытия предыдущего бара из новых данных уже
+    # скорректирована на все более поздние дивиденды, включая текущий
+    close = fresh['Close'].to_numpy(dtype=float)
+    positions = fresh.index.get_indexer(actions.index)
+    dividends = actions['Dividends'].to_numpy(dtype=float)
+    later = 1.0
+    for position, dividend in zip(positions[::-1], dividends[::-1]):
+        if dividend <= 0:
+            continue
+        if position > 0:
+            previous_close = close[position - 1]
+            later *= previous_close / (previous_close + dividend * later)
+        else:
+            previous_close = stored['Close'].iloc[-1] / split_factor
+            later *= 1 - dividend / previous_close
+    return later / split_factor, split_factor
+
+
+def adjust_history(stored, fresh):
+    """
+    Объединяет сохраненные бары с новыми, пересчитывая сохраненные бары на новые сплиты и дивиденды.
+
+    Новые бары заменяют сохраненные с теми же датами. Столбцы индикаторов отбрасываются.
+
+    :param stored: Сохраненный DataFrame с OHLCV (и, возможно, индикаторами).
+    :param fresh: Новые бары из источника.
+    :return: DataFrame с объединенными барами без индикаторов.
+    """
+    base_columns = [column for column in stored.columns if column not in INDICATOR_COLUMNS]
+    previous = stored.loc[stored.index < fresh.index[0], base_columns].copy()
+
+    actions = new_actions(stored, fresh)
+    if len(actions) and len(previous):
+        price_factor, volume_factor = adjustment_factors(previous, fresh, actions)
+        prices = [column for column in PRICE_COLUMNS if column in previous.columns]
+        previous[prices] = previous[prices].to_numpy(dtype=float) * price_factor
+        if 'Volume' in previous.columns:
+            previous['Volume'] = previous['Volume'].to_numpy(dtype=float) * volume_factor
+
+    return pd.concat([previous, fresh[[column for column in base_columns if column in fresh.columns]]])
+
+
+def merge_history(stored, fresh, backend='numpy'):
+    """
+    Дополняет сохраненную историю новыми барами с учетом новых сплитов и дивидендов.
+
+    Новые бары заменяют сохраненные с теми же датами. Если среди новых баров есть корпоративные события,
+    цены и объемы сохраненных баров пересчитываются векторно, без повторной загрузки. Индикаторы
+    рассчитываются заново, только если история изменилась.
+
+    :param stored: Сохраненный DataFrame с OHLCV (и, возможно, индикаторами).
+    :param fresh: Новые бары из источника.
+    :param backend: Способ расчета индикаторов (по умолчанию 'numpy').
+    :return: DataFrame с объединенной историей и индикаторами.
+    """
+    if fresh.empty:
+        return stored
+    if stored.empty:
+        return add_indicators(fresh, backend)
+    history = adjust_history(stored, fresh)
+    # Повторно загруженные бары без изменений (например, при обновлении без новых баров) оставляют историю
+    # и рассчитанные индикаторы как есть
+    if history.equals(stored[history.columns]):
+        return stored
+    return add_indicators(history, backend)
+
+
+def merge_histories(stored, fresh, backend='numpy'):
+    """
+    Дополняет сохраненные истории нескольких тикеров.
+
+    Тикеры без новых баров остаются без изменений: пересчитываются только затронутые.
+
+    :param stored: Словарь {тикер: сохраненный DataFrame}.
+    :param fresh: Словарь {тикер: новые бары}.
+    :param backend: Способ расчета индикаторов (по умолчанию 'numpy').
+    :return: Кортеж (словарь объединенных историй, список тикеров, истории которых пересчитаны из-за событий).
+    """
+    merged = dict(stored)
+    adjusted = []
+    for ticker, bars in fresh.items():
+        history = stored.get(ticker, pd.DataFrame())
+        if not history.empty and len(new_actions(history, bars)):
+            adjusted.append(ticker)
+        merged[ticker] = merge_history(history, bars, backend)
+    return merged, adjusted
@@ -1,9 +1,30 @@
 import numpy as np
 import pandas as pd
-import yfinance as yf
 
+import data_sources
+import numpy_backend
+import resampling
+import time_windows
+from constants import BACKENDS, VALID_INTERVALS, VALID_PERIODS
+from fetch_metrics import fetch_metrics
+from instrumentation import instrumented, stage
+from numpy_backend import INDICATOR_COLUMNS
+from singleflight import SingleFlight
+from summary_statistics import SummaryStatistics
 
-def fetch_stock_data(ticker, period='1mo', start_date=None, end_date=None):
+# Общие загрузки для одновременных одинаковых запросов
+fetch_flight = SingleFlight()
+
+# Попадания в кэш агрегированных интервалов учитываются в показателях загрузки
+fetch_metrics.watch_cache('timeframe', resampling.timeframe_cache)
+
+
+class DataNotFoundError(LookupError):
+    """Источник не вернул данных для тикера."""
+
+
+def fetch_stock_data(ticker, period='1mo', start_date=None, end_date=None, backend='pandas', timeframe=None,
+                     interval='1d', source=None, cache=None, raise_errors=False):
     """
     Загружает исторические данные о ценах акций с помощью библиотеки yfinance.
 
@@ -11,105 +32,177 @@ def fetch_stock_data(ticker, period='1mo', start_date=None, end_date=None):
     :param period: Период данных (по умолчанию '1mo' для одного месяца).
     :param start_date: Дата начала в формате YYYY-MM-DD (опционально).
     :param end_date: Дата окончания в формате YYYY-MM-DD (опционально).
+    :param backend: Способ расчета индикаторов: 'pandas' (по умолчанию) или 'numpy'.
+    :param timeframe: Интервал баров для расчета индикаторов ('1wk', '1mo' и т.д.); бары агрегируются из
+        загруженных данных без повторной загрузки (опционально).
+    :param interval: Интервал баров yfinance (по умолчанию '1d'); длинные внутридневные диапазоны загружаются
+        параллельно окнами, допустимыми для интервала.
+    :param source: Источник данных с методом history (по умолчанию yfinance).
+    :param cache: Дисковый кэш индикаторов IndicatorCache (опционально).
+    :param raise_errors: Передавать ошибки загрузки и расчета вызывающему вместо вывода сообщения и возврата
+        пустых данных; отсутствие данных тикера вызывает DataNotFoundError (по умолчанию False).
     :return: DataFrame с историческими данными о ценах акций.
     """
-    valid_periods = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
+    if period != 'custom' and period not in VALID_PERIODS:
+        raise ValueError(f"Период '{period}' невалиден, должен быть одним из {VALID_PERIODS} или 'custom'")
 
-    if period != 'custom' and period not in valid_periods:
-        raise ValueError(f"Период '{period}' невалиден, должен быть одним из {valid_periods} или 'custom'")
+    if backend not in BACKENDS:
+        raise ValueError(f"Способ расчета '{backend}' невалиден, должен быть одним из {BACKENDS}")
 
-    try:
-        stock = yf.Ticker(ticker)
-        if period == 'custom' and start_date and end_date:
-            data = stock.history(start=start_date, end=end_date)
-        else:
-            data = stock.history(period=period)
+    if interval not in VALID_INTERVALS:
+        raise ValueError(f"Интервал '{interval}' невалиден, должен быть одним из {VALID_INTERVALS}")
 
-        if data.empty:
-            raise ValueError(f"Данные для тикера {ticker} не найдены.")
-
-        # Добавление скользящего среднего
-        data = add_moving_average(data)
-
-        # Расчет RSI
-        data['RSI'] = calculate_rsi(data)
+    if cache is not None:
+        fetch_metrics.watch_cache('indicators', cache)
 
-        # Расчет MACD
-        data['MACD'], data['Signal'] = calculate_macd(data)
-
-        # Расчет Bollinger Bands
-        data['Bollinger_Upper'], data['Bollinger_Middle'], data['Bollinger_Lower'] = calculate_bollinger_bands(data)
+    try:
+        with stage('download') as download_stage:
+            data = data_sources.download(source or data_sources.default_source, ticker, period, start_date,
+                                         end_date, interval)
+            download_stage.rows = len(data)
 
-        # Расчет Stochastic Oscillator
-        data['Stochastic_K'], data['Stochastic_D'] = calculate_stochastic_oscillator(data)
+        if data.empty:
+            raise DataNotFoundError(f"Данные для тикера {ticker} не найдены.")
 
-        # Расчет VWAP
-        data['VWAP'] = calculate_vwap(data)
+        # Агрегация баров в запрошенный интервал
+        if timeframe is not None:
+            data = resampling.timeframe_cache.get((ticker, period, start_date, end_date), data, timeframe)
 
-        # Расчет ATR
-        data['ATR'] = calculate_atr(data)
+        # Расчет индикаторов выбранным способом
+        data = add_indicators(data, backend, cache)
 
-        # Расчет OBV
-        data['OBV'] = calculate_obv(data)
+        return data
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"Ошибка при загрузке данных для тикера {ticker}: {e}")
+        return pd.DataFrame()
 
-        # Расчет CCI
-        data['CCI'] = calculate_cci(data)
 
-        # Расчет MFI
-        data['MFI'] = calculate_mfi(data)
+def fetch_stock_data_shared(ticker, period='1mo', start_date=None, end_date=None, backend='pandas', timeframe=None,
+                            interval='1d', source=None, cache=None, raise_errors=False):
+    """
+    Загружает данные так же, как fetch_stock_data, но одновременные запросы с одинаковыми параметрами
+    выполняют одну общую загрузку и расчет индикаторов.
 
-        # Расчет ADL
-        data['ADL'] = calculate_adl(data)
+    Общий результат не передается ни одному вызывающему: каждый, включая выполнившего загрузку, получает
+    собственную копию, поэтому может изменять ее, пока другие копируют результат; исключение загрузки получают
+    все участники.
 
-        # Расчет Parabolic SAR
-        data['Parabolic_SAR'] = calculate_parabolic_sar(data)
+    :return: DataFrame с историческими данными о ценах акций.
+    """
+    key = (ticker, period, start_date, end_date, backend, timeframe, interval, id(source), id(cache), raise_errors)
+    data, _ = fetch_flight.do(key, fetch_stock_data, ticker, period, start_date, end_date, backend, timeframe,
+                              interval, source, cache, raise_errors=raise_errors)
+    return data.copy()
 
-        # Расчет Ichimoku Cloud
-        data['Ichimoku_Conversion'], data['Ichimoku_Base'], data['Ichimoku_Leading_Span_A'], data[
-            'Ichimoku_Leading_Span_B'], data['Ichimoku_Lagging_Span'] = calculate_ichimoku_cloud(data)
 
-        # Расчет стандартного отклонения
-        data['Std_Deviation'] = calculate_std_deviation(data)
+def add_indicators(data, backend='pandas', cache=None):
+    """
+    Добавляет к данным о ценах акций все технические индикаторы.
 
-        # Расчет среднего значения цены закрытия
-        data['Mean_Closing_Price'] = calculate_mean_closing_price(data)
+    Исходный DataFrame не изменяется. Каждый индикатор рассчитывается один раз по исходным столбцам,
+    результаты записываются в заранее выделенный блок (бары x INDICATOR_COLUMNS), который присоединяется
+    к данным одной операцией; столбцы индикаторов, уже имеющиеся в данных, заменяются.
 
-        # Расчет дисперсии цены закрытия
-        data['Variance_Closing_Price'] = calculate_variance_closing_price(data)
+    :param data: DataFrame с данными о ценах акций.
+    :param backend: Способ расчета: 'pandas' (по умолчанию) или 'numpy' для расчета по массивам NumPy.
+    :param cache: Дисковый кэш индикаторов IndicatorCache; индикаторы для неизмененных данных загружаются
+        из него без повторного расчета (опционально).
+    :return: Новый DataFrame с исходными столбцами и столбцами INDICATOR_COLUMNS.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Способ расчета '{backend}' невалиден, должен быть одним из {BACKENDS}")
+
+    if backend == 'numpy':
+        return numpy_backend.add_indicators(data, cache)
+
+    if cache is not None:
+        compute = cache.bind(data)
+    else:
+        def compute(function, **params):
+            return function(data, **params)
+
+    block = np.empty((len(data), len(INDICATOR_COLUMNS)), order='F')
+    column = {name: block[:, i] for i, name in enumerate(INDICATOR_COLUMNS)}
+
+    def put(names, *values):
+        """Записывает результаты индикатора в столбцы блока; отсутствующий результат дает NaN."""
+        for name, value in zip(names, values):
+            value = np.asarray(value, dtype=float)
+            if value.shape == (len(data),):
+                column[name][:] = value
+            else:
+                column[name][:] = np.nan
+
+    put(['Moving_Average'], compute(calculate_moving_average))
+    put(['RSI'], compute(calculate_rsi))
+    put(['MACD', 'Signal'], *compute(calculate_macd))
+    put(['Bollinger_Upper', 'Bollinger_Middle', 'Bollinger_Lower'], *compute(calculate_bollinger_bands))
+    put(['Stochastic_K', 'Stochastic_D'], *compute(calculate_stochastic_oscillator))
+    put(['VWAP'], compute(calculate_vwap))
+    put(['ATR'], compute(calculate_atr))
+    put(['OBV'], compute(calculate_obv))
+    put(['CCI'], compute(calculate_cci))
+    put(['MFI'], compute(calculate_mfi))
+    put(['ADL'], compute(calculate_adl))
+    put(['Parabolic_SAR'], compute(calculate_parabolic_sar))
+    put(['Ichimoku_Conversion', 'Ichimoku_Base', 'Ichimoku_Leading_Span_A', 'Ichimoku_Leading_Span_B',
+         'Ichimoku_Lagging_Span'], *compute(calculate_ichimoku_cloud))
+    put(['Std_Deviation'], compute(calculate_std_deviation))
+
+    # Среднее значение, дисперсия и коэффициент вариации цены закрытия за один проход
+    summary = calculate_closing_price_summary(data)
+    column['Mean_Closing_Price'][:] = summary.mean
+    column['Variance_Closing_Price'][:] = summary.variance
+    column['Coefficient_of_Variation'][:] = summary.coefficient_of_variation
+
+    return numpy_backend.join_indicators(data, block)
+
+
+@instrumented
+def calculate_moving_average(data, window_size=5):
+    """
+    Рассчитывает скользящее среднее цены закрытия.
 
-        # Расчет коэффициента вариации
-        data['Coefficient_of_Variation'] = calculate_coefficient_of_variation(data)
+    :param data: DataFrame с данными о ценах акций.
+    :param window_size: Размер окна для скользящего среднего в барах (по умолчанию 5) или по времени ('30min').
+    :return: Series со скользящим средним.
+    """
+    if 'Close' not in data.columns:
+        print("Столбец 'Close' отсутствует в данных.")
+        return pd.Series()
 
-        return data
-    except Exception as e:
-        print(f"Ошибка при загрузке данных для тикера {ticker}: {e}")
-        return pd.DataFrame()
+    return time_windows.rolling(data['Close'], window_size).mean()
 
 
 def add_moving_average(data, window_size=5):
     """
     Добавляет скользящее среднее к данным о ценах акций.
 
+    Изменяет переданный DataFrame: столбец 'Moving_Average' добавляется (или заменяется) в нем самом.
+    Данные из fetch_stock_data и add_indicators уже содержат этот столбец.
+
     :param data: DataFrame с данными о ценах акций.
     :param window_size: Размер окна для скользящего среднего (по умолчанию 5).
-    :return: DataFrame с добавленным столбцом 'Moving_Average'.
+    :return: Тот же DataFrame с добавленным столбцом 'Moving_Average'.
     """
     if 'Close' not in data.columns:
         print("Столбец 'Close' отсутствует в данных.")
         return data
 
-    # Вычисление скользящего среднего для столбца 'Close'
-    data['Moving_Average'] = data['Close'].rolling(window=window_size).mean()
+    data['Moving_Average'] = calculate_moving_average(data, window_size)
 
     return data
 
 
+@instrumented
 def calculate_rsi(data, period=14):
     """
     Рассчитывает индекс относительной силы (RSI).
 
     :param data: DataFrame с данными о ценах акций.
-    :param period: Период для расчета RSI (по умолчанию 14).
+    :param period: Период для расчета RSI в барах (по умолчанию 14) или по времени ('30min', '20D').
     :return: Series с рассчитанным RSI.
     """
     if 'Close' not in data.columns:
@@ -117,13 +210,15 @@ def calculate_rsi(data, period=14):
         return pd.Series()
 
     delta = data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    starts = time_windows.window_bounds(data.index, period)
+    gain = time_windows.rolling(delta.where(delta > 0, 0), period, starts).mean()
+    loss = time_windows.rolling(-delta.where(delta < 0, 0), period, starts).mean()
     rs = gain / loss
     rsi = 100 - (100 / (1 + rs))
     return rsi
 
 
+@instrumented
 def calculate_macd(data, short_period=12, long_period=26, signal_period=9):
     """
     Рассчитывает индикатор MACD.
@@ -145,12 +240,13 @@ def calculate_macd(data, short_period=12, long_period=26, signal_period=9):
     return macd_line, signal_line
 
 
+@instrumented
 def calculate_bollinger_bands(data, window=20, num_std=2):
     """
     Рассчитывает линии Боллинджера.
 
     :param data: DataFrame с данными о ценах акций.
-    :param window: Размер окна для скользящего среднего (по умолчанию 20).
+    :param window: Размер окна для скользящего среднего в барах (по умолчанию 20) или по времени ('30min', '20D').
     :param num_std: Количество стандартных отклонений для расчета полос (по умолчанию 2).
     :return: Три Series: верхняя полоса, средняя полоса, нижняя полоса.
     """
@@ -158,33 +254,37 @@ def calculate_bollinger_bands(data, window=20, num_std=2):
         print("Столбец 'Close' отсутствует в данных.")
         return pd.Series(), pd.Series(), pd.Series()
 
-    rolling_mean = data['Close'].rolling(window=window).mean()
-    rolling_std = data['Close'].rolling(window=window).std()
+    close_window = time_windows.rolling(data['Close'], window)
+    rolling_mean = close_window.mean()
+    rolling_std = close_window.std()
     upper_band = rolling_mean + (rolling_std * num_std)
     lower_band = rolling_mean - (rolling_std * num_std)
     return upper_band, rolling_mean, lower_band
 
 
+@instrumented
 def calculate_stochastic_oscillator(data, k_period=14, d_period=3):
     """
     Рассчитывает стохастический осциллятор.
 
     :param data: DataFrame с данными о ценах акций.
-    :param k_period: Период для %K (по умолчанию 14).
-    :param d_period: Период для %D (по умолчанию 3).
+    :param k_period: Период для %K в барах (по умолчанию 14) или по времени ('30min').
+    :param d_period: Период для %D в барах (по умолчанию 3) или по времени.
     :return: Два Series: %K и %D.
     """
     if 'Low' not in data.columns or 'High' not in data.columns or 'Close' not in data.columns:
         print("Столбцы 'Low', 'High' или 'Close' отсутствуют в данных.")
         return pd.Series(), pd.Series()
 
-    low_min = data['Low'].rolling(window=k_period).min()
-    high_max = data['High'].rolling(window=k_period).max()
+    starts = time_windows.window_bounds(data.index, k_period)
+    low_min = time_windows.rolling(data['Low'], k_period, starts).min()
+    high_max = time_windows.rolling(data['High'], k_period, starts).max()
     k_percent = 100 * ((data['Close'] - low_min) / (high_max - low_min))
-    d_percent = k_percent.rolling(window=d_period).mean()
+    d_percent = time_windows.rolling(k_percent, d_period).mean()
     return k_percent, d_percent
 
 
+@instrumented
 def calculate_vwap(data):
     """
     Рассчитывает средневзвешенную по объему цену (VWAP).
@@ -200,12 +300,13 @@ def calculate_vwap(data):
     return vwap
 
 
+@instrumented
 def calculate_atr(data, period=14):
     """
     Рассчитывает средний истинный диапазон (ATR).
 
     :param data: DataFrame с данными о ценах акций.
-    :param period: Период для расчета ATR (по умолчанию 14).
+    :param period: Период для расчета ATR в барах (по умолчанию 14) или по времени ('30min', '20D').
     :return: Series с рассчитанным ATR.
     """
     if 'High' not in data.columns or 'Low' not in data.columns or 'Close' not in data.columns:
@@ -216,10 +317,11 @@ def calculate_atr(data, period=14):
     high_close = np.abs(data['High'] - data['Close'].shift())
     low_close = np.abs(data['Low'] - data['Close'].shift())
     true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    atr = true_range.rolling(window=period).mean()
+    atr = time_windows.rolling(true_range, period).mean()
     return atr
 
 
+@instrumented
 def calculate_obv(data):
     """
     Рассчитывает накопленный объем (OBV).
@@ -235,12 +337,13 @@ def calculate_obv(data):
     return obv
 
 
+@instrumented
 def calculate_cci(data, period=20):
     """
     Рассчитывает индекс товарного канала (CCI).
 
     :param data: DataFrame с данными о ценах акций.
-    :param period: Период для расчета CCI (по умолчанию 20).
+    :param period: Период для расчета CCI в барах (по умолчанию 20) или по времени ('30min', '20D').
     :return: Series с рассчитанным CCI.
     """
     if 'High' not in data.columns or 'Low' not in data.columns or 'Close' not in data.columns:
@@ -248,18 +351,20 @@ def calculate_cci(data, period=20):
         return pd.Series()
 
     typical_price = (data['High'] + data['Low'] + data['Close']) / 3
-    sma = typical_price.rolling(window=period).mean()
-    mad = typical_price.rolling(window=period).apply(lambda x: np.fabs(x - x.mean()).mean())
+    typical_window = time_windows.rolling(typical_price, period)
+    sma = typical_window.mean()
+    mad = typical_window.apply(lambda x: np.fabs(x - x.mean()).mean())
     cci = (typical_price - sma) / (0.015 * mad)
     return cci
 
 
+@instrumented
 def calculate_mfi(data, period=14):
     """
     Рассчитывает индекс денежного потока (MFI).
 
     :param data: DataFrame с данными о ценах акций.
-    :param period: Период для расчета MFI (по умолчанию 14).
+    :param period: Период для расчета MFI в барах (по умолчанию 14) или по времени ('30min', '20D').
     :return: Series с рассчитанным MFI.
     """
     if 'High' not in data.columns or 'Low' not in data.columns or 'Close' not in data.columns or 'Volume' not in data.columns:
@@ -268,14 +373,18 @@ def calculate_mfi(data, period=14):
 
     typical_price = (data['High'] + data['Low'] + data['Close']) / 3
     money_flow = typical_price * data['Volume']
-    positive_flow = (money_flow.where(data['Close'] > data['Close'].shift(1), 0)).rolling(window=period).sum()
-    negative_flow = (money_flow.where(data['Close'] < data['Close'].shift(1), 0)).rolling(window=period).sum()
+    starts = time_windows.window_bounds(data.index, period)
+    positive_flow = time_windows.rolling(money_flow.where(data['Close'] > data['Close'].shift(1), 0), period,
+                                         starts).sum()
+    negative_flow = time_windows.rolling(money_flow.where(data['Close'] < data['Close'].shift(1), 0), period,
+                                         starts).sum()
 
     # Обработка случая, когда negative_flow равно нулю
     mfi = 100 - (100 / (1 + (positive_flow / negative_flow.replace(0, np.nan))))
     return mfi
 
 
+@instrumented
 def calculate_adl(data):
     """
     Рассчитывает накопленный объем (ADL).
@@ -293,6 +402,7 @@ def calculate_adl(data):
     return adl
 
 
+@instrumented
 def calculate_parabolic_sar(data, acceleration=0.02, max_acceleration=0.2):
     """
     Рассчитывает параболический SAR.
@@ -344,6 +454,7 @@ def calculate_parabolic_sar(data, acceleration=0.02, max_acceleration=0.2):
     return sar
 
 
+@instrumented
 def calculate_ichimoku_cloud(data, conversion_period=9, base_period=26, leading_span_b_period=52,
                              lagging_span_period=26):
     """
@@ -370,6 +481,7 @@ def calculate_ichimoku_cloud(data, conversion_period=9, base_period=26, leading_
     return conversion_line, base_line, leading_span_a, leading_span_b, lagging_span
 
 
+@instrumented
 def calculate_and_display_average_price(data):
     """
     Вычисляет и выводит среднюю цену закрытия акций, дисперсию цены закрытия и коэффициент вариации.
@@ -384,14 +496,11 @@ def calculate_and_display_average_price(data):
         print("Столбец 'Close' пуст.")
         return
 
-    mean_closing_price = data['Close'].mean()
-    variance_closing_price = data['Close'].var()
-    std_deviation = data['Close'].std()
-    coefficient_of_variation = (std_deviation / mean_closing_price) * 100
+    summary = calculate_closing_price_summary(data)
 
-    print(f"Средняя цена закрытия акций: {mean_closing_price:.2f}")
-    print(f"Дисперсия цены закрытия: {variance_closing_price:.2f}")
-    print(f"Коэффициент вариации: {coefficient_of_variation:.2f}%")
+    print(f"Средняя цена закрытия акций: {summary.mean:.2f}")
+    print(f"Дисперсия цены закрытия: {summary.variance:.2f}")
+    print(f"Коэффициент вариации: {summary.coefficient_of_variation:.2f}%")
 
 
 def export_data_to_csv(data, filename):
@@ -409,22 +518,41 @@ def export_data_to_csv(data, filename):
     print(f"Данные успешно экспортированы в файл {filename}")
 
 
+@instrumented
 def calculate_std_deviation(data, window=20):
     """
     Рассчитывает стандартное отклонение цены закрытия.
 
     :param data: DataFrame с данными о ценах акций.
-    :param window: Размер окна для расчета стандартного отклонения (по умолчанию 20).
+    :param window: Размер окна для расчета стандартного отклонения в барах (по умолчанию 20) или по времени
+        ('30min', '20D').
     :return: Series с рассчитанным стандартным отклонением.
     """
     if 'Close' not in data.columns:
         print("Столбец 'Close' отсутствует в данных.")
         return pd.Series()
 
-    std_deviation = data['Close'].rolling(window=window).std()
+    std_deviation = time_windows.rolling(data['Close'], window).std()
     return std_deviation
 
 
+@instrumented
+def calculate_closing_price_summary(data):
+    """
+    Рассчитывает сводные статистики цены закрытия (количество, среднее, дисперсию, стандартное отклонение,
+    коэффициент вариации, минимум и максимум) за один проход.
+
+    :param data: DataFrame с данными о ценах акций.
+    :return: Накопитель SummaryStatistics; его можно объединить со статистиками других частей данных.
+    """
+    if 'Close' not in data.columns:
+        print("Столбец 'Close' отсутствует в данных.")
+        return SummaryStatistics()
+
+    return SummaryStatistics.from_values(data['Close'])
+
+
+@instrumented
 def calculate_mean_closing_price(data):
     """
     Рассчитывает среднее значение цены закрытия.
@@ -436,10 +564,10 @@ def calculate_mean_closing_price(data):
         print("Столбец 'Close' отсутствует в данных.")
         return pd.Series()
 
-    mean_closing_price = data['Close'].mean()
-    return mean_closing_price
+    return calculate_closing_price_summary(data).mean
 
 
+@instrumented
 def calculate_variance_closing_price(data):
     """
     Рассчитывает дисперсию цены закрытия.
@@ -451,10 +579,10 @@ def calculate_variance_closing_price(data):
         print("Столбец 'Close' отсутствует в данных.")
         return pd.Series()
 
-    variance_closing_price = data['Close'].var()
-    return variance_closing_price
+    return calculate_closing_price_summary(data).variance
 
 
+@instrumented
 def calculate_coefficient_of_variation(data):
     """
     Рассчитывает коэффициент вариации цены закрытия.
@@ -466,12 +594,10 @@ def calculate_coefficient_of_variation(data):
         print("Столбец 'Close' отсутствует в данных.")
         return pd.Series()
 
-    mean_closing_price = data['Close'].mean()
-    std_deviation = data['Close'].std()
-    coefficient_of_variation = (std_deviation / mean_closing_price) * 100
-    return coefficient_of_variation
+    return calculate_closing_price_summary(data).coefficient_of_variation
 
 
+@instrumented
 def calculate_correlation_between_closing_prices(data1, data2):
     """
     Рассчитывает корреляцию между ценами закрытия двух разных акций.
@@ -1,8 +1,32 @@
+import base64
+import json
 import os
 
+import numpy as np
 import plotly.graph_objs as go
+import plotly.io as pio
 import plotly.subplots as sp
 
+from instrumentation import instrumented
+
+# Столбцы данных в порядке трасс графика build_figure
+TRACE_COLUMNS = [
+    'Close', 'Moving_Average', 'Bollinger_Upper', 'Bollinger_Lower', 'RSI', 'MACD', 'Signal', 'Stochastic_K',
+    'Stochastic_D', 'OBV', 'CCI', 'MFI', 'ADL', 'Parabolic_SAR', 'Ichimoku_Conversion', 'Ichimoku_Base',
+    'Ichimoku_Leading_Span_A', 'Ichimoku_Leading_Span_B', 'Ichimoku_Lagging_Span', 'VWAP', 'ATR', 'Std_Deviation',
+    'Mean_Closing_Price', 'Variance_Closing_Price', 'Coefficient_of_Variation',
+]
+
+# Столбцы с одним значением на весь ряд; на графике они рисуются отрезком из двух точек
+CONSTANT_COLUMNS = ['Mean_Closing_Price', 'Variance_Closing_Price', 'Coefficient_of_Variation']
+
+# Допустимая погрешность float32 относительно размаха значений трассы
+FLOAT32_TOLERANCE = 1e-5
+
+# Идентификатор блока графика в HTML-файле и метка состояния для дополнения файла новыми барами
+CHART_DIV_ID = 'stock-chart'
+STATE_MARKER = '<!-- chart-state '
+
 
 def plot_price_and_moving_average(data):
     """Построение интерактивного графика цены закрытия и скользящего среднего."""
@@ -161,7 +185,7 @@ def plot_mean_closing_price(data):
     fig = go.Figure()
 
     mean_closing_price = data['Mean_Closing_Price'].iloc[0]
-    fig.add_trace(go.Scatter(x=data.index, y=[mean_closing_price] * len(data), mode='lines',
+    fig.add_trace(go.Scatter(x=data.index[[0, -1]], y=[mean_closing_price] * 2, mode='lines',
                              name='Среднее значение цены закрытия', line=dict(dash='dash')))
 
     fig.update_layout(title='Среднее значение цены закрытия', xaxis_title='Дата', yaxis_title='Цена')
@@ -174,7 +198,7 @@ def plot_variance_closing_price(data):
 
     variance_closing_price = data['Variance_Closing_Price'].iloc[0]
     fig.add_trace(
-        go.Scatter(x=data.index, y=[variance_closing_price] * len(data), mode='lines', name='Дисперсия цены закрытия',
+        go.Scatter(x=data.index[[0, -1]], y=[variance_closing_price] * 2, mode='lines', name='Дисперсия цены закрытия',
                    line=dict(dash='dash')))
 
     fig.update_layout(title='Дисперсия цены закрытия', xaxis_title='Дата', yaxis_title='Дисперсия')
@@ -187,81 +211,226 @@ def plot_coefficient_of_variation(data):
 
     coefficient_of_variation = data['Coefficient_of_Variation'].iloc[0]
     fig.add_trace(
-        go.Scatter(x=data.index, y=[coefficient_of_variation] * len(data), mode='lines', name='Коэффициент вариации',
+        go.Scatter(x=data.index[[0, -1]], y=[coefficient_of_variation] * 2, mode='lines', name='Коэффициент вариации',
                    line=dict(dash='dash')))
 
     fig.update_layout(title='Коэффициент вариации', xaxis_title='Дата', yaxis_title='Коэффициент вариации (%)')
     return fig
 
 
-def create_and_save_plot(data, ticker, period, filename=None):
-    """Создание и сохранение интерактивного графика."""
+def date_values(index):
+    """
+    Переводит даты в миллисекунды от начала эпохи, которые ось типа date в plotly принимает как числа.
+
+    Даты с часовым поясом переводятся в местное время, чтобы график показывал время торгов. Значения возвращаются
+    в float64: типизированные массивы plotly не поддерживают int64, а миллисекунды в float64 представляются точно.
+    """
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+    return index.as_unit('ms').asi8.astype(float)
+
+
+def compact_values(values, tolerance=FLOAT32_TOLERANCE):
+    """
+    Возвращает значения трассы в float32, если погрешность округления не превышает tolerance от их размаха,
+    иначе в float64.
+
+    plotly сохраняет массивы NumPy в HTML как типизированные массивы base64, поэтому float32 вдвое
+    уменьшает размер данных графика.
+    """
+    values = np.asarray(values, dtype=float)
+    finite = values[np.isfinite(values)]
+    if not len(finite):
+        return values.astype(np.float32)
+    with np.errstate(over='ignore'):
+        rounded = finite.astype(np.float32)
+    error = np.abs(rounded.astype(float) - finite).max()
+    scale = finite.max() - finite.min() or np.abs(finite).max()
+    return values.astype(np.float32) if error <= tolerance * scale else values
+
+
+def encode_typed_array(values):
+    """Кодирует массив float32/float64 в типизированный массив base64 в формате plotly.js."""
+    dtype = 'f4' if values.dtype == np.float32 else 'f8'
+    data = np.ascontiguousarray(values, dtype=f'<{dtype}').tobytes()
+    return {'dtype': dtype, 'bdata': base64.b64encode(data).decode('ascii')}
+
+
+def figure_html(fig, **kwargs):
+    """
+    Сохраняет график в HTML, кодируя массивы трасс в base64 независимо от версии plotly
+    (plotly до версии 6 сохраняет массивы NumPy списками чисел).
+
+    :param kwargs: Параметры plotly.io.to_html (например, div_id, include_plotlyjs).
+    :return: Строка HTML.
+    """
+    figure = fig.to_dict()
+    for trace in figure['data']:
+        for key in ('x', 'y'):
+            if isinstance(trace.get(key), np.ndarray) and trace[key].dtype.kind == 'f':
+                trace[key] = encode_typed_array(trace[key])
+    return pio.to_html(figure, validate=False, **kwargs)
+
+
+def _trim_trailing_nan(x, y):
+    """Отбрасывает точки после последнего известного значения (например, у запаздывающей линии Ишимоку)."""
+    known = np.flatnonzero(~np.isnan(y))
+    end = known[-1] + 1 if len(known) else 0
+    return x[:end], y[:end]
+
+
+def build_figure(data, ticker):
+    """
+    Создание интерактивного графика со всеми индикаторами без сохранения в файл.
+
+    Даты трасс хранятся числами в миллисекундах, значения — типизированными массивами (float32, где это
+    достаточно точно), поэтому при сохранении график кодируется в base64, а не в списки чисел JSON.
+    """
     # Проверка на пустые данные
     if data.empty:
         raise ValueError("Данные пусты.")
 
-    # Имя папки для сохранения графиков
-    chart_folder = 'Chart'
-
-    # Проверка существования папки и создание её, если она не существует
-    if not os.path.exists(chart_folder):
-        os.makedirs(chart_folder)
-
-    # Генерация имени файла, если оно не было предоставлено
-    if filename is None:
-        filename = f"{ticker}_{period}_stock_price_chart.html"
-
-    # Полный путь к файлу
-    full_path = os.path.join(chart_folder, filename)
-
     # Создание подграфиков
     fig = sp.make_subplots(rows=16, cols=1, shared_xaxes=True, vertical_spacing=0.02)
 
-    # Построение графиков
-    fig.add_trace(plot_price_and_moving_average(data).data[0], row=1, col=1)
-    fig.add_trace(plot_price_and_moving_average(data).data[1], row=1, col=1)
-    fig.add_trace(plot_price_and_moving_average(data).data[2], row=1, col=1)
-    fig.add_trace(plot_price_and_moving_average(data).data[3], row=1, col=1)
+    # Построение графиков: каждая функция построения вызывается один раз
+    panels = [plot_price_and_moving_average, plot_rsi, plot_macd, plot_stochastic_oscillator, plot_obv, plot_cci,
+              plot_mfi, plot_adl, plot_parabolic_sar, plot_ichimoku_cloud, plot_vwap, plot_atr, plot_std_deviation,
+              plot_mean_closing_price, plot_variance_closing_price, plot_coefficient_of_variation]
+    for row, plot in enumerate(panels, start=1):
+        for trace in plot(data).data:
+            fig.add_trace(trace, row=row, col=1)
+
+    # Компактное представление данных трасс
+    x = date_values(data.index)
+    for trace, column in zip(fig.data, TRACE_COLUMNS):
+        if column in CONSTANT_COLUMNS:
+            trace.x = x[[0, -1]]
+            trace.y = compact_values(trace.y)
+        else:
+            trace.x, values = _trim_trailing_nan(x, data[column].to_numpy(dtype=float))
+            trace.y = compact_values(values)
+    fig.update_xaxes(type='date')
+
+    # Обновление макета
+    fig.update_layout(height=2000, title_text=f"{ticker} Цена акций с течением времени")
 
-    fig.add_trace(plot_rsi(data).data[0], row=2, col=1)
+    return fig
 
-    fig.add_trace(plot_macd(data).data[0], row=3, col=1)
-    fig.add_trace(plot_macd(data).data[1], row=3, col=1)
 
-    fig.add_trace(plot_stochastic_oscillator(data).data[0], row=4, col=1)
-    fig.add_trace(plot_stochastic_oscillator(data).data[1], row=4, col=1)
+def _chart_state(fig):
+    """Формирует метку состояния графика: время последней точки каждой трассы."""
+    last = [int(trace.x[-1]) if len(trace.x) else None for trace in fig.data]
+    return f"{STATE_MARKER}{json.dumps({'last': last})} -->\n"
 
-    fig.add_trace(plot_obv(data).data[0], row=5, col=1)
 
-    fig.add_trace(plot_cci(data).data[0], row=6, col=1)
+def _json_values(values):
+    """Переводит массив в список JSON, заменяя NaN на null."""
+    return [None if np.isnan(value) else float(value) for value in values]
 
-    fig.add_trace(plot_mfi(data).data[0], row=7, col=1)
 
-    fig.add_trace(plot_adl(data).data[0], row=8, col=1)
+def update_chart_file(path, data):
+    """
+    Дополняет сохраненный график барами, появившимися в data после последнего сохранения.
 
-    fig.add_trace(plot_parabolic_sar(data).data[0], row=9, col=1)
+    Существующие данные файла не перезаписываются: перед закрывающими тегами добавляется сценарий
+    Plotly.extendTraces с новыми точками (и Plotly.restyle для линий среднего, дисперсии и коэффициента вариации),
+    а метка состояния обновляется.
 
-    fig.add_trace(plot_ichimoku_cloud(data).data[0], row=10, col=1)
-    fig.add_trace(plot_ichimoku_cloud(data).data[1], row=10, col=1)
-    fig.add_trace(plot_ichimoku_cloud(data).data[2], row=10, col=1)
-    fig.add_trace(plot_ichimoku_cloud(data).data[3], row=10, col=1)
-    fig.add_trace(plot_ichimoku_cloud(data).data[4], row=10, col=1)
+    :param path: Путь к HTML-файлу, сохраненному create_and_save_plot.
+    :param data: DataFrame со всеми барами и индикаторами, включая уже сохраненные.
+    :return: Количество добавленных баров.
+    """
+    if data.empty:
+        raise ValueError("Данные пусты.")
 
-    fig.add_trace(plot_vwap(data).data[0], row=11, col=1)
+    with open(path, 'r+b') as file:
+        size = file.seek(0, os.SEEK_END)
+        tail_start = max(0, size - 65536)
+        file.seek(tail_start)
+        tail = file.read().decode('utf-8')
+        position = tail.rfind(STATE_MARKER)
+        if position < 0:
+            raise ValueError(f"Файл {path} не содержит метки состояния графика.")
+        state = json.loads(tail[position + len(STATE_MARKER):tail.index(' -->', position)])
+
+        x = date_values(data.index)
+        previous_bar = state['last'][0]
+        if previous_bar is not None and not (x == previous_bar).any():
+            raise ValueError("Последний сохраненный бар отсутствует в данных; график нужно построить заново.")
+        added = len(x) if previous_bar is None else int(len(x) - np.searchsorted(x, previous_bar, side='right'))
+        if not added:
+            return 0
+
+        extend_x, extend_y, extended, restyles = [], [], [], []
+        for i, (column, last) in enumerate(zip(TRACE_COLUMNS, state['last'])):
+            values = data[column].to_numpy(dtype=float)
+            if column in CONSTANT_COLUMNS:
+                restyles.append((i, [int(x[0]), int(x[-1])], _json_values(values[[0, -1]])))
+                state['last'][i] = int(x[-1])
+                continue
+            new = slice(0, len(x)) if last is None else slice(np.searchsorted(x, last, side='right'), len(x))
+            new_x, new_y = _trim_trailing_nan(x[new], values[new])
+            if len(new_x):
+                extend_x.append([int(value) for value in new_x])
+                extend_y.append(_json_values(new_y))
+                extended.append(i)
+                state['last'][i] = int(new_x[-1])
+
+        script = ["<script>window.addEventListener('load', function () {"]
+        if extended:
+            script.append(f"Plotly.extendTraces({json.dumps(CHART_DIV_ID)}, "
+                          f"{json.dumps({'x': extend_x, 'y': extend_y})}, {json.dumps(extended)});")
+        for i, restyle_x, restyle_y in restyles:
+            script.append(f"Plotly.restyle({json.dumps(CHART_DIV_ID)}, "
+                          f"{json.dumps({'x': [restyle_x], 'y': [restyle_y]})}, [{i}]);")
+        script.append("});</script>\n")
+
+        file.seek(tail_start + len(tail[:position].encode('utf-8')))
+        file.write(''.join(script).encode('utf-8'))
+        file.write(f"{STATE_MARKER}{json.dumps(state)} -->\n</body>\n</html>".encode('utf-8'))
+        file.truncate()
+
+    return added
+
+
+@instrumented
+def create_and_save_plot(data, ticker, period, filename=None, update=False):
+    """
+    Создание и сохранение интерактивного графика.
+
+    Если update=True и файл графика уже существует, в него добавляются только новые бары (см. update_chart_file).
+    """
+    # Проверка на пустые данные
+    if data.empty:
+        raise ValueError("Данные пусты.")
 
-    fig.add_trace(plot_atr(data).data[0], row=12, col=1)
+    # Имя папки для сохранения графиков
+    chart_folder = 'Chart'
 
-    fig.add_trace(plot_std_deviation(data).data[0], row=13, col=1)
+    # Проверка существования папки и создание её, если она не существует
+    if not os.path.exists(chart_folder):
+        os.makedirs(chart_folder)
 
-    fig.add_trace(plot_mean_closing_price(data).data[0], row=14, col=1)
+    # Генерация имени файла, если оно не было предоставлено
+    if filename is None:
+        filename = f"{ticker}_{period}_stock_price_chart.html"
 
-    fig.add_trace(plot_variance_closing_price(data).data[0], row=15, col=1)
+    # Полный путь к файлу
+    full_path = os.path.join(chart_folder, filename)
 
-    fig.add_trace(plot_coefficient_of_variation(data).data[0], row=16, col=1)
+    # Дополнение существующего графика новыми барами
+    if update and os.path.exists(full_path):
+        added = update_chart_file(full_path, data)
+        print(f"График {full_path} дополнен новыми барами: {added}")
+        return
 
-    # Обновление макета
-    fig.update_layout(height=2000, title_text=f"{ticker} Цена акций с течением времени")
+    # Построение графика со всеми индикаторами
+    fig = build_figure(data, ticker)
 
-    # Сохранение графика в файл
-    fig.write_html(full_path)
+    # Сохранение графика в файл вместе с меткой состояния для последующего дополнения
+    html = figure_html(fig, div_id=CHART_DIV_ID)
+    body_end = html.rindex('</body>')
+    with open(full_path, 'w', encoding='utf-8') as file:
+        file.write(html[:body_end] + _chart_state(fig) + html[body_end:])
     print(f"График сохранен как {full_path}")
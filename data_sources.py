@@ -0,0 +1,162 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from constants import INTRADAY_LIMITS, PERIOD_DAYS, VALID_INTERVALS
+from fetch_metrics import timed_history
+
+# Максимальное количество параллельных запросов при загрузке длинного диапазона
+MAX_FETCH_WORKERS = 4
+
+
+class YahooSource:
+    """
+    Источник исторических данных на основе yfinance.
+
+    Запросы всех тикеров выполняются через одну HTTP-сессию с пулом соединений (http_session.shared_session),
+    поэтому соединения с сервером переиспользуются между тикерами и окнами диапазона.
+    """
+
+    def __init__(self, session=None):
+        """
+        :param session: Сессия requests (по умолчанию общая сессия процесса из http_session).
+        """
+        self.session = session
+
+    def history(self, ticker, period=None, start=None, end=None, interval='1d'):
+        """
+        Загружает бары OHLCV одним запросом к yfinance.
+
+        :param ticker: Тикер акции.
+        :param period: Период данных (используется, если не заданы start и end).
+        :param start: Начало диапазона (включительно).
+        :param end: Конец диапазона (не включительно).
+        :param interval: Интервал баров (по умолчанию '1d').
+        :return: DataFrame с историческими данными.
+        """
+        # yfinance импортируется при первой загрузке, чтобы не замедлять запуск программы
+        import yfinance as yf
+
+        from http_session import shared_session
+
+        stock = yf.Ticker(ticker, session=self.session or shared_session())
+        if start is not None and end is not None:
+            return stock.history(start=start, end=end, interval=interval)
+        return stock.history(period=period, interval=interval)
+
+
+# Источник данных по умолчанию
+default_source = YahooSource()
+
+
+def is_intraday(interval):
+    """Проверяет, относится ли интервал к внутридневным с ограничением глубины истории."""
+    return interval in INTRADAY_LIMITS
+
+
+def resolve_range(period, start_date=None, end_date=None, interval='1d', now=None):
+    """
+    Переводит период в явный диапазон дат для внутридневного интервала.
+
+    Начало диапазона ограничивается глубиной истории, доступной для интервала.
+
+    :param period: Период данных или 'custom'.
+    :param start_date: Дата начала для периода 'custom'.
+    :param end_date: Дата окончания для периода 'custom'.
+    :param interval: Внутридневной интервал баров.
+    :param now: Текущий момент (по умолчанию время вызова).
+    :return: Кортеж (start, end) из pd.Timestamp.
+    """
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    lookback_days = INTRADAY_LIMITS[interval][1]
+    earliest = now - pd.Timedelta(days=lookback_days)
+
+    if period == 'custom':
+        if not start_date or not end_date:
+            raise ValueError("Для периода 'custom' нужно указать даты начала и окончания.")
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    elif period == 'ytd':
+        start, end = pd.Timestamp(year=now.year, month=1, day=1), now
+    elif period == 'max':
+        start, end = earliest, now
+    else:
+        start, end = now - pd.Timedelta(days=PERIOD_DAYS[period]), now
+
+    return max(start, earliest), end
+
+
+def split_range(start, end, max_days):
+    """
+    Делит диапазон на последовательные окна длиной не более max_days дней.
+
+    :param start: Начало диапазона.
+    :param end: Конец диапазона (не включительно).
+    :param max_days: Максимальная длина окна в днях.
+    :return: Список кортежей (начало окна, конец окна).
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    step = pd.Timedelta(days=max_days)
+    windows = []
+    while start < end:
+        window_end = min(start + step, end)
+        windows.append((start, window_end))
+        start = window_end
+    return windows
+
+
+def fetch_range(source, ticker, start, end, interval, max_workers=MAX_FETCH_WORKERS):
+    """
+    Загружает длинный диапазон внутридневных баров окнами, допустимыми для интервала, параллельно.
+
+    Результаты окон склеиваются, повторяющиеся бары на границах окон удаляются.
+
+    :param source: Источник данных с методом history.
+    :param ticker: Тикер акции.
+    :param start: Начало диапазона.
+    :param end: Конец диапазона (не включительно).
+    :param interval: Внутридневной интервал баров.
+    :param max_workers: Максимальное количество параллельных запросов.
+    :return: DataFrame с барами, отсортированными по времени.
+    """
+    windows = split_range(start, end, INTRADAY_LIMITS[interval][0])
+    if not windows:
+        return pd.DataFrame()
+
+    def fetch_window(window):
+        return timed_history(source, ticker, interval, start=window[0], end=window[1])
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(windows))) as executor:
+        parts = [part for part in executor.map(fetch_window, windows) if not part.empty]
+
+    if not parts:
+        return pd.DataFrame()
+
+    data = pd.concat(parts)
+    data = data[~data.index.duplicated(keep='last')]
+    return data.sort_index()
+
+
+def download(source, ticker, period='1mo', start_date=None, end_date=None, interval='1d'):
+    """
+    Загружает бары из источника, разбивая длинные внутридневные диапазоны на допустимые окна.
+
+    Показатели каждого запроса к источнику записываются в fetch_metrics.fetch_metrics.
+
+    :param source: Источник данных с методом history.
+    :param ticker: Тикер акции.
+    :param period: Период данных или 'custom'.
+    :param start_date: Дата начала для периода 'custom'.
+    :param end_date: Дата окончания для периода 'custom'.
+    :param interval: Интервал баров (по умолчанию '1d').
+    :return: DataFrame с историческими данными.
+    """
+    if interval not in VALID_INTERVALS:
+        raise ValueError(f"Интервал '{interval}' невалиден, должен быть одним из {VALID_INTERVALS}")
+
+    if is_intraday(interval):
+        start, end = resolve_range(period, start_date, end_date, interval)
+        return fetch_range(source, ticker, start, end, interval)
+
+    if period == 'custom' and start_date and end_date:
+        return timed_history(source, ticker, interval, start=start_date, end=end_date)
+    return timed_history(source, ticker, interval, period=period)
@@ -0,0 +1,127 @@
+"""
+Экспорт обогащенных данных многих тикеров в один набор данных Parquet, разбитый по тикерам и годам,
+и чтение его с отбором столбцов, тикеров и дат на уровне файлов.
+
+Структура каталога: <root>/ticker=AAPL/year=2024/part-0.parquet. Для работы нужен пакет pyarrow.
+"""
+import os
+
+import pandas as pd
+
+PARTITION_COLUMNS = ['ticker', 'year']
+
+
+def _pyarrow():
+    """Загружает pyarrow и pyarrow.dataset или сообщает, как установить пакет."""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+    except ImportError:
+        raise ImportError("Для экспорта в набор данных Parquet требуется пакет pyarrow: pip install pyarrow")
+    return pyarrow, pyarrow.dataset
+
+
+def _partitioning(ds, pa):
+    return ds.partitioning(pa.schema([('ticker', pa.string()), ('year', pa.int32())]), flavor='hive')
+
+
+def _merge_existing(root, ticker, data):
+    """
+    Объединяет новые данные с уже записанными строками тех же разделов (тикер и годы новых данных).
+
+    Разделы перезаписываются целиком, поэтому без объединения экспорт короткого периода удалил бы более ранние
+    бары того же года. При совпадении дат остаются новые строки.
+    """
+    if not os.path.isdir(os.path.join(root, f"ticker={ticker}")):
+        return data
+    years = data.index.year
+    existing = read_dataset(root, tickers=[ticker], start=f"{years.min()}-01-01", end=f"{years.max() + 1}-01-01")
+    if existing.empty:
+        return data
+    existing = existing.drop(columns='Ticker')
+    existing.index = existing.index.rename(data.index.name)
+    merged = pd.concat([existing, data])
+    return merged[~merged.index.duplicated(keep='last')].sort_index()
+
+
+def write_frames(frames, root='Dataset'):
+    """
+    Записывает данные тикеров в набор данных.
+
+    Разделы тех же тикеров и лет перезаписываются объединением записанных ранее и новых строк: бары, которых
+    нет в новых данных, сохраняются, совпадающие по дате заменяются.
+
+    :param frames: Словарь {тикер: DataFrame с индексом дат}.
+    :param root: Каталог набора данных (по умолчанию Dataset).
+    :return: Количество записанных строк новых данных.
+    """
+    pa, ds = _pyarrow()
+    rows = 0
+    for ticker, data in frames.items():
+        if data.empty:
+            continue
+        rows += len(data)
+        data = _merge_existing(root, ticker, data)
+        table = data.rename_axis('Date').reset_index()
+        table['ticker'] = ticker
+        table['year'] = table['Date'].dt.year.astype('int32')
+        ds.write_dataset(pa.Table.from_pandas(table, preserve_index=False), root, format='parquet',
+                         partitioning=_partitioning(ds, pa), existing_data_behavior='delete_matching',
+                         basename_template='part-{i}.parquet')
+    return rows
+
+
+def _timestamp(value, field_type, pa):
+    """Приводит дату к типу столбца Date с учетом часового пояса."""
+    value = pd.Timestamp(value)
+    timezone = getattr(field_type, 'tz', None)
+    if timezone and value.tzinfo is None:
+        value = value.tz_localize(timezone)
+    elif not timezone and value.tzinfo is not None:
+        value = value.tz_localize(None)
+    return pa.scalar(value, type=field_type)
+
+
+def read_dataset(root='Dataset', columns=None, tickers=None, start=None, end=None):
+    """
+    Читает набор данных, загружая только нужные столбцы, тикеры и даты.
+
+    Условия на тикер и год отсекают целые каталоги разделов, условия на дату проверяются по статистикам групп
+    строк Parquet, поэтому ненужные файлы и группы строк не читаются.
+
+    :param root: Каталог набора данных.
+    :param columns: Список столбцов (по умолчанию все).
+    :param tickers: Список тикеров (по умолчанию все).
+    :param start: Дата начала включительно (опционально).
+    :param end: Дата окончания не включительно (опционально).
+    :return: DataFrame с индексом Date и столбцом Ticker.
+    """
+    pa, ds = _pyarrow()
+    dataset = ds.dataset(root, format='parquet', partitioning=_partitioning(ds, pa))
+    date_type = dataset.schema.field('Date').type
+
+    condition = None
+
+    def add(expression):
+        nonlocal condition
+        condition = expression if condition is None else condition & expression
+
+    if tickers is not None:
+        add(ds.field('ticker').isin(list(tickers)))
+    if start is not None:
+        start = _timestamp(start, date_type, pa)
+        add(ds.field('year') >= start.as_py().year)
+        add(ds.field('Date') >= start)
+    if end is not None:
+        end = _timestamp(end, date_type, pa)
+        add(ds.field('year') <= end.as_py().year)
+        add(ds.field('Date') < end)
+
+    selected = None
+    if columns is not None:
+        selected = ['Date', 'ticker'] + [column for column in columns if column not in ('Date', 'ticker')]
+    table = dataset.to_table(columns=selected, filter=condition)
+
+    data = table.to_pandas().rename(columns={'ticker': 'Ticker'}).drop(columns='year', errors='ignore')
+    data = data.sort_values(['Ticker', 'Date'], kind='stable').set_index('Date')
+    return data
@@ -0,0 +1,224 @@
+"""
+Показатели загрузки данных: задержки запросов, объем полученных данных, категории ошибок и попадания в кэши.
+
+Каждый запрос к источнику (source.history, в том числе каждое окно длинного внутридневного диапазона)
+записывается в общий объект fetch_metrics с разбивкой по тикеру и интервалу. Задержки собираются
+в гистограмму с фиксированными границами, поэтому показатели разных процессов и запусков можно складывать.
+Учет включен всегда: запись одного запроса — несколько сложений под блокировкой, что несопоставимо
+с временем сетевого запроса.
+"""
+import threading
+import time
+
+# Верхние границы корзин гистограммы задержек в секундах
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Категории ошибок загрузки
+ERROR_CATEGORIES = ('timeout', 'connection', 'rate_limit', 'http', 'parse', 'empty', 'other')
+
+
+def categorize(error):
+    """
+    Определяет категорию ошибки загрузки.
+
+    Классы исключений requests и yfinance сопоставляются по именам, чтобы не импортировать эти библиотеки.
+
+    :param error: Исключение.
+    :return: Одна из ERROR_CATEGORIES.
+    """
+    names = [cls.__name__ for cls in type(error).__mro__]
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(response, 'status', None)
+    if any('RateLimit' in name for name in names) or status == 429:
+        return 'rate_limit'
+    if any('Timeout' in name for name in names) or isinstance(error, TimeoutError):
+        return 'timeout'
+    if status is not None or any(name in ('HTTPError', 'HTTPException') for name in names):
+        return 'http'
+    if isinstance(error, ConnectionError) or any('ConnectionError' in name for name in names):
+        return 'connection'
+    if isinstance(error, (ValueError, KeyError, TypeError, IndexError)):
+        return 'parse'
+    return 'other'
+
+
+def frame_bytes(data):
+    """Размер полученных данных в байтах (столбцы и индекс DataFrame)."""
+    return int(data.memory_usage(index=True).sum()) if len(data.columns) else 0
+
+
+class FetchMetrics:
+    """
+    Потокобезопасный сборщик показателей запросов к источнику данных.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        :param buckets: Верхние границы корзин гистограммы задержек в секундах (по возрастанию).
+        """
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, ticker, interval):
+        entry = self._series.get((ticker, interval))
+        if entry is None:
+            entry = {'ticker': ticker, 'interval': interval, 'requests': 0, 'rows': 0, 'bytes': 0,
+                     'seconds': 0.0, 'max_seconds': 0.0, 'buckets': [0] * (len(self.buckets) + 1),
+                     'errors': dict.fromkeys(ERROR_CATEGORIES, 0)}
+            self._series[(ticker, interval)] = entry
+        return entry
+
+    def observe(self, ticker, interval, seconds, rows=0, nbytes=0, error=None):
+        """
+        Записывает один запрос.
+
+        :param ticker: Тикер.
+        :param interval: Интервал баров.
+        :param seconds: Длительность запроса.
+        :param rows: Количество полученных баров.
+        :param nbytes: Объем полученных данных в байтах.
+        :param error: Категория ошибки (см. ERROR_CATEGORIES) или None для успешного запроса.
+        """
+        position = 0
+        while position < len(self.buckets) and seconds > self.buckets[position]:
+            position += 1
+        with self._lock:
+            entry = self._entry(ticker, interval)
+            entry['requests'] += 1
+            entry['rows'] += rows
+            entry['bytes'] += nbytes
+            entry['seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+            entry['buckets'][position] += 1
+            if error is not None:
+                entry['errors'][error] += 1
+
+    def watch_cache(self, name, cache):
+        """
+        Добавляет кэш в показатели; его счетчики попаданий читаются при каждом снимке.
+
+        :param name: Имя кэша в показателях (повторная регистрация с тем же именем заменяет кэш).
+        :param cache: Объект с атрибутами hits и misses (IndicatorCache, TimeframeCache, TTLCache и другие).
+        """
+        with self._lock:
+            self._caches[name] = cache
+
+    def reset(self):
+        """Удаляет накопленные показатели запросов (зарегистрированные кэши сохраняются)."""
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self):
+        """
+        Возвращает текущие показатели.
+
+        :return: Словарь с ключами requests (список показателей по парам тикер и интервал, корзины
+            гистограммы накопительные, как в Prometheus), errors (итоги по категориям) и caches
+            ({имя: {'hits', 'misses', 'hit_ratio'}}).
+        """
+        with self._lock:
+            series = [dict(entry, buckets=list(entry['buckets']), errors=dict(entry['errors']))
+                      for entry in self._series.values()]
+            caches = dict(self._caches)
+
+        requests = []
+        errors = dict.fromkeys(ERROR_CATEGORIES, 0)
+        for entry in sorted(series, key=lambda item: (item['ticker'], item['interval'])):
+            counts = entry.pop('buckets')
+            cumulative = 0
+            histogram = []
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                histogram.append((bound, cumulative))
+            entry['latency_buckets'] = histogram
+            entry['mean_seconds'] = entry['seconds'] / entry['requests']
+            for category, count in entry['errors'].items():
+                errors[category] += count
+            requests.append(entry)
+
+        cache_report = {}
+        for name, cache in sorted(caches.items()):
+            hits, misses = cache.hits, cache.misses
+            total = hits + misses
+            cache_report[name] = {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else 0.0}
+        return {'requests': requests, 'errors': errors, 'caches': cache_report}
+
+    def to_prometheus(self, prefix='stock_fetch'):
+        """
+        Возвращает показатели в текстовом формате Prometheus.
+
+        :param prefix: Префикс имен метрик (по умолчанию 'stock_fetch').
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def header(name, metric_type, description):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        name = f"{prefix}_request_seconds"
+        header(name, 'histogram', 'Длительность запросов к источнику данных в секундах')
+        for entry in snapshot['requests']:
+            labels = f'ticker="{entry["ticker"]}",interval="{entry["interval"]}"'
+            for bound, count in entry['latency_buckets']:
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+            lines.append(f'{name}_sum{{{labels}}} {entry["seconds"]}')
+            lines.append(f'{name}_count{{{labels}}} {entry["requests"]}')
+
+        for key, description in [('rows', 'Количество полученных баров'),
+                                 ('bytes', 'Объем полученных данных в байтах')]:
+            name = f"{prefix}_{key}_total"
+            header(name, 'counter', description)
+            for entry in snapshot['requests']:
+                lines.append(f'{name}{{ticker="{entry["ticker"]}",interval="{entry["interval"]}"}} {entry[key]}')
+
+        name = f"{prefix}_errors_total"
+        header(name, 'counter', 'Количество ошибок загрузки по категориям')
+        for entry in snapshot['requests']:
+            for category, count in entry['errors'].items():
+                if count:
+                    lines.append(f'{name}{{ticker="{entry["ticker"]}",interval="{entry["interval"]}",'
+                                 f'category="{category}"}} {count}')
+
+        for key, description in [('hits', 'Количество попаданий в кэш'), ('misses', 'Количество промахов кэша')]:
+            name = f"{prefix}_cache_{key}_total"
+            header(name, 'counter', description)
+            for cache, counts in snapshot['caches'].items():
+                lines.append(f'{name}{{cache="{cache}"}} {counts[key]}')
+        return "\n".join(lines) + "\n"
+
+
+# Общий сборщик показателей загрузки
+fetch_metrics = FetchMetrics()
+
+
+def timed_history(source, ticker, interval, metrics=None, **kwargs):
+    """
+    Выполняет source.history и записывает показатели запроса.
+
+    Пустой результат записывается как ошибка категории 'empty'; исключения записываются по категориям
+    и передаются дальше.
+
+    :param source: Источник данных с методом history.
+    :param ticker: Тикер акции.
+    :param interval: Интервал баров.
+    :param metrics: Сборщик показателей (по умолчанию fetch_metrics).
+    :param kwargs: Параметры period или start и end.
+    :return: DataFrame, возвращенный источником.
+    """
+    metrics = fetch_metrics if metrics is None else metrics
+    start = time.perf_counter()
+    try:
+        data = source.history(ticker, interval=interval, **kwargs)
+    except Exception as e:
+        metrics.observe(ticker, interval, time.perf_counter() - start, error=categorize(e))
+        raise
+    seconds = time.perf_counter() - start
+    if data.empty:
+        metrics.observe(ticker, interval, seconds, error='empty')
+    else:
+        metrics.observe(ticker, interval, seconds, rows=len(data), nbytes=frame_bytes(data))
+    return data
@@ -0,0 +1,111 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def make_ohlcv(rows=300, start='2020-01-01', freq='B', seed=0, start_price=100.0):
+    """
+    Создает синтетические данные OHLCV в формате, который возвращает yfinance.
+
+    :param rows: Количество баров (по умолчанию 300).
+    :param start: Дата первого бара (по умолчанию '2020-01-01').
+    :param freq: Частота баров в нотации pandas (по умолчанию 'B' — рабочие дни).
+    :param seed: Начальное значение генератора случайных чисел.
+    :param start_price: Начальная цена (по умолчанию 100.0).
+    :return: DataFrame со столбцами Open, High, Low, Close, Volume.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start=start, periods=rows, freq=freq, name='Date')
+
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    open_ = np.concatenate(([start_price], close[:-1])) * np.exp(rng.normal(0, 0.002, rows))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0.001, 0.02, rows))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0.001, 0.02, rows))
+    volume = rng.integers(1_000_000, 5_000_000, rows).astype(float)
+
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+
+
+class FakeSource:
+    """
+    Источник данных для тестов без сети с теми же ограничениями окон, что и у yfinance.
+
+    Бары для каждого тикера генерируются один раз функцией make_ohlcv, каждый вызов history записывается.
+    """
+
+    def __init__(self, rows=300, start='2020-01-01', freq='B', window_limits=None, missing=(), delay=0.0,
+                 visible=None, failing=()):
+        """
+        :param rows: Количество баров на тикер.
+        :param start: Дата первого бара.
+        :param freq: Частота баров в нотации pandas.
+        :param window_limits: Словарь {интервал: максимальная длина запроса в днях}.
+        :param missing: Тикеры, для которых источник возвращает пустые данные.
+        :param delay: Задержка каждого вызова history в секундах (имитация сети).
+        :param visible: Количество первых баров, которые уже "наступили" (по умолчанию все); увеличение
+            имитирует появление новых баров.
+        :param failing: Тикеры, для которых history вызывает ConnectionError.
+        """
+        self.rows = rows
+        self.start = start
+        self.freq = freq
+        self.window_limits = window_limits or {}
+        self.missing = set(missing)
+        self.delay = delay
+        self.visible = visible
+        self.failing = set(failing)
+        self.calls = []
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def frame(self, ticker):
+        """Возвращает полный набор баров тикера."""
+        with self._lock:
+            if ticker not in self._frames:
+                seed = sum(ticker.encode())
+                self._frames[ticker] = make_ohlcv(self.rows, start=self.start, freq=self.freq, seed=seed)
+            return self._frames[ticker]
+
+    def history(self, ticker, period=None, start=None, end=None, interval='1d'):
+        """Возвращает бары тикера, проверяя длину запрошенного окна, как yfinance."""
+        with self._lock:
+            self.calls.append({'ticker': ticker, 'period': period, 'start': start, 'end': end,
+                               'interval': interval})
+        if self.delay:
+            time.sleep(self.delay)
+
+        if ticker in self.failing:
+            raise ConnectionError(f"Источник недоступен для тикера {ticker}")
+        if ticker in self.missing:
+            return pd.DataFrame()
+
+        data = self.frame(ticker)
+        if self.visible is not None:
+            data = data.iloc[:self.visible]
+        if start is None or end is None:
+            return data.copy()
+
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        max_days = self.window_limits.get(interval)
+        if max_days is not None and end - start > pd.Timedelta(days=max_days):
+            raise ValueError(f"Данные {interval} недоступны для окна длиннее {max_days} дней")
+        return data[(data.index >= start) & (data.index < end)].copy()
+
+
+class SimulatedClock:
+    """
+    Имитированные часы для планировщиков: sleep мгновенно переводит время вперед.
+    """
+
+    def __init__(self, start=0.0):
+        self.time = float(start)
+        self.sleeps = []
+
+    def now(self):
+        return self.time
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.time += max(0.0, seconds)
@@ -0,0 +1,346 @@
+"""
+Общая HTTP-сессия для загрузки данных: пул соединений keep-alive и дисковый кэш ответов.
+
+yf.Ticker без явной сессии не гарантирует общего настроенного пула соединений, поэтому при загрузке
+большого списка тикеров соединения и рукопожатия TLS могут повторяться. Сессия из create_session держит до
+pool_size открытых соединений на хост, чего хватает для одновременной загрузки тикеров и окон внутридневных
+диапазонов (4 потока загрузки x MAX_FETCH_WORKERS окон).
+
+Кэш ответов (HttpCache) необязателен и следует правилам HTTP для частного кэша: ответ используется без
+запроса, пока свеж по Cache-Control: max-age или Expires (или эвристически по Last-Modified); устаревший ответ
+с ETag или Last-Modified проверяется условным запросом, и при ответе 304 тело берется из кэша. Ответы
+с no-store, Vary: * и коды, кроме 200, не сохраняются.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Количество соединений на хост по умолчанию: 4 потока загрузки тикеров x 4 окна диапазона
+DEFAULT_POOL_SIZE = 16
+
+# Заголовки, которые не сохраняются: тело в кэше уже раскодировано
+_SKIPPED_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length', 'connection', 'keep-alive')
+
+
+def parse_cache_control(value):
+    """
+    Разбирает заголовок Cache-Control.
+
+    :return: Словарь {директива в нижнем регистре: значение или None}.
+    """
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def _http_date(value):
+    """Переводит дату HTTP в секунды эпохи; None для отсутствующей или некорректной даты."""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness_lifetime(headers):
+    """
+    Время свежести ответа в секундах по правилам частного кэша.
+
+    Порядок: max-age, затем Expires - Date, затем 10% времени с Last-Modified (эвристика RFC 9111).
+
+    :param headers: Заголовки ответа.
+    :return: Время свежести (0 — ответ нужно проверять перед каждым использованием).
+    """
+    headers = CaseInsensitiveDict(headers)
+    directives = parse_cache_control(headers.get('Cache-Control'))
+    if 'no-cache' in directives:
+        return 0.0
+    if 'max-age' in directives:
+        try:
+            return max(float(directives['max-age']), 0.0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    date = _http_date(headers.get('Date'))
+    if 'Expires' in headers:
+        expires = _http_date(headers.get('Expires'))
+        if expires is None or date is None:
+            return 0.0
+        return max(expires - date, 0.0)
+
+    last_modified = _http_date(headers.get('Last-Modified'))
+    if last_modified is not None and date is not None:
+        return max((date - last_modified) / 10, 0.0)
+    return 0.0
+
+
+class HttpCache:
+    """
+    Дисковый кэш ответов HTTP GET с учетом свежести.
+
+    Каждая запись — два файла: <ключ>.json (заголовки, время получения, значения Vary) и <ключ>.body.
+    При превышении max_bytes удаляются записи, к которым дольше всего не обращались.
+    """
+
+    def __init__(self, folder='HttpCache', max_bytes=256 * 1024 * 1024, clock=time.time):
+        """
+        :param folder: Папка для файлов кэша (по умолчанию HttpCache).
+        :param max_bytes: Максимальный суммарный размер тел ответов в байтах (по умолчанию 256 МБ).
+        :param clock: Функция текущего времени в секундах эпохи (для тестов).
+        """
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    def key(self, request):
+        """Ключ записи: метод и полный адрес запроса с параметрами."""
+        return hashlib.blake2b(f"{request.method} {request.url}".encode(), digest_size=20).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.folder, key)
+        return f"{base}.json", f"{base}.body"
+
+    def load(self, request):
+        """
+        Загружает запись для запроса.
+
+        :return: Кортеж (метаданные, тело) или None, если записи нет, она повреждена или не подходит по Vary.
+        """
+        meta_path, body_path = self._paths(self.key(request))
+        try:
+            with open(meta_path, encoding='utf-8') as file:
+                meta = json.load(file)
+            with open(body_path, 'rb') as file:
+                body = file.read()
+            os.utime(body_path)
+        except (OSError, ValueError):
+            return None
+        for name, value in meta['vary'].items():
+            if request.headers.get(name) != value:
+                return None
+        return meta, body
+
+    def is_fresh(self, meta):
+        """Проверяет, свежа ли запись: возраст меньше времени свежести."""
+        age = meta['initial_age'] + self.clock() - meta['stored_at']
+        return age < freshness_lifetime(meta['headers'])
+
+    def storable(self, request, response):
+        """Проверяет, можно ли сохранить ответ."""
+        if request.method != 'GET' or response.status_code != 200:
+            return False
+        if 'no-store' in parse_cache_control(request.headers.get('Cache-Control')):
+            return False
+        directives = parse_cache_control(response.headers.get('Cache-Control'))
+        return 'no-store' not in directives and response.headers.get('Vary', '').strip() != '*'
+
+    def store(self, request, headers, body, initial_age=0.0):
+        """
+        Сохраняет ответ.
+
+        :param request: Запрос (PreparedRequest).
+        :param headers: Заголовки ответа.
+        :param body: Раскодированное тело ответа.
+        :param initial_age: Возраст ответа на момент получения (заголовок Age).
+        :return: Метаданные записи.
+        """
+        vary = [name.strip() for name in headers.get('Vary', '').split(',') if name.strip()]
+        kept = {name: value for name, value in headers.items() if name.lower() not in _SKIPPED_HEADERS}
+        if not any(name.lower() == 'date' for name in kept):
+            kept['Date'] = formatdate(self.clock(), usegmt=True)
+        meta = {
+            'url': request.url,
+            'status': 200,
+            'headers': kept,
+            'stored_at': self.clock(),
+            'initial_age': initial_age,
+            'vary': {name: request.headers.get(name) for name in vary},
+        }
+        meta_path, body_path = self._paths(self.key(request))
+        temporary = os.path.join(self.folder, f".{uuid.uuid4().hex}.tmp")
+        with open(temporary, 'wb') as file:
+            file.write(body)
+        os.replace(temporary, body_path)
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(meta, file)
+        os.replace(temporary, meta_path)
+        self.evict()
+        return meta
+
+    def evict(self):
+        """Удаляет записи, к которым дольше всего не обращались, пока размер тел превышает max_bytes."""
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.folder):
+                if entry.name.endswith('.body'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                for removed in (path, path[:-len('.body')] + '.json'):
+                    try:
+                        os.remove(removed)
+                    except OSError:
+                        pass
+                total -= size
+
+    def clear(self):
+        """Удаляет все записи кэша."""
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith(('.body', '.json')):
+                os.remove(entry.path)
+
+    def count(self, hit, revalidated=False):
+        """Учитывает попадание (в том числе после ответа 304) или промах."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if revalidated:
+                self.revalidations += 1
+
+
+def _initial_age(headers):
+    try:
+        return max(float(headers.get('Age', 0)), 0.0)
+    except ValueError:
+        return 0.0
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    Адаптер requests с пулом соединений, отвечающий на GET из HttpCache, пока ответ свеж.
+    """
+
+    def __init__(self, cache=None, **kwargs):
+        """
+        :param cache: HttpCache или None (только пул соединений).
+        :param kwargs: Параметры HTTPAdapter (pool_connections, pool_maxsize, max_retries, pool_block).
+        """
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        cache = self.cache
+        if cache is None or request.method != 'GET':
+            return super().send(request, **kwargs)
+
+        entry = cache.load(request)
+        request_directives = parse_cache_control(request.headers.get('Cache-Control'))
+        if entry is not None and 'no-cache' not in request_directives and cache.is_fresh(entry[0]):
+            cache.count(hit=True)
+            return self._cached_response(request, *entry)
+
+        if entry is not None:
+            # Условный запрос: сервер ответит 304 без тела, если данные не изменились
+            headers = CaseInsensitiveDict(entry[0]['headers'])
+            if 'ETag' in headers:
+                request.headers['If-None-Match'] = headers['ETag']
+            if 'Last-Modified' in headers:
+                request.headers['If-Modified-Since'] = headers['Last-Modified']
+
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            meta, body = entry
+            response.close()
+            # Заголовки ответа 304 (Date, Cache-Control, ETag) обновляют сохраненные
+            headers = CaseInsensitiveDict(meta['headers'])
+            headers.update(response.headers)
+            meta = cache.store(request, headers, body, _initial_age(response.headers))
+            cache.count(hit=True, revalidated=True)
+            return self._cached_response(request, meta, body)
+
+        cache.count(hit=False)
+        if cache.storable(request, response):
+            cache.store(request, response.headers, response.content, _initial_age(response.headers))
+        return response
+
+    def _cached_response(self, request, meta, body):
+        """Собирает Response из записи кэша; атрибут from_cache равен True."""
+        response = Response()
+        response.status_code = meta['status']
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response._content = body
+        response.connection = self
+        response.from_cache = True
+        return response
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE, cache=None, max_retries=0):
+    """
+    Создает сессию requests с пулом соединений keep-alive и необязательным кэшем ответов.
+
+    :param pool_size: Максимальное количество открытых соединений на хост (по умолчанию 16).
+    :param cache: HttpCache или None.
+    :param max_retries: Количество повторов при ошибках соединения (по умолчанию 0).
+    :return: requests.Session.
+    """
+    if pool_size < 1:
+        raise ValueError("Размер пула соединений должен быть положительным.")
+    session = Session()
+    adapter = CachingAdapter(cache, pool_connections=pool_size, pool_maxsize=pool_size, max_retries=max_retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Общая сессия процесса; создается при первой загрузке
+_shared_session = None
+_session_lock = threading.Lock()
+
+
+def configure(cache_dir=None, pool_size=DEFAULT_POOL_SIZE):
+    """
+    Создает общую сессию с заданными параметрами (заменяет ранее созданную).
+
+    :param cache_dir: Папка дискового кэша ответов или None (без кэша).
+    :param pool_size: Максимальное количество открытых соединений на хост.
+    :return: Общая requests.Session.
+    """
+    global _shared_session
+    cache = HttpCache(cache_dir) if cache_dir else None
+    session = create_session(pool_size, cache)
+    if cache is not None:
+        # Импорт здесь, чтобы модуль можно было использовать отдельно от показателей загрузки
+        from fetch_metrics import fetch_metrics
+
+        fetch_metrics.watch_cache('http', cache)
+    with _session_lock:
+        previous, _shared_session = _shared_session, session
+    if previous is not None:
+        previous.close()
+    return session
+
+
+def shared_session():
+    """Возвращает общую сессию процесса, создавая ее с параметрами по умолчанию при первом вызове."""
+    global _shared_session
+    with _session_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
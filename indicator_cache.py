@@ -0,0 +1,219 @@
+import hashlib
+import inspect
+import os
+import threading
+import uuid
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+# Столбцы исходных данных, от которых зависят индикаторы
+INPUT_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+# Папка модулей проекта: зависимости из нее входят в версию реализации
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def input_digest(data):
+    """
+    Рассчитывает хеш исходных данных OHLCV: индекса и столбцов INPUT_COLUMNS.
+
+    Индекс с датами хешируется как числа, остальные индексы — по значениям (pd.util.hash_pandas_object),
+    поэтому хеш одинаков в разных процессах.
+
+    :param data: DataFrame с данными о ценах акций.
+    :return: Шестнадцатеричная строка хеша.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(data.index, pd.DatetimeIndex):
+        index = data.index.asi8
+    else:
+        index = pd.util.hash_pandas_object(data.index, index=False).to_numpy()
+    digest.update(np.ascontiguousarray(index).tobytes())
+    for column in INPUT_COLUMNS:
+        if column in data.columns:
+            digest.update(column.encode())
+            digest.update(np.ascontiguousarray(data[column].to_numpy(dtype=float)).tobytes())
+    return digest.hexdigest()
+
+
+def _project_dependencies(module):
+    """
+    Модули проекта, от которых зависит модуль, включая его самого.
+
+    Зависимости — модули проекта, импортированные модулем (import time_windows) или из которых импортированы
+    имена (from summary_statistics import SummaryStatistics), с учетом их собственных зависимостей.
+    """
+    found = {}
+    pending = [module]
+    while pending:
+        current = pending.pop()
+        path = getattr(current, '__file__', None)
+        if current.__name__ in found or not path or os.path.dirname(os.path.abspath(path)) != _PROJECT_DIR:
+            continue
+        found[current.__name__] = current
+        for value in vars(current).values():
+            dependency = value if inspect.ismodule(value) else inspect.getmodule(value)
+            if dependency is not None:
+                pending.append(dependency)
+    return [found[name] for name in sorted(found)]
+
+
+def source_version(obj):
+    """
+    Возвращает версию реализации функции или модуля — хеш исходного кода.
+
+    В версию входят исходный код объекта и модулей проекта, от которых зависит его модуль (вспомогательные
+    функции, time_windows, summary_statistics, numpy_backend), поэтому любое изменение реализации или
+    вызываемых ею функций меняет версию и делает старые записи кэша недоступными.
+    """
+    obj = inspect.unwrap(obj)
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(inspect.getsource(obj).encode())
+    module = obj if inspect.ismodule(obj) else inspect.getmodule(obj)
+    for dependency in _project_dependencies(module):
+        digest.update(dependency.__name__.encode())
+        digest.update(inspect.getsource(dependency).encode())
+    return digest.hexdigest()
+
+
+class IndicatorCache:
+    """
+    Дисковый кэш рассчитанных индикаторов с адресацией по содержимому.
+
+    Ключ записи — хеш исходных данных OHLCV, имя индикатора, его параметры и версия реализации.
+    Каждая запись хранится в отдельном файле .npz; при превышении max_bytes удаляются записи,
+    к которым дольше всего не обращались.
+    """
+
+    def __init__(self, folder='Cache', max_bytes=256 * 1024 * 1024):
+        """
+        :param folder: Папка для файлов кэша (по умолчанию Cache).
+        :param max_bytes: Максимальный суммарный размер файлов кэша в байтах (по умолчанию 256 МБ).
+        """
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._versions = {}
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    def version(self, obj):
+        """Возвращает версию реализации, рассчитывая ее один раз для каждого объекта."""
+        name = f"{obj.__module__}.{obj.__qualname__}" if callable(obj) else obj.__name__
+        if name not in self._versions:
+            self._versions[name] = source_version(obj)
+        return self._versions[name]
+
+    def key(self, digest, name, params, version):
+        """Формирует ключ записи из хеша данных, имени индикатора, параметров и версии."""
+        text = f"{digest}|{name}|{sorted(params.items())!r}|{version}"
+        return hashlib.blake2b(text.encode(), digest_size=20).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.folder, f"{key}.npz")
+
+    def load(self, key):
+        """
+        Загружает массивы записи.
+
+        :return: Список массивов или None, если записи нет или файл поврежден.
+        """
+        path = self.path(key)
+        try:
+            with np.load(path) as arrays:
+                columns = [arrays[f"c{i}"] for i in range(len(arrays.files))]
+            os.utime(path)
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return columns
+
+    def store(self, key, columns):
+        """Сохраняет массивы записи и вытесняет старые записи при превышении размера кэша."""
+        temporary = os.path.join(self.folder, f".{uuid.uuid4().hex}.tmp")
+        with open(temporary, 'wb') as file:
+            np.savez(file, **{f"c{i}": column for i, column in enumerate(columns)})
+        os.replace(temporary, self.path(key))
+        self.evict()
+
+    def evict(self):
+        """Удаляет записи, к которым дольше всего не обращались, пока размер кэша превышает max_bytes."""
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.folder):
+                if entry.name.endswith('.npz'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+
+    def size(self):
+        """Возвращает суммарный размер файлов кэша в байтах."""
+        return sum(entry.stat().st_size for entry in os.scandir(self.folder) if entry.name.endswith('.npz'))
+
+    def clear(self):
+        """Удаляет все записи кэша."""
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith('.npz'):
+                os.remove(entry.path)
+
+    def bind(self, data):
+        """
+        Возвращает функцию вида compute(function, **params), которая берет результат индикатора из кэша
+        или рассчитывает function(data, **params) и сохраняет его.
+
+        Хеш исходных данных рассчитывается один раз, поэтому добавление столбцов индикаторов в data
+        между вызовами не меняет ключи.
+        """
+        digest = input_digest(data)
+
+        def compute(function, **params):
+            key = self.key(digest, function.__name__, params, self.version(function))
+            columns = self.load(key)
+            if columns is not None:
+                # Скалярные результаты (например, среднее цены) хранятся нульмерными массивами
+                values = [column[()] if column.ndim == 0 else pd.Series(column, index=data.index)
+                          for column in columns]
+                return values[0] if len(values) == 1 else tuple(values)
+
+            result = function(data, **params)
+            values = [np.asarray(value, dtype=float) for value in (result if isinstance(result, tuple) else (result,))]
+            # Результаты неполной длины (например, при отсутствии столбцов) не кэшируются
+            if all(value.ndim == 0 or len(value) == len(data) for value in values):
+                self.store(key, values)
+            return result
+
+        return compute
+
+    def compute_block(self, data, name, params, module, function):
+        """
+        Возвращает двумерный блок индикаторов из кэша или рассчитывает его вызовом function().
+
+        :param data: DataFrame с исходными данными (для хеша).
+        :param name: Имя блока в ключе.
+        :param params: Словарь параметров блока.
+        :param module: Модуль, исходный код которого определяет версию блока.
+        :param function: Функция без аргументов, рассчитывающая блок.
+        :return: Двумерный массив.
+        """
+        key = self.key(input_digest(data), name, params, self.version(module))
+        columns = self.load(key)
+        if columns is not None:
+            return columns[0]
+        block = function()
+        self.store(key, [block])
+        return block
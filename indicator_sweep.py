@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from numpy_backend import ewm_columns
+
+
+def _close(data):
+    """Возвращает цены закрытия в виде массива float."""
+    if 'Close' not in data.columns:
+        raise ValueError("Столбец 'Close' отсутствует в данных.")
+    return data['Close'].to_numpy(dtype=float)
+
+
+def _windows(windows):
+    """Проверяет сетку окон и возвращает ее в виде массива целых чисел."""
+    windows = np.asarray(list(windows), dtype=int)
+    if windows.size == 0 or (windows < 1).any():
+        raise ValueError("Сетка окон должна состоять из положительных целых чисел.")
+    return windows
+
+
+def rolling_mean_grid(values, windows):
+    """
+    Рассчитывает скользящие средние одного ряда сразу для всех окон по одной накопленной сумме.
+
+    Окно, содержащее NaN, дает NaN, как rolling(window).mean() в pandas.
+
+    :param values: Одномерный массив значений.
+    :param windows: Массив размеров окон.
+    :return: Двумерный массив (бары x окна).
+    """
+    n = len(values)
+    finite = ~np.isnan(values)
+    # Центрирование уменьшает потерю точности при вычитании больших накопленных сумм
+    offset = values[finite].mean() if finite.any() else 0.0
+    sums = np.zeros(n + 1)
+    np.cumsum(np.where(finite, values - offset, 0.0), out=sums[1:])
+    counts = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(finite, out=counts[1:])
+
+    rows = np.arange(1, n + 1)[:, None]
+    starts = np.maximum(rows - windows[None, :], 0)
+    result = (sums[rows] - sums[starts]) / windows + offset
+    result[(counts[rows] - counts[starts]) < windows] = np.nan
+    return result
+
+
+def sma_sweep(data, windows=range(5, 201)):
+    """
+    Рассчитывает скользящее среднее цены закрытия для сетки окон за один проход.
+
+    :param data: DataFrame с данными о ценах акций.
+    :param windows: Сетка размеров окон (по умолчанию от 5 до 200).
+    :return: DataFrame (даты x окна) со скользящими средними.
+    """
+    windows = _windows(windows)
+    result = rolling_mean_grid(_close(data), windows)
+    return pd.DataFrame(result, index=data.index, columns=pd.Index(windows, name='window'))
+
+
+def ema_sweep(data, spans=range(5, 201)):
+    """
+    Рассчитывает экспоненциальное среднее цены закрытия для сетки периодов за один проход.
+
+    :param data: DataFrame с данными о ценах акций.
+    :param spans: Сетка периодов EMA (по умолчанию от 5 до 200).
+    :return: DataFrame (даты x периоды) с EMA.
+    """
+    spans = _windows(spans)
+    close = _close(data)
+    result = ewm_columns(np.broadcast_to(close[:, None], (len(close), len(spans))), spans)
+    return pd.DataFrame(result, index=data.index, columns=pd.Index(spans, name='span'))
+
+
+def rsi_sweep(data, periods=range(5, 31)):
+    """
+    Рассчитывает RSI для сетки периодов, используя одни и те же ряды роста и падения цены.
+
+    :param data: DataFrame с данными о ценах акций.
+    :param periods: Сетка периодов RSI (по умолчанию от 5 до 30).
+    :return: DataFrame (даты x периоды) с RSI.
+    """
+    periods = _windows(periods)
+    delta = np.diff(_close(data), prepend=np.nan)
+    gain = rolling_mean_grid(np.where(delta > 0, delta, 0.0), periods)
+    loss = rolling_mean_grid(np.where(delta < 0, -delta, 0.0), periods)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + gain / loss)
+    return pd.DataFrame(rsi, index=data.index, columns=pd.Index(periods, name='period'))
+
+
+def macd_sweep(data, short_periods=(8, 12), long_periods=(21, 26), signal_period=9):
+    """
+    Рассчитывает MACD для всех пар коротких и длинных периодов.
+
+    EMA каждого уникального периода рассчитывается один раз, сигнальные линии всех пар — одним вызовом.
+
+    :param data: DataFrame с данными о ценах акций.
+    :param short_periods: Сетка коротких периодов EMA.
+    :param long_periods: Сетка длинных периодов EMA.
+    :param signal_period: Период сигнальной линии (по умолчанию 9).
+    :return: Два DataFrame (даты x пары периодов): MACD и сигнальная линия.
+    """
+    short_periods = _windows(short_periods)
+    long_periods = _windows(long_periods)
+    pairs = [(short, long) for short in short_periods for long in long_periods if short < long]
+    if not pairs:
+        raise ValueError("Нет пар, в которых короткий период меньше длинного.")
+
+    emas = ema_sweep(data, np.union1d(short_periods, long_periods))
+    macd = emas[[short for short, _ in pairs]].to_numpy() - emas[[long for _, long in pairs]].to_numpy()
+    signal = ewm_columns(macd, np.full(len(pairs), signal_period))
+
+    columns = pd.MultiIndex.from_tuples(pairs, names=['short', 'long'])
+    return (pd.DataFrame(macd, index=data.index, columns=columns),
+            pd.DataFrame(signal, index=data.index, columns=columns))
@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from functools import wraps
+
+# Активный профилировщик; None означает, что инструментирование выключено
+_active_profiler = None
+
+# Открытые шаги, отслеживающие память, во всех потоках. tracemalloc общий для процесса и хранит один пик,
+# поэтому перед каждым сбросом пика его значение переносится во все открытые шаги
+_memory_stages = []
+_memory_lock = threading.Lock()
+
+
+class Profiler:
+    """
+    Собирает метрики по шагам конвейера: время, процессорное время, число строк и выделенную память.
+
+    Память измеряется tracemalloc для всего процесса: пик шага включает память, выделенную за время шага
+    другими потоками, и память вложенных шагов.
+    """
+
+    def __init__(self, track_memory=True):
+        """
+        :param track_memory: Отслеживать ли выделение памяти через tracemalloc (по умолчанию True).
+        """
+        self.track_memory = track_memory
+        self.started_tracemalloc = False
+        self.started_at = time.time()
+        self.finished_at = None
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, wall_seconds, cpu_seconds, rows=None, allocated_bytes=0):
+        """
+        Добавляет результат одного вызова шага к накопленной статистике.
+
+        :param name: Имя шага (например, 'calculate_rsi').
+        :param wall_seconds: Затраченное время по часам.
+        :param cpu_seconds: Затраченное процессорное время потока.
+        :param rows: Количество обработанных строк (опционально).
+        :param allocated_bytes: Пиковый объем памяти процесса, выделенной за время шага.
+        """
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = {'stage': name, 'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'rows': 0,
+                         'allocated_bytes': 0}
+                self._stages[name] = stage
+            stage['calls'] += 1
+            stage['wall_seconds'] += wall_seconds
+            stage['cpu_seconds'] += cpu_seconds
+            stage['rows'] += rows or 0
+            stage['allocated_bytes'] = max(stage['allocated_bytes'], allocated_bytes)
+
+    def to_dict(self):
+        """
+        Формирует отчет о запуске.
+
+        :return: Словарь с общими сведениями и списком шагов в порядке первого вызова.
+        """
+        with self._lock:
+            stages = [dict(stage) for stage in self._stages.values()]
+        finished_at = self.finished_at if self.finished_at is not None else time.time()
+        return {
+            'started_at': self.started_at,
+            'total_wall_seconds': finished_at - self.started_at,
+            'track_memory': self.track_memory,
+            'stages': stages,
+        }
+
+    def to_json(self):
+        """
+        Возвращает отчет в формате JSON.
+        """
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix='stock_pipeline'):
+        """
+        Возвращает отчет в текстовом формате Prometheus.
+
+        :param prefix: Префикс имен метрик (по умолчанию 'stock_pipeline').
+        """
+        metrics = [
+            ('calls_total', 'counter', 'calls', 'Количество вызовов шага'),
+            ('wall_seconds_total', 'counter', 'wall_seconds', 'Суммарное время шага в секундах'),
+            ('cpu_seconds_total', 'counter', 'cpu_seconds', 'Суммарное процессорное время шага в секундах'),
+            ('rows_total', 'counter', 'rows', 'Количество обработанных строк'),
+            ('allocated_bytes', 'gauge', 'allocated_bytes', 'Пиковый объем выделенной памяти в байтах'),
+        ]
+        stages = self.to_dict()['stages']
+        lines = []
+        for suffix, metric_type, key, description in metrics:
+            name = f"{prefix}_stage_{suffix}"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for stage in stages:
+                lines.append(f'{name}{{stage="{stage["stage"]}"}} {stage[key]}')
+        return "\n".join(lines) + "\n"
+
+    def save_report(self, folder, basename):
+        """
+        Сохраняет отчет в файлы <basename>.json и <basename>.prom.
+
+        :param folder: Папка для сохранения отчетов.
+        :param basename: Имя файлов без расширения.
+        :return: Кортеж путей к JSON и Prometheus файлам.
+        """
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        json_path = os.path.join(folder, f"{basename}.json")
+        prom_path = os.path.join(folder, f"{basename}.prom")
+        with open(json_path, 'w', encoding='utf-8') as file:
+            file.write(self.to_json())
+        with open(prom_path, 'w', encoding='utf-8') as file:
+            file.write(self.to_prometheus())
+        return json_path, prom_path
+
+
+class _Stage:
+    """
+    Контекстный менеджер, измеряющий один шаг конвейера.
+    """
+
+    def __init__(self, profiler, name, rows):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self._tracked = self.profiler.track_memory
+        if self._tracked:
+            with _memory_lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self.profiler.started_tracemalloc = True
+                # Пик до сброса принадлежит открытым шагам (в том числе внешнему шагу этого вызова)
+                _update_peaks(tracemalloc.get_traced_memory()[1])
+                tracemalloc.reset_peak()
+                self._memory_start = self._peak = tracemalloc.get_traced_memory()[0]
+                _memory_stages.append(self)
+        self._cpu_start = time.thread_time()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_seconds = time.perf_counter() - self._wall_start
+        cpu_seconds = time.thread_time() - self._cpu_start
+        allocated_bytes = 0
+        if self._tracked:
+            with _memory_lock:
+                if tracemalloc.is_tracing():
+                    _update_peaks(tracemalloc.get_traced_memory()[1])
+                _memory_stages.remove(self)
+            allocated_bytes = max(self._peak - self._memory_start, 0)
+        self.profiler.record(self.name, wall_seconds, cpu_seconds, self.rows, allocated_bytes)
+        return False
+
+
+def _update_peaks(peak):
+    """Переносит пик tracemalloc во все открытые шаги; вызывается под _memory_lock."""
+    for open_stage in _memory_stages:
+        open_stage._peak = max(open_stage._peak, peak)
+
+
+class _NullStage:
+    """
+    Пустой шаг, который используется, когда инструментирование выключено.
+    """
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def start_profiling(track_memory=True):
+    """
+    Включает инструментирование и возвращает новый профилировщик.
+
+    :param track_memory: Отслеживать ли выделение памяти (по умолчанию True).
+    :return: Активный Profiler.
+    """
+    global _active_profiler
+    _active_profiler = Profiler(track_memory=track_memory)
+    return _active_profiler
+
+
+def stop_profiling():
+    """
+    Выключает инструментирование.
+
+    :return: Профилировщик, который был активен, или None.
+    """
+    global _active_profiler
+    profiler = _active_profiler
+    _active_profiler = None
+    if profiler is not None:
+        profiler.finished_at = time.time()
+        # tracemalloc, запущенный не профилировщиком (например, тестами или отладчиком), не останавливается
+        if profiler.started_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+    return profiler
+
+
+def get_profiler():
+    """
+    Возвращает активный профилировщик или None, если инструментирование выключено.
+    """
+    return _active_profiler
+
+
+def stage(name, rows=None):
+    """
+    Возвращает контекстный менеджер для измерения шага конвейера.
+
+    Если инструментирование выключено, возвращается общий пустой объект без накладных расходов.
+
+    :param name: Имя шага.
+    :param rows: Количество обрабатываемых строк (можно задать позже через атрибут rows).
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        return _NULL_STAGE
+    return _Stage(profiler, name, rows)
+
+
+def instrumented(func):
+    """
+    Декоратор, измеряющий каждый вызов функции как отдельный шаг с именем функции.
+
+    Количество строк берется из длины первого аргумента, если она определена.
+    """
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _active_profiler
+        if profiler is None:
+            return func(*args, **kwargs)
+
+        rows = None
+        if args and hasattr(args[0], '__len__'):
+            rows = len(args[0])
+        with _Stage(profiler, name, rows):
+            return func(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,382 @@
+"""
+Генератор синтетического потока баров для нагрузочного тестирования анализа без сети.
+
+SyntheticFeed создает для каждого тикера бесконечный поток баров OHLCV с заданным шагом, пропусками баров,
+торговой сессией и режимами волатильности (цепь Маркова: спокойный рынок сменяется волатильным и обратно).
+Поток реализует метод history, как источники data_sources, поэтому новые бары обрабатываются тем же путем,
+что и загруженные из yfinance: fetch_stock_data (загрузка, индикаторы), экспорт CSV и построение графика.
+
+run_load подает бары с заданной частотой (открытая модель: задержка отсчитывается от запланированного
+времени поступления бара, поэтому очередь при перегрузке учитывается) или так быстро, как успевает обработка,
+и сообщает пропускную способность, перцентили задержки и рост потребляемой памяти.
+
+Запуск: python3 load_generator.py --tickers 50 --rate 100 --duration 60 --chart-every 20
+"""
+import os
+import queue
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Режимы волатильности по умолчанию: (название, стандартное отклонение логарифмической доходности за бар)
+DEFAULT_REGIMES = (('calm', 0.001), ('volatile', 0.004))
+
+# Признак окончания работы потока обработки
+_DONE = object()
+
+
+class SyntheticFeed:
+    """
+    Поток синтетических баров для нескольких тикеров.
+
+    Генерация каждого тикера детерминирована seed и тикером и не зависит от порядка обращений к другим тикерам.
+    """
+
+    def __init__(self, tickers, bar_seconds=60, start='2024-01-02 09:30', history=500, gap_probability=0.0,
+                 regimes=DEFAULT_REGIMES, switch_probability=0.01, session=None, seed=0):
+        """
+        :param tickers: Список тикеров.
+        :param bar_seconds: Шаг баров в секундах (по умолчанию 60).
+        :param start: Время первого бара.
+        :param history: Количество баров, которые хранятся и возвращаются history (по умолчанию 500).
+        :param gap_probability: Вероятность пропуска бара (биржа не передала бар).
+        :param regimes: Режимы волатильности: кортежи (название, стандартное отклонение доходности за бар).
+        :param switch_probability: Вероятность смены режима на каждом баре.
+        :param session: Торговая сессия (начало, конец), например ('09:30', '16:00'); бары вне сессии и в выходные
+            не создаются (по умолчанию круглосуточно).
+        :param seed: Начальное значение генератора случайных чисел.
+        """
+        if not tickers:
+            raise ValueError("Нужен хотя бы один тикер.")
+        if bar_seconds <= 0 or history < 1:
+            raise ValueError("Шаг баров и длина истории должны быть положительными.")
+        if not 0 <= gap_probability < 1 or not 0 <= switch_probability <= 1:
+            raise ValueError("Вероятности пропуска бара и смены режима должны быть в диапазоне [0, 1).")
+        if not regimes:
+            raise ValueError("Нужен хотя бы один режим волатильности.")
+
+        self.tickers = list(tickers)
+        self.step = pd.Timedelta(seconds=bar_seconds)
+        self.history_size = history
+        self.gap_probability = gap_probability
+        self.regimes = tuple(regimes)
+        self.switch_probability = switch_probability
+        self.session = None if session is None else (pd.Timedelta(f"{session[0]}:00"),
+                                                     pd.Timedelta(f"{session[1]}:00"))
+        self.bars_generated = 0
+        self._state = {}
+        self._lock = threading.Lock()
+        for ticker in self.tickers:
+            rng = np.random.default_rng([seed, zlib.crc32(ticker.encode())])
+            self._state[ticker] = {
+                'rng': rng,
+                'time': pd.Timestamp(start),
+                'close': 100.0 * np.exp(rng.normal(0, 0.3)),
+                'regime': 0,
+                'data': None,
+                'lock': threading.Lock(),
+            }
+            self.advance(ticker, history)
+
+    def _in_session(self, timestamp):
+        if self.session is None:
+            return True
+        offset = timestamp - timestamp.normalize()
+        return timestamp.dayofweek < 5 and self.session[0] <= offset < self.session[1]
+
+    def _next_time(self, timestamp):
+        """Время следующего бара с учетом торговой сессии."""
+        timestamp = timestamp + self.step
+        if self.session is not None and not self._in_session(timestamp):
+            day = timestamp.normalize()
+            if timestamp - day >= self.session[0]:
+                day += pd.Timedelta(days=1)
+            while day.dayofweek >= 5:
+                day += pd.Timedelta(days=1)
+            timestamp = day + self.session[0]
+        return timestamp
+
+    def advance(self, ticker, count=1):
+        """
+        Создает следующие count интервалов тикера; пропущенные интервалы баров не дают.
+
+        :param ticker: Тикер.
+        :param count: Количество интервалов.
+        :return: DataFrame с новыми барами (может быть пустым, если все интервалы пропущены).
+        """
+        state = self._state[ticker]
+        with state['lock']:
+            rng = state['rng']
+            times, closes, sigmas = [], [], []
+            close, regime, timestamp = state['close'], state['regime'], state['time']
+            for _ in range(count):
+                if len(self.regimes) > 1 and rng.random() < self.switch_probability:
+                    regime = (regime + 1 + rng.integers(len(self.regimes) - 1)) % len(self.regimes)
+                sigma = self.regimes[regime][1]
+                close *= np.exp(rng.normal(0, sigma))
+                if rng.random() >= self.gap_probability:
+                    times.append(timestamp)
+                    closes.append(close)
+                    sigmas.append(sigma)
+                timestamp = self._next_time(timestamp)
+
+            rows = len(times)
+            closes, sigmas = np.array(closes), np.array(sigmas)
+            previous = np.concatenate([[state['close']], closes[:-1]]) if rows else closes
+            open_ = previous * np.exp(rng.normal(0, 0.2, rows) * sigmas)
+            high = np.maximum(open_, closes) * (1 + rng.uniform(0, 1, rows) * sigmas)
+            low = np.minimum(open_, closes) * (1 - rng.uniform(0, 1, rows) * sigmas)
+            # Объем растет вместе с волатильностью
+            volume = np.round(rng.lognormal(np.log(20_000), 0.5, rows) * sigmas / self.regimes[0][1])
+            bars = pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': closes, 'Volume': volume},
+                                index=pd.DatetimeIndex(times, name='Date'))
+
+            state['close'], state['regime'], state['time'] = close, regime, timestamp
+            data = bars if state['data'] is None else pd.concat([state['data'], bars])
+            state['data'] = data.iloc[-self.history_size:]
+        with self._lock:
+            self.bars_generated += rows
+        return bars
+
+    def regime(self, ticker):
+        """Возвращает название текущего режима волатильности тикера."""
+        return self.regimes[self._state[ticker]['regime']][0]
+
+    def history(self, ticker, period=None, start=None, end=None, interval='1d'):
+        """
+        Возвращает последние бары тикера (не больше history), как источник данных.
+
+        Период и интервал не учитываются: поток отдает свои бары; start и end ограничивают диапазон дат.
+        """
+        if ticker not in self._state:
+            return pd.DataFrame()
+        data = self._state[ticker]['data']
+        if start is not None and end is not None:
+            data = data[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+        return data.copy()
+
+
+def _rss_bytes():
+    """Текущий объем резидентной памяти процесса в байтах (Linux), иначе пиковый объем."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _percentiles(values):
+    """Перцентили задержки в миллисекундах."""
+    if not values:
+        return {name: float('nan') for name in ('p50', 'p90', 'p99', 'max')}
+    values = np.asarray(values) * 1000
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {'p50': p50, 'p90': p90, 'p99': p99, 'max': values.max()}
+
+
+def run_load(feed, duration=10.0, rate=None, workers=4, backend='numpy', export_dir=None, chart_every=0,
+             bars_per_update=1, sample_interval=0.5):
+    """
+    Подает бары потока на обработку и измеряет ее.
+
+    Каждое обновление: создание новых баров тикера, fetch_stock_data по потоку (загрузка последних баров
+    и расчет индикаторов), экспорт CSV (если задан export_dir) и построение HTML графика для каждого
+    chart_every-го обновления. Обновления одного тикера выполняются одним потоком по порядку.
+
+    :param feed: SyntheticFeed.
+    :param duration: Длительность подачи баров в секундах.
+    :param rate: Обновлений в секунду по всем тикерам; None — подавать, как только освобождается поток
+        обработки (замер максимальной пропускной способности; задержка отсчитывается от начала обработки).
+    :param workers: Количество потоков обработки.
+    :param backend: Способ расчета индикаторов ('numpy' или 'pandas').
+    :param export_dir: Папка для CSV и графиков (по умолчанию экспорт не выполняется).
+    :param chart_every: Строить график каждого N-го обновления (0 — не строить).
+    :param bars_per_update: Количество интервалов, создаваемых одним обновлением.
+    :param sample_interval: Период замера памяти в секундах.
+    :return: Словарь с показателями: updates, bars, errors (пустые результаты и исключения обновлений),
+        elapsed_seconds, updates_per_second, bars_per_second, latency_ms (p50, p90, p99, max; от
+        запланированного поступления до окончания обработки), stage_ms (среднее время этапов),
+        backlog_seconds (отставание на момент окончания подачи), rss_start_mb, rss_end_mb, rss_peak_mb
+        и rss_growth_mb_per_minute (наклон линейной регрессии).
+        Среднее время этапа считается по обновлениям, в которых этап выполнялся.
+    """
+    import data_download as dd
+
+    if workers < 1:
+        raise ValueError("Количество потоков обработки должно быть положительным.")
+    if rate is not None and rate <= 0:
+        raise ValueError("Частота обновлений должна быть положительной.")
+    if chart_every:
+        import data_plotting as dplt
+    if export_dir:
+        os.makedirs(export_dir, exist_ok=True)
+
+    queues = [queue.Queue(maxsize=0 if rate is not None else 2) for _ in range(workers)]
+    owner = {ticker: i % workers for i, ticker in enumerate(feed.tickers)}
+    lock = threading.Lock()
+    latencies = []
+    stage_seconds, stage_counts = {}, {}
+    counters = {'updates': 0, 'bars': 0, 'errors': 0, 'charts': 0}
+
+    def work(jobs):
+        while True:
+            job = jobs.get()
+            if job is _DONE:
+                return
+            # Ошибка одного обновления не останавливает поток: иначе его очередь перестанет разбираться,
+            # и подача обновлений заблокируется
+            try:
+                process(*job)
+            except Exception:
+                with lock:
+                    counters['errors'] += 1
+
+    def process(ticker, scheduled):
+        timings = {}
+        start = time.perf_counter()
+        if scheduled is None:
+            scheduled = start
+        bars = feed.advance(ticker, bars_per_update)
+        timings['generate'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        data = dd.fetch_stock_data(ticker, '1mo', backend=backend, source=feed)
+        timings['fetch'] = time.perf_counter() - start
+
+        with lock:
+            number = counters['updates'] = counters['updates'] + 1
+        if export_dir and not data.empty:
+            start = time.perf_counter()
+            data.to_csv(os.path.join(export_dir, f"{ticker}_load_stock_data.csv"))
+            timings['export'] = time.perf_counter() - start
+        if chart_every and number % chart_every == 0 and not data.empty:
+            start = time.perf_counter()
+            html = dplt.figure_html(dplt.build_figure(data, ticker), include_plotlyjs='cdn')
+            if export_dir:
+                with open(os.path.join(export_dir, f"{ticker}_load_chart.html"), 'w', encoding='utf-8') as file:
+                    file.write(html)
+            timings['chart'] = time.perf_counter() - start
+
+        finished = time.perf_counter()
+        with lock:
+            latencies.append(finished - scheduled)
+            counters['bars'] += len(bars)
+            counters['errors'] += int(data.empty)
+            counters['charts'] += int('chart' in timings)
+            for name, seconds in timings.items():
+                stage_seconds[name] = stage_seconds.get(name, 0.0) + seconds
+                stage_counts[name] = stage_counts.get(name, 0) + 1
+
+    memory = [(0.0, _rss_bytes())]
+    stop_sampling = threading.Event()
+
+    def sample(origin):
+        while not stop_sampling.wait(sample_interval):
+            memory.append((time.perf_counter() - origin, _rss_bytes()))
+
+    threads = [threading.Thread(target=work, args=(jobs,), daemon=True) for jobs in queues]
+    for thread in threads:
+        thread.start()
+    origin = time.perf_counter()
+    sampler = threading.Thread(target=sample, args=(origin,), daemon=True)
+    sampler.start()
+
+    # Подача обновлений по кругу по тикерам; при заданной частоте — по расписанию
+    submitted = 0
+    deadline = origin + duration
+    while True:
+        if rate is not None:
+            scheduled = origin + submitted / rate
+            if scheduled >= deadline:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        else:
+            scheduled = None
+            if time.perf_counter() >= deadline:
+                break
+        ticker = feed.tickers[submitted % len(feed.tickers)]
+        queues[owner[ticker]].put((ticker, scheduled))
+        submitted += 1
+
+    dispatched = time.perf_counter()
+    for jobs in queues:
+        jobs.put(_DONE)
+    for thread in threads:
+        thread.join()
+    finished = time.perf_counter()
+    stop_sampling.set()
+    sampler.join()
+    memory.append((finished - origin, _rss_bytes()))
+
+    elapsed = finished - origin
+    seconds, rss = np.array(memory, dtype=float).T
+    growth = np.polyfit(seconds / 60, rss / 2 ** 20, 1)[0] if len(memory) > 2 and seconds[-1] > 0 else 0.0
+    updates = counters['updates']
+    return {
+        'updates': updates,
+        'bars': counters['bars'],
+        'errors': counters['errors'],
+        'charts': counters['charts'],
+        'elapsed_seconds': elapsed,
+        'updates_per_second': updates / elapsed if elapsed else float('nan'),
+        'bars_per_second': counters['bars'] / elapsed if elapsed else float('nan'),
+        'latency_ms': _percentiles(latencies),
+        'stage_ms': {name: total / stage_counts[name] * 1000 for name, total in stage_seconds.items()},
+        'backlog_seconds': finished - dispatched,
+        'rss_start_mb': rss[0] / 2 ** 20,
+        'rss_end_mb': rss[-1] / 2 ** 20,
+        'rss_peak_mb': rss.max() / 2 ** 20,
+        'rss_growth_mb_per_minute': growth,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Нагрузочный тест анализа на синтетическом потоке баров.")
+    parser.add_argument('--tickers', type=int, default=20, help="Количество тикеров (по умолчанию 20).")
+    parser.add_argument('--rate', type=float, help="Обновлений в секунду по всем тикерам (по умолчанию максимум).")
+    parser.add_argument('--duration', type=float, default=30.0, help="Длительность в секундах (по умолчанию 30).")
+    parser.add_argument('--workers', type=int, default=4, help="Потоков обработки (по умолчанию 4).")
+    parser.add_argument('--backend', choices=['numpy', 'pandas'], default='numpy',
+                        help="Способ расчета индикаторов (по умолчанию numpy).")
+    parser.add_argument('--history', type=int, default=500, help="Баров в окне анализа (по умолчанию 500).")
+    parser.add_argument('--bar-seconds', type=int, default=60, help="Шаг баров в секундах (по умолчанию 60).")
+    parser.add_argument('--gap-probability', type=float, default=0.01,
+                        help="Вероятность пропуска бара (по умолчанию 0.01).")
+    parser.add_argument('--switch-probability', type=float, default=0.01,
+                        help="Вероятность смены режима волатильности на баре (по умолчанию 0.01).")
+    parser.add_argument('--session', help="Торговая сессия, например 09:30-16:00 (по умолчанию круглосуточно).")
+    parser.add_argument('--export-dir', help="Папка для CSV и графиков (по умолчанию без экспорта).")
+    parser.add_argument('--chart-every', type=int, default=0,
+                        help="Строить график каждого N-го обновления (по умолчанию не строить).")
+    parser.add_argument('--seed', type=int, default=0, help="Начальное значение генератора.")
+    args = parser.parse_args()
+
+    session = tuple(args.session.split('-')) if args.session else None
+    feed = SyntheticFeed([f"SYN{i:04d}" for i in range(args.tickers)], args.bar_seconds, history=args.history,
+                         gap_probability=args.gap_probability, switch_probability=args.switch_probability,
+                         session=session, seed=args.seed)
+    report = run_load(feed, args.duration, args.rate, args.workers, args.backend, args.export_dir, args.chart_every)
+
+    latency, stages = report['latency_ms'], report['stage_ms']
+    print(f"Обновлений: {report['updates']:,}, баров: {report['bars']:,}, ошибок: {report['errors']}, "
+          f"графиков: {report['charts']}")
+    print(f"Пропускная способность: {report['updates_per_second']:.1f} обновлений/с, "
+          f"{report['bars_per_second']:.1f} баров/с")
+    print(f"Задержка: p50 {latency['p50']:.1f} мс, p90 {latency['p90']:.1f} мс, p99 {latency['p99']:.1f} мс, "
+          f"максимум {latency['max']:.1f} мс; отставание к концу подачи {report['backlog_seconds']:.2f} с")
+    print("Среднее время этапов: " + ", ".join(f"{name} {ms:.2f} мс" for name, ms in stages.items()))
+    print(f"Память: {report['rss_start_mb']:.0f} -> {report['rss_end_mb']:.0f} МБ "
+          f"(пик {report['rss_peak_mb']:.0f} МБ), рост {report['rss_growth_mb_per_minute']:.2f} МБ/мин")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import os
+import sys
 
-import data_download as dd
-import data_plotting as dplt
+import instrumentation
+from constants import BACKENDS, TIMEFRAMES, VALID_INTERVALS, VALID_PERIODS
 
 
 def create_styles_file():
@@ -10,9 +11,11 @@ def create_styles_file():
     """
     styles_file = 'styles.txt'
     if not os.path.exists(styles_file):
+        from matplotlib import style
+
         with open(styles_file, 'w') as file:
-            for style in plt.style.available:
-                file.write(f"{style}\n")
+            for style_name in style.available:
+                file.write(f"{style_name}\n")
 
 
 def notify_if_strong_fluctuations(data, threshold):
@@ -40,6 +43,7 @@ def notify_if_strong_fluctuations(data, threshold):
         print(f"Колебания цены акций в пределах нормы: {fluctuation:.2f}% (порог: {threshold}%)")
 
 
+@instrumentation.instrumented
 def export_data_to_csv(data, filename):
     """
     Экспортирует данные об акциях в CSV файл в папку Data_CSV.
@@ -64,42 +68,216 @@ def export_data_to_csv(data, filename):
     print(f"Данные успешно экспортированы в файл {full_path}")
 
 
-def main():
-    print("Добро пожаловать в инструмент получения и построения графиков биржевых данных.")
-    print(
-        "Вот несколько примеров биржевых тикеров, которые вы можете рассмотреть: AAPL (Apple Inc), GOOGL (Alphabet Inc), MSFT (Microsoft Corporation), AMZN (Amazon.com Inc), TSLA (Tesla Inc).")
-    print(
-        "Общие периоды времени для данных о запасах включают: 1д, 5д, 1мес, 3мес, 6мес, 1г, 2г, 5г, 10л, с начала года, макс.")
+def run_watchlist(args, period, start_date, end_date):
+    """
+    Обрабатывает список тикеров конвейером и выводит счетчики этапов.
+
+    :param args: Пространство имен argparse с параметрами запуска.
+    :param period: Период данных.
+    :param start_date: Дата начала для периода custom.
+    :param end_date: Дата окончания для периода custom.
+    """
+    import pipeline
+
+    cache = None
+    if args.cache_dir:
+        from indicator_cache import IndicatorCache
+
+        cache = IndicatorCache(args.cache_dir)
+    store = None
+    if args.store:
+        from store import IndicatorStore
+
+        store = IndicatorStore(args.store)
+
+    tickers = [ticker.strip() for ticker in args.watchlist.split(',') if ticker.strip()]
+    try:
+        results, line = pipeline.run_watchlist(tickers, period=period, start_date=start_date, end_date=end_date,
+                                               interval=args.interval, backend=args.backend,
+                                               timeframe=args.timeframe, plot=args.plot, dataset=args.dataset,
+                                               store=store, cache=cache, update_chart=args.update_chart)
+    finally:
+        if store is not None:
+            store.close()
+    print(f"Обработано тикеров: {len(results)} из {len(tickers)}")
+    for stats in line.report():
+        print(f"{stats['stage']}: {stats['processed']} шт., {stats['throughput']:.2f} шт./с, "
+              f"ожидание очереди {stats['blocked_seconds']:.2f} с")
+    for stage_name, item, error in line.errors:
+        ticker = item['ticker'] if isinstance(item, dict) else item
+        print(f"Ошибка на этапе {stage_name} для {ticker}: {error}")
+
+
+def run_refresh(args, period):
+    """
+    Обновляет тикеры списка по расписанию до прерывания (Ctrl+C) и выводит показатели планировщика.
+
+    :param args: Пространство имен argparse с параметрами запуска.
+    :param period: Период первой загрузки истории.
+    """
+    import refresh
 
-    # Создание файла styles.txt, если он не существует
-    create_styles_file()
+    exports = [refresh.dataset_export(args.dataset) if args.dataset else refresh.csv_export()]
+    store = None
+    if args.store:
+        from store import IndicatorStore
 
-    # Ввод тикера акции и периода
-    ticker = input("Введите тикер акции (например, «AAPL» для Apple Inc): ")
-    period = input("Введите период для данных (например, '1mo' для одного месяца) или 'custom' для указания дат: ")
+        store = IndicatorStore(args.store)
+        exports.append(refresh.store_export(store))
 
-    if period.lower() == 'custom':
-        start_date = input("Введите дату начала в формате YYYY-MM-DD: ")
-        end_date = input("Введите дату окончания в формате YYYY-MM-DD: ")
+    daemon = refresh.RefreshDaemon(period=period, interval=args.interval, exports=exports)
+    for ticker in (ticker.strip() for ticker in args.watchlist.split(',')):
+        if ticker:
+            daemon.add(ticker, args.refresh)
+
+    print(f"Обновление {len(daemon.tickers)} тикеров каждые {args.refresh:g} с. Для остановки нажмите Ctrl+C.")
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        daemon.stop()
+    finally:
+        if store is not None:
+            store.close()
+    metrics = daemon.metrics()
+    print(f"Обновлений: {metrics['refreshes']}, ошибок: {metrics['failures']}, "
+          f"добавлено баров: {metrics['bars_added']}")
+
+
+def parse_args(argv=None):
+    """
+    Разбирает аргументы командной строки.
+
+    Если тикер не указан, недостающие параметры запрашиваются интерактивно.
+
+    :param argv: Список аргументов (по умолчанию берется из sys.argv).
+    :return: Пространство имен argparse с параметрами запуска.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Получение, анализ и построение графиков биржевых данных.")
+    parser.add_argument('ticker', nargs='?', help="Тикер акции (например, AAPL). Без него параметры запрашиваются "
+                                                  "интерактивно.")
+    parser.add_argument('--period', default='1mo', help="Период данных (например, 1mo) или custom (по умолчанию 1mo).")
+    parser.add_argument('--start', dest='start_date', help="Дата начала в формате YYYY-MM-DD для периода custom.")
+    parser.add_argument('--end', dest='end_date', help="Дата окончания в формате YYYY-MM-DD для периода custom.")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Порог колебаний в процентах (по умолчанию 10).")
+    parser.add_argument('--backend', choices=BACKENDS, default='pandas',
+                        help="Способ расчета индикаторов (по умолчанию pandas).")
+    parser.add_argument('--interval', choices=VALID_INTERVALS, default='1d',
+                        help="Интервал баров yfinance (по умолчанию 1d); например, 5m для пятиминутных баров.")
+    parser.add_argument('--timeframe', choices=list(TIMEFRAMES),
+                        help="Интервал баров для анализа (например, 1wk); бары агрегируются из загруженных данных.")
+    parser.add_argument('--cache-dir', help="Папка дискового кэша индикаторов; индикаторы для неизмененных данных "
+                                            "загружаются из нее без повторного расчета.")
+    parser.add_argument('--update-chart', action='store_true',
+                        help="Дополнить существующий файл графика новыми барами вместо построения заново.")
+    parser.add_argument('--watchlist', help="Тикеры через запятую (например, AAPL,MSFT,GOOGL); загрузка, расчет, "
+                                            "построение графиков и экспорт выполняются конвейером одновременно.")
+    parser.add_argument('--dataset', help="Каталог набора данных Parquet (по тикерам и годам) для экспорта вместо "
+                                          "CSV; требуется pyarrow.")
+    parser.add_argument('--store', help="Файл базы SQLite, в которую дополнительно записываются бары и индикаторы "
+                                        "для отбора тикеров (store.IndicatorStore.screen).")
+    parser.add_argument('--refresh', type=float, metavar='SECONDS',
+                        help="Вместе с --watchlist: обновлять тикеры каждые SECONDS секунд, загружая только новые "
+                             "бары, до прерывания (Ctrl+C).")
+    parser.add_argument('--http-cache', help="Папка дискового кэша HTTP-ответов yfinance; свежие ответы берутся из "
+                                             "кэша, устаревшие проверяются условными запросами.")
+    parser.add_argument('--no-plot', dest='plot', action='store_false', help="Не строить график.")
+    args = parser.parse_args(argv)
+
+    if args.period != 'custom' and args.period not in VALID_PERIODS:
+        parser.error(f"Период '{args.period}' невалиден, должен быть одним из {VALID_PERIODS} или 'custom'")
+    if args.refresh is not None:
+        if not args.watchlist:
+            parser.error("--refresh используется только вместе с --watchlist.")
+        if args.refresh <= 0:
+            parser.error("--refresh должен быть положительным числом секунд.")
+        # Обновление по расписанию дополняет индикаторы само и не строит графики
+        unsupported = [option for option, value in (('--cache-dir', args.cache_dir), ('--timeframe', args.timeframe),
+                                                    ('--update-chart', args.update_chart)) if value]
+        if unsupported:
+            parser.error(f"{', '.join(unsupported)} не поддерживается вместе с --refresh.")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.ticker is None and not args.watchlist:
+        print("Добро пожаловать в инструмент получения и построения графиков биржевых данных.")
+        print(
+            "Вот несколько примеров биржевых тикеров, которые вы можете рассмотреть: AAPL (Apple Inc), GOOGL (Alphabet Inc), MSFT (Microsoft Corporation), AMZN (Amazon.com Inc), TSLA (Tesla Inc).")
+        print(
+            "Общие периоды времени для данных о запасах включают: 1д, 5д, 1мес, 3мес, 6мес, 1г, 2г, 5г, 10л, с начала года, макс.")
+
+        # Создание файла styles.txt, если он не существует
+        create_styles_file()
+
+        # Ввод тикера акции и периода
+        ticker = input("Введите тикер акции (например, «AAPL» для Apple Inc): ")
+        period = input("Введите период для данных (например, '1mo' для одного месяца) или 'custom' для указания дат: ")
+
+        if period.lower() == 'custom':
+            start_date = input("Введите дату начала в формате YYYY-MM-DD: ")
+            end_date = input("Введите дату окончания в формате YYYY-MM-DD: ")
+        else:
+            start_date = None
+            end_date = None
+
+        # Ввод порога колебаний
+        threshold = float(input("Введите порог колебаний в процентах (например, '10' для 10%): "))
     else:
-        start_date = None
-        end_date = None
+        ticker, period, start_date, end_date = args.ticker, args.period, args.start_date, args.end_date
+        threshold = args.threshold
 
-    # Ввод порога колебаний
-    threshold = float(input("Введите порог колебаний в процентах (например, '10' для 10%): "))
+    # Метка периода в именах файлов с учетом интервала баров
+    period_label = period if args.interval == '1d' else f"{period}_{args.interval}"
+    if args.timeframe:
+        period_label = f"{period_label}_{args.timeframe}"
+
+    # Проверка периода до загрузки тяжелых библиотек
+    if period != 'custom' and period not in VALID_PERIODS:
+        print(f"Ошибка ввода данных: Период '{period}' невалиден, должен быть одним из {VALID_PERIODS} или 'custom'")
+        return 1
+
+    # Общая HTTP-сессия всех загрузок с дисковым кэшем ответов
+    if args.http_cache:
+        import http_session
+
+        http_session.configure(cache_dir=args.http_cache)
+
+    # Обработка списка тикеров конвейером
+    if args.watchlist and args.refresh:
+        run_refresh(args, period)
+        return
+
+    if args.watchlist:
+        run_watchlist(args, period, start_date, end_date)
+        return
+
+    # Включение инструментирования, если задана переменная окружения STOCK_PROFILE
+    profiler = instrumentation.start_profiling() if os.environ.get('STOCK_PROFILE') else None
 
     try:
+        # pandas, numpy и yfinance загружаются только при реальной обработке данных
+        import data_download as dd
+
+        cache = None
+        if args.cache_dir:
+            from indicator_cache import IndicatorCache
+
+            cache = IndicatorCache(args.cache_dir)
+
         # Загрузка данных о акциях
-        stock_data = dd.fetch_stock_data(ticker, period, start_date, end_date)
+        stock_data = dd.fetch_stock_data(ticker, period, start_date, end_date, backend=args.backend,
+                                         timeframe=args.timeframe, interval=args.interval, cache=cache)
 
         # Проверка на пустые данные
         if stock_data.empty:
             print("Загруженные данные пусты.")
             return
 
-        # Добавление скользящего среднего к данным
-        stock_data = dd.add_moving_average(stock_data)
-
         # Вычисление и вывод средней цены закрытия акций
         dd.calculate_and_display_average_price(stock_data)
 
@@ -107,17 +285,51 @@ def main():
         notify_if_strong_fluctuations(stock_data, threshold)
 
         # Построение графика данных с использованием Plotly
-        dplt.create_and_save_plot(stock_data, ticker, period)
+        if args.plot:
+            import data_plotting as dplt
+
+            dplt.create_and_save_plot(stock_data, ticker, period_label, update=args.update_chart)
+
+        # Экспорт данных в набор данных Parquet или в CSV файл
+        if args.dataset:
+            import dataset
 
-        # Экспорт данных в CSV файл
-        csv_filename = f"{ticker}_{period}_stock_data.csv"
-        export_data_to_csv(stock_data, csv_filename)
+            dataset.write_frames({ticker: stock_data}, args.dataset)
+            print(f"Данные экспортированы в набор данных {args.dataset}")
+        else:
+            csv_filename = f"{ticker}_{period_label}_stock_data.csv"
+            export_data_to_csv(stock_data, csv_filename)
+
+        # Запись баров и индикаторов в хранилище SQLite
+        if args.store:
+            from store import IndicatorStore
+
+            store = IndicatorStore(args.store)
+            try:
+                store.upsert(ticker, stock_data)
+            finally:
+                store.close()
+            print(f"Данные записаны в хранилище {args.store}")
 
     except ValueError as ve:
         print(f"Ошибка ввода данных: {ve}")
     except Exception as e:
         print(f"Произошла ошибка: {e}")
+    finally:
+        # Сохранение отчета о производительности шагов в папку Profile
+        if profiler is not None:
+            instrumentation.stop_profiling()
+            json_path, prom_path = profiler.save_report('Profile', f"{ticker}_{period_label}_profile")
+            print(f"Отчет о производительности сохранен в файлы {json_path} и {prom_path}")
+
+            # Показатели запросов к источнику данных: задержки, объем, ошибки и попадания в кэши
+            from fetch_metrics import fetch_metrics
+
+            fetch_path = os.path.join('Profile', f"{ticker}_{period_label}_fetch.prom")
+            with open(fetch_path, 'w', encoding='utf-8') as file:
+                file.write(fetch_metrics.to_prometheus())
+            print(f"Показатели загрузки сохранены в файл {fetch_path}")
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,480 @@
+import sys
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from instrumentation import instrumented
+from summary_statistics import SummaryStatistics
+
+# Столбцы индикаторов в том же порядке, в котором их добавляет fetch_stock_data
+INDICATOR_COLUMNS = [
+    'Moving_Average', 'RSI', 'MACD', 'Signal', 'Bollinger_Upper', 'Bollinger_Middle', 'Bollinger_Lower',
+    'Stochastic_K', 'Stochastic_D', 'VWAP', 'ATR', 'OBV', 'CCI', 'MFI', 'ADL', 'Parabolic_SAR',
+    'Ichimoku_Conversion', 'Ichimoku_Base', 'Ichimoku_Leading_Span_A', 'Ichimoku_Leading_Span_B',
+    'Ichimoku_Lagging_Span', 'Std_Deviation', 'Mean_Closing_Price', 'Variance_Closing_Price',
+    'Coefficient_of_Variation',
+]
+
+# Индикаторы, значение которых зависит от всей предшествующей истории, а не от окна фиксированной длины
+STATEFUL_COLUMNS = ['MACD', 'Signal', 'VWAP', 'OBV', 'ADL', 'Parabolic_SAR']
+
+# До pandas 3.0 concat копирует данные, если не передать copy=False; начиная с 3.0 копирование отложенное,
+# а параметр copy устарел
+_CONCAT_WITHOUT_COPY = {'copy': False} if int(pd.__version__.split('.')[0]) < 3 else {}
+
+# Максимальный размер блока при расчете EMA; подбирается так, чтобы веса внутри блока не переполнялись
+EWM_MAX_BLOCK = 256
+
+
+def rolling_sum(values, window, out):
+    """
+    Рассчитывает скользящую сумму через накопленные суммы.
+
+    Окно, содержащее NaN, дает NaN, как rolling(window).sum() в pandas.
+
+    :param values: Одномерный массив значений.
+    :param window: Размер окна.
+    :param out: Выходной массив той же длины.
+    :return: Массив out.
+    """
+    out[:] = np.nan
+    n = len(values)
+    if n < window:
+        return out
+
+    finite = ~np.isnan(values)
+    sums = np.cumsum(np.where(finite, values, 0.0))
+    counts = np.cumsum(finite)
+
+    window_sums = out[window - 1:]
+    window_sums[0] = sums[window - 1]
+    np.subtract(sums[window:], sums[:-window], out=window_sums[1:])
+    window_counts = counts[window - 1:].copy()
+    window_counts[1:] -= counts[:-window]
+    window_sums[window_counts < window] = np.nan
+    return out
+
+
+def rolling_mean(values, window, out):
+    """
+    Рассчитывает скользящее среднее, как rolling(window).mean() в pandas.
+    """
+    rolling_sum(values, window, out)
+    out /= window
+    return out
+
+
+def rolling_std(values, window, out):
+    """
+    Рассчитывает скользящее стандартное отклонение (ddof=1), как rolling(window).std() в pandas.
+
+    Значения центрируются относительно общего среднего, чтобы уменьшить потерю точности при вычитании сумм квадратов.
+    Окно, содержащее NaN, дает NaN, как в rolling_sum.
+    """
+    out[:] = np.nan
+    n = len(values)
+    if n < window or window < 2:
+        return out
+
+    finite = ~np.isnan(values)
+    if not finite.any():
+        return out
+    centered = np.where(finite, values - values[finite].mean(), 0.0)
+    sums = np.cumsum(centered)
+    squares = np.cumsum(centered * centered)
+    counts = np.cumsum(finite)
+
+    window_sums = np.empty(n - window + 1)
+    window_sums[0] = sums[window - 1]
+    np.subtract(sums[window:], sums[:-window], out=window_sums[1:])
+    window_squares = out[window - 1:]
+    window_squares[0] = squares[window - 1]
+    np.subtract(squares[window:], squares[:-window], out=window_squares[1:])
+
+    window_squares -= window_sums * window_sums / window
+    window_squares /= window - 1
+    np.maximum(window_squares, 0.0, out=window_squares)
+    np.sqrt(window_squares, out=window_squares)
+    window_counts = counts[window - 1:].copy()
+    window_counts[1:] -= counts[:-window]
+    window_squares[window_counts < window] = np.nan
+    return out
+
+
+def rolling_max(values, window, out):
+    """
+    Рассчитывает скользящий максимум без копирования окон.
+    """
+    out[:window - 1] = np.nan
+    if len(values) >= window:
+        np.max(sliding_window_view(values, window), axis=1, out=out[window - 1:])
+    else:
+        out[:] = np.nan
+    return out
+
+
+def rolling_min(values, window, out):
+    """
+    Рассчитывает скользящий минимум без копирования окон.
+    """
+    out[:window - 1] = np.nan
+    if len(values) >= window:
+        np.min(sliding_window_view(values, window), axis=1, out=out[window - 1:])
+    else:
+        out[:] = np.nan
+    return out
+
+
+def ewm_columns(values, spans, initial=None):
+    """
+    Рассчитывает экспоненциальные средние по столбцам, как ewm(span=span, adjust=False).mean() в pandas.
+
+    Каждый столбец сглаживается со своим периодом. Ряд обрабатывается блоками: внутри блока рекурсия
+    раскрывается в накопленную сумму со степенными весами, а между блоками переносится только последнее значение.
+
+    :param values: Двумерный массив (бары x столбцы).
+    :param spans: Периоды EMA для каждого столбца.
+    :param initial: Значения EMA перед первым баром для продолжения ряда по частям (опционально).
+    :return: Двумерный массив той же формы.
+    """
+    values = np.asarray(values, dtype=float)
+    spans = np.asarray(spans, dtype=float)
+    n, columns = values.shape
+    out = np.empty((n, columns))
+    if n == 0:
+        return out
+
+    # Продолжение ряда: предыдущее значение EMA подставляется перед первым баром
+    if initial is not None:
+        initial = np.asarray(initial, dtype=float)
+        if not np.isnan(initial).any():
+            return ewm_columns(np.vstack([initial, values]), spans)[1:]
+
+    alpha = 2.0 / (spans + 1.0)
+    beta = 1.0 - alpha
+
+    # Столбцы с пропусками и периодом не больше 1 считаются напрямую
+    direct = np.isnan(values).any(axis=0) | (beta <= 0.0)
+    for i in np.flatnonzero(direct):
+        if beta[i] <= 0.0:
+            out[:, i] = values[:, i]
+        else:
+            out[:, i] = pd.Series(values[:, i]).ewm(span=spans[i], adjust=False).mean().to_numpy()
+    blocked = np.flatnonzero(~direct)
+    if not len(blocked):
+        return out
+
+    values = values[:, blocked]
+    alpha = alpha[blocked]
+    beta = beta[blocked]
+
+    # Размер блока, при котором beta ** -block не превышает 1e12 ни для одного столбца
+    block = int(min(EWM_MAX_BLOCK, max(1, np.floor(np.log(1e12) / -np.log(beta.min())))))
+    blocks = -(-n // block)
+    padded = np.zeros((blocks * block, len(blocked)))
+    padded[:n] = values
+    padded = padded.reshape(blocks, block, len(blocked))
+
+    steps = np.arange(block)[:, None]
+    decay = beta ** (steps + 1)
+    partial = np.cumsum(padded * beta ** -steps, axis=1)
+    partial *= alpha * beta ** steps
+
+    # Перенос последнего значения EMA между блоками; перед первым блоком берется первое значение ряда
+    carry = np.empty((blocks, len(blocked)))
+    previous = values[0].copy()
+    last_decay = decay[-1]
+    last_partial = partial[:, -1]
+    for i in range(blocks):
+        carry[i] = previous
+        previous = last_decay * previous + last_partial[i]
+
+    partial += carry[:, None, :] * decay
+    out[:, blocked] = partial.reshape(blocks * block, len(blocked))[:n]
+    return out
+
+
+def ewm_mean(values, span, out, initial=None):
+    """
+    Рассчитывает экспоненциальное среднее одного ряда, как ewm(span=span, adjust=False).mean() в pandas.
+
+    :param values: Одномерный массив значений.
+    :param span: Период EMA.
+    :param out: Выходной массив той же длины.
+    :param initial: Значение EMA перед первым баром (опционально).
+    :return: Массив out.
+    """
+    initial = None if initial is None else [initial]
+    out[:] = ewm_columns(np.asarray(values, dtype=float)[:, None], [span], initial)[:, 0]
+    return out
+
+
+def cumsum_skipna(values, out):
+    """
+    Рассчитывает накопленную сумму, пропуская NaN, как cumsum() в pandas.
+    """
+    missing = np.isnan(values)
+    np.cumsum(np.where(missing, 0.0, values), out=out)
+    out[missing] = np.nan
+    return out
+
+
+def parabolic_sar(high, low, close, acceleration=0.02, max_acceleration=0.2, state=None):
+    """
+    Рассчитывает параболический SAR тем же алгоритмом, что и calculate_parabolic_sar, но на списках Python.
+
+    Если передан словарь state, расчет продолжается с сохраненного в нем состояния (SAR и экстремум
+    последнего бара, направление тренда, коэффициент ускорения), а по окончании состояние обновляется.
+    """
+    high = high.tolist()
+    low = low.tolist()
+    sar = close.tolist()
+    extreme_point = list(high)
+    uptrend = False
+    acceleration_factor = acceleration
+
+    continued = bool(state)
+    if continued:
+        high.insert(0, np.nan)
+        low.insert(0, np.nan)
+        sar.insert(0, state['sar'])
+        extreme_point.insert(0, state['extreme_point'])
+        uptrend = state['uptrend']
+        acceleration_factor = state['acceleration_factor']
+
+    for i in range(1, len(sar)):
+        value = sar[i - 1] + acceleration_factor * (extreme_point[i - 1] - sar[i - 1])
+        if not uptrend:  # Если тренд был нисходящим
+            if low[i] < value:
+                value = low[i]
+                uptrend = True
+                extreme_point[i] = high[i]
+                acceleration_factor = acceleration
+            elif high[i] > extreme_point[i - 1]:
+                extreme_point[i] = high[i]
+                acceleration_factor = min(acceleration_factor + acceleration, max_acceleration)
+            else:
+                extreme_point[i] = extreme_point[i - 1]
+        else:  # Если тренд был восходящим
+            if high[i] > value:
+                value = high[i]
+                uptrend = False
+                extreme_point[i] = low[i]
+                acceleration_factor = acceleration
+            elif low[i] < extreme_point[i - 1]:
+                extreme_point[i] = low[i]
+                acceleration_factor = min(acceleration_factor + acceleration, max_acceleration)
+            else:
+                extreme_point[i] = extreme_point[i - 1]
+        sar[i] = value
+
+    if state is not None and sar:
+        state.update(sar=sar[-1], extreme_point=extreme_point[-1], uptrend=uptrend,
+                     acceleration_factor=acceleration_factor)
+    return np.asarray(sar[1:] if continued else sar, dtype=float)
+
+
+def compute_indicators(high, low, close, volume, stateful=True):
+    """
+    Рассчитывает все индикаторы fetch_stock_data по массивам NumPy.
+
+    Результаты записываются в заранее выделенный блок, столбцы которого соответствуют INDICATOR_COLUMNS.
+    Промежуточные ряды (сдвинутое закрытие, типичная цена, скользящие среднее и отклонение за 20 баров)
+    рассчитываются один раз и используются несколькими индикаторами.
+
+    :param high: Массив максимальных цен.
+    :param low: Массив минимальных цен.
+    :param close: Массив цен закрытия.
+    :param volume: Массив объемов.
+    :param stateful: Рассчитывать ли индикаторы, зависящие от всей истории (MACD, VWAP, OBV, ADL, SAR);
+        при False их столбцы заполняются NaN (по умолчанию True).
+    :return: Двумерный массив (бары x индикаторы) в порядке столбцов Fortran.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    n = len(close)
+
+    block = np.empty((n, len(INDICATOR_COLUMNS)), order='F')
+    column = {name: block[:, i] for i, name in enumerate(INDICATOR_COLUMNS)}
+    scratch = np.empty(n)
+    if not stateful:
+        for name in STATEFUL_COLUMNS:
+            column[name][:] = np.nan
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Изменение цены закрытия относительно предыдущего бара
+        delta = np.empty(n)
+        if n:
+            delta[0] = np.nan
+            np.subtract(close[1:], close[:-1], out=delta[1:])
+        hlc_sum = high + low + close
+        typical_price = hlc_sum / 3
+
+        # Скользящее среднее
+        rolling_mean(close, 5, column['Moving_Average'])
+
+        # RSI
+        gain = rolling_mean(np.where(delta > 0, delta, 0.0), 14, np.empty(n))
+        loss = rolling_mean(np.where(delta < 0, -delta, 0.0), 14, scratch)
+        rsi = column['RSI']
+        np.divide(gain, loss, out=rsi)
+        rsi += 1
+        np.divide(100, rsi, out=rsi)
+        np.subtract(100, rsi, out=rsi)
+
+        # MACD
+        if stateful:
+            macd = column['MACD']
+            ewm_mean(close, 12, macd)
+            macd -= ewm_mean(close, 26, scratch)
+            ewm_mean(macd, 9, column['Signal'])
+
+        # Bollinger Bands и стандартное отклонение используют одно окно в 20 баров
+        middle = rolling_mean(close, 20, column['Bollinger_Middle'])
+        std_deviation = rolling_std(close, 20, column['Std_Deviation'])
+        np.multiply(std_deviation, 2, out=scratch)
+        np.add(middle, scratch, out=column['Bollinger_Upper'])
+        np.subtract(middle, scratch, out=column['Bollinger_Lower'])
+
+        # Stochastic Oscillator
+        low_min = rolling_min(low, 14, np.empty(n))
+        high_max = rolling_max(high, 14, scratch)
+        stochastic_k = column['Stochastic_K']
+        high_max -= low_min
+        np.subtract(close, low_min, out=stochastic_k)
+        stochastic_k /= high_max
+        stochastic_k *= 100
+        rolling_mean(stochastic_k, 3, column['Stochastic_D'])
+
+        # VWAP
+        if stateful:
+            vwap = column['VWAP']
+            np.multiply(volume, hlc_sum, out=vwap)
+            vwap /= 3
+            cumsum_skipna(vwap, vwap)
+            vwap /= cumsum_skipna(volume, scratch)
+
+        # ATR: истинный диапазон без объединения рядов в DataFrame
+        true_range = np.subtract(high, low)
+        if n:
+            previous_close = close[:-1]
+            np.fmax(true_range[1:], np.abs(high[1:] - previous_close), out=true_range[1:])
+            np.fmax(true_range[1:], np.abs(low[1:] - previous_close), out=true_range[1:])
+        rolling_mean(true_range, 14, column['ATR'])
+
+        # OBV
+        if stateful:
+            obv = column['OBV']
+            np.sign(delta, out=obv)
+            obv *= volume
+            cumsum_skipna(obv, obv)
+
+        # CCI: среднее абсолютное отклонение считается по окнам без копирования исходного ряда
+        cci = column['CCI']
+        rolling_mean(typical_price, 20, cci)
+        scratch[:] = np.nan
+        if n >= 20:
+            windows = sliding_window_view(typical_price, 20)
+            scratch[19:] = np.abs(windows - windows.mean(axis=1, keepdims=True)).mean(axis=1)
+        np.subtract(typical_price, cci, out=cci)
+        scratch *= 0.015
+        cci /= scratch
+
+        # MFI
+        money_flow = typical_price * volume
+        price_up = delta > 0
+        price_down = delta < 0
+        positive_flow = rolling_sum(np.where(price_up, money_flow, 0.0), 14, np.empty(n))
+        negative_flow = rolling_sum(np.where(price_down, money_flow, 0.0), 14, scratch)
+        # Как replace(0, np.nan) в pandas: отток равен нулю, если в окне нет баров снижения с ненулевым денежным
+        # потоком (например, при нулевом объеме); сравнение с числом баров, а не с суммой, не зависит от
+        # погрешности вычитания накопленных сумм
+        negative_count = rolling_sum((price_down & (money_flow != 0)).astype(float), 14, money_flow)
+        negative_flow[negative_count == 0] = np.nan
+        mfi = column['MFI']
+        np.divide(positive_flow, negative_flow, out=mfi)
+        mfi += 1
+        np.divide(100, mfi, out=mfi)
+        np.subtract(100, mfi, out=mfi)
+
+        # ADL и Parabolic SAR
+        if stateful:
+            adl = column['ADL']
+            np.subtract(close, low, out=adl)
+            adl -= high - close
+            adl /= high - low
+            adl *= volume
+            cumsum_skipna(adl, adl)
+
+            column['Parabolic_SAR'][:] = parabolic_sar(high, low, close)
+
+        # Ichimoku Cloud
+        conversion = column['Ichimoku_Conversion']
+        rolling_max(high, 9, conversion)
+        conversion += rolling_min(low, 9, scratch)
+        conversion /= 2
+        base = column['Ichimoku_Base']
+        rolling_max(high, 26, base)
+        base += rolling_min(low, 26, scratch)
+        base /= 2
+        np.add(conversion, base, out=column['Ichimoku_Leading_Span_A'])
+        column['Ichimoku_Leading_Span_A'] /= 2
+        leading_span_b = column['Ichimoku_Leading_Span_B']
+        rolling_max(high, 52, leading_span_b)
+        leading_span_b += rolling_min(low, 52, scratch)
+        leading_span_b /= 2
+        lagging_span = column['Ichimoku_Lagging_Span']
+        lagging_span[:] = np.nan
+        if n > 26:
+            lagging_span[:n - 26] = close[26:]
+
+        # Среднее, дисперсия и коэффициент вариации цены закрытия
+        summary = SummaryStatistics.from_values(close)
+        column['Mean_Closing_Price'][:] = summary.mean
+        column['Variance_Closing_Price'][:] = summary.variance
+        column['Coefficient_of_Variation'][:] = summary.coefficient_of_variation
+
+    return block
+
+
+@instrumented
+def add_indicators(data, cache=None):
+    """
+    Добавляет все индикаторы к данным о ценах акций, используя массивы NumPy.
+
+    Исходный DataFrame не изменяется: индикаторы собираются в один блок и присоединяются одной операцией.
+
+    :param data: DataFrame с данными о ценах акций (столбцы High, Low, Close, Volume).
+    :param cache: Дисковый кэш индикаторов IndicatorCache; блок версионируется исходным кодом модуля (опционально).
+    :return: Новый DataFrame с исходными столбцами и столбцами INDICATOR_COLUMNS.
+    """
+    required = ['High', 'Low', 'Close', 'Volume']
+    missing = [name for name in required if name not in data.columns]
+    if missing:
+        raise ValueError(f"Столбцы {missing} отсутствуют в данных.")
+
+    def compute():
+        return compute_indicators(data['High'].to_numpy(dtype=float), data['Low'].to_numpy(dtype=float),
+                                  data['Close'].to_numpy(dtype=float), data['Volume'].to_numpy(dtype=float))
+
+    if cache is not None:
+        block = cache.compute_block(data, 'compute_indicators', {}, sys.modules[__name__], compute)
+    else:
+        block = compute()
+    return join_indicators(data, block)
+
+
+def join_indicators(data, block):
+    """
+    Присоединяет блок индикаторов к данным, не копируя блок; имеющиеся в данных столбцы индикаторов заменяются.
+
+    :param data: DataFrame с исходными столбцами (не изменяется).
+    :param block: Массив (бары x INDICATOR_COLUMNS).
+    :return: Новый DataFrame с исходными столбцами и столбцами INDICATOR_COLUMNS.
+    """
+    indicators = pd.DataFrame(block, index=data.index, columns=INDICATOR_COLUMNS, copy=False)
+    return pd.concat([data.drop(columns=INDICATOR_COLUMNS, errors='ignore'), indicators], axis=1,
+                     **_CONCAT_WITHOUT_COPY)
@@ -0,0 +1,254 @@
+"""
+Конвейерная обработка списка тикеров: загрузка, расчет индикаторов, построение графиков и экспорт выполняются
+одновременно в отдельных пулах потоков, соединенных очередями ограниченного размера.
+
+Заполненная очередь останавливает предыдущий этап (обратное давление), поэтому в памяти одновременно находится
+не больше queue_size данных на каждую очередь плюс данные, обрабатываемые потоками.
+"""
+import os
+import queue
+import threading
+import time
+
+from instrumentation import stage
+
+# Признак окончания входных данных этапа
+_DONE = object()
+
+
+class StageStats:
+    """
+    Счетчики одного этапа конвейера.
+    """
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.idle_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def add(self, processed=0, failed=0, busy=0.0, idle=0.0, blocked=0.0):
+        with self._lock:
+            self.processed += processed
+            self.failed += failed
+            self.busy_seconds += busy
+            self.idle_seconds += idle
+            self.blocked_seconds += blocked
+
+    def to_dict(self):
+        """
+        Возвращает счетчики этапа.
+
+        throughput — обработано элементов в секунду за время работы этапа; blocked_seconds — суммарное время
+        ожидания места в следующей очереди (обратное давление); idle_seconds — время ожидания входных данных.
+        """
+        elapsed = (self.finished or time.perf_counter()) - self.started if self.started else 0.0
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'processed': self.processed,
+            'failed': self.failed,
+            'busy_seconds': self.busy_seconds,
+            'idle_seconds': self.idle_seconds,
+            'blocked_seconds': self.blocked_seconds,
+            'elapsed_seconds': elapsed,
+            'throughput': self.processed / elapsed if elapsed else 0.0,
+        }
+
+
+class Pipeline:
+    """
+    Конвейер из последовательных этапов, каждый со своим пулом потоков.
+
+    Этап — кортеж (имя, функция, количество потоков). Функция принимает результат предыдущего этапа и возвращает
+    значение для следующего; None исключает элемент из дальнейшей обработки. Исключение в функции записывается
+    в errors и тоже исключает только этот элемент.
+    """
+
+    def __init__(self, stages, queue_size=2):
+        """
+        :param stages: Список кортежей (имя, функция, количество потоков).
+        :param queue_size: Размер очереди между соседними этапами (по умолчанию 2).
+        """
+        if not stages:
+            raise ValueError("Конвейер должен содержать хотя бы один этап.")
+        if queue_size < 1:
+            raise ValueError("Размер очереди должен быть положительным.")
+        self.stages = [(name, function, max(1, workers)) for name, function, workers in stages]
+        self.queue_size = queue_size
+        self.stats = [StageStats(name, workers) for name, _, workers in self.stages]
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def run(self, items):
+        """
+        Обрабатывает элементы и возвращает результаты последнего этапа (в порядке завершения).
+
+        :param items: Итерируемый объект с входными элементами (например, тикерами).
+        :return: Список результатов.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        results = []
+        remaining = [workers for _, _, workers in self.stages]
+        threads = []
+
+        for index, (name, function, workers) in enumerate(self.stages):
+            for number in range(workers):
+                thread = threading.Thread(target=self._work, args=(index, function, queues, results, remaining),
+                                          name=f"{name}-{number}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        for item in items:
+            queues[0].put(item)
+        for _ in range(self.stages[0][2]):
+            queues[0].put(_DONE)
+
+        for thread in threads:
+            thread.join()
+        return results
+
+    def _work(self, index, function, queues, results, remaining):
+        """Цикл потока этапа index."""
+        stats = self.stats[index]
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(queues) else None
+        with self._lock:
+            if stats.started is None:
+                stats.started = time.perf_counter()
+
+        try:
+            while True:
+                start = time.perf_counter()
+                item = inbox.get()
+                stats.add(idle=time.perf_counter() - start)
+                if item is _DONE:
+                    break
+
+                start = time.perf_counter()
+                try:
+                    result = function(item)
+                except Exception as e:
+                    stats.add(failed=1, busy=time.perf_counter() - start)
+                    with self._lock:
+                        self.errors.append((stats.name, item, e))
+                    continue
+                stats.add(processed=1, busy=time.perf_counter() - start)
+
+                if result is None:
+                    continue
+                if outbox is None:
+                    with self._lock:
+                        results.append(result)
+                else:
+                    start = time.perf_counter()
+                    outbox.put(result)
+                    stats.add(blocked=time.perf_counter() - start)
+        finally:
+            # Последний завершившийся поток этапа передает признак окончания всем потокам следующего этапа; это
+            # выполняется и при завершении потока исключением, не унаследованным от Exception, иначе следующие этапы
+            # не получат признак окончания и run не завершится
+            with self._lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+                if last:
+                    stats.finished = time.perf_counter()
+            if last and outbox is not None:
+                for _ in range(self.stages[index + 1][2]):
+                    outbox.put(_DONE)
+
+    def report(self):
+        """Возвращает список счетчиков всех этапов."""
+        return [stats.to_dict() for stats in self.stats]
+
+
+def watchlist_stages(period='1mo', start_date=None, end_date=None, interval='1d', backend='numpy', timeframe=None,
+                     source=None, plot=True, workers=None, dataset=None, store=None, cache=None, update_chart=False):
+    """
+    Создает этапы конвейера для списка тикеров: download, compute, render, export.
+
+    Элементы между этапами — словари с ключами ticker, label и data.
+
+    Этапы не вызывают fetch_stock_data: она выполняет загрузку и расчет одним вызовом и заменяет ошибку пустыми
+    данными, а конвейеру нужны отдельные этапы и ошибки в Pipeline.errors. Поэтому загрузка так же измеряется
+    шагом 'download' и объединяет одновременные одинаковые запросы через fetch_flight, а расчет индикаторов
+    выполняется той же функцией add_indicators.
+
+    :param workers: Словарь {этап: количество потоков} (по умолчанию 4 для загрузки, по 2 для остальных).
+    :param dataset: Каталог набора данных Parquet, в который экспортируются данные вместо CSV (опционально).
+    :param store: Хранилище store.IndicatorStore, в которое дополнительно записываются данные (опционально).
+    :param cache: Дисковый кэш индикаторов IndicatorCache (опционально).
+    :param update_chart: Дополнять существующие файлы графиков только новыми барами (по умолчанию False).
+    :return: Список этапов для Pipeline.
+    """
+    import data_download as dd
+    import data_sources
+    import resampling
+
+    workers = {'download': 4, 'compute': 2, 'render': 2, 'export': 2, **(workers or {})}
+    label = period if interval == '1d' else f"{period}_{interval}"
+    if timeframe:
+        label = f"{label}_{timeframe}"
+
+    def download(ticker):
+        with stage('download') as download_stage:
+            key = ('download', ticker, period, start_date, end_date, interval, id(source))
+            data, _ = dd.fetch_flight.do(key, data_sources.download, source or data_sources.default_source, ticker,
+                                         period, start_date, end_date, interval)
+            download_stage.rows = len(data)
+        # Как в fetch_stock_data_shared, общий результат копируется каждым участником, включая загрузившего
+        data = data.copy()
+        if data.empty:
+            raise LookupError(f"Данные для тикера {ticker} не найдены.")
+        return {'ticker': ticker, 'label': label, 'data': data}
+
+    def compute(job):
+        data = job['data']
+        if timeframe is not None:
+            data = resampling.resample_ohlcv(data, timeframe)
+        job['data'] = dd.add_indicators(data, backend, cache)
+        return job
+
+    def render(job):
+        if plot:
+            import data_plotting as dplt
+
+            dplt.create_and_save_plot(job['data'], job['ticker'], job['label'], update=update_chart)
+        return job
+
+    def export(job):
+        if store is not None:
+            store.upsert(job['ticker'], job['data'])
+
+        if dataset is not None:
+            import dataset as parquet_dataset
+
+            parquet_dataset.write_frames({job['ticker']: job['data']}, dataset)
+            return {'ticker': job['ticker'], 'rows': len(job['data']), 'path': dataset}
+
+        os.makedirs('Data_CSV', exist_ok=True)
+        path = os.path.join('Data_CSV', f"{job['ticker']}_{job['label']}_stock_data.csv")
+        dd.export_data_to_csv(job['data'], path)
+        return {'ticker': job['ticker'], 'rows': len(job['data']), 'path': path}
+
+    return [('download', download, workers['download']), ('compute', compute, workers['compute']),
+            ('render', render, workers['render']), ('export', export, workers['export'])]
+
+
+def run_watchlist(tickers, queue_size=2, **options):
+    """
+    Обрабатывает список тикеров конвейером.
+
+    :param tickers: Список тикеров.
+    :param queue_size: Размер очередей между этапами (по умолчанию 2).
+    :param options: Параметры watchlist_stages.
+    :return: Кортеж (результаты экспорта, конвейер со счетчиками и ошибками).
+    """
+    pipeline = Pipeline(watchlist_stages(**options), queue_size)
+    return pipeline.run(tickers), pipeline
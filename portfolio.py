@@ -0,0 +1,201 @@
+"""
+Индикаторы корзины тикеров.
+
+Бары тикеров выравниваются по датам в таблицы (бары x тикеры), из них векторно строится OHLCV корзины
+с заданными весами и расписанием ребалансировки, после чего к корзине применяется обычный набор индикаторов
+(RSI, MACD, Bollinger, ATR, VWAP и остальные из numpy_backend). Циклов по тикерам нет: все операции выполняются
+над таблицами целиком, поэтому корзина из тысяч тикеров рассчитывается за доли секунды.
+
+Между ребалансировками корзина держит постоянное количество акций каждого тикера. На закрытии бара
+ребалансировки стоимость корзины перераспределяется по целевым весам среди тикеров, у которых есть цена.
+"""
+import numpy as np
+import pandas as pd
+
+import numpy_backend
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def align(frames, fields=FIELDS):
+    """
+    Выравнивает бары тикеров по объединению дат.
+
+    :param frames: Словарь {тикер: DataFrame с OHLCV}, например результаты fetch_stock_data.
+    :param fields: Собираемые столбцы (по умолчанию OHLCV).
+    :return: Словарь {столбец: DataFrame (даты x тикеры)}; отсутствующие бары — NaN.
+    """
+    if not frames:
+        raise ValueError("Корзина должна содержать хотя бы один тикер.")
+    panels = {}
+    for field in fields:
+        panel = pd.concat({ticker: frame[field] for ticker, frame in frames.items()}, axis=1)
+        panels[field] = panel.sort_index()
+    return panels
+
+
+def _forward_fill(values):
+    """Протягивает последнюю известную цену вперед по барам; NaN до первой цены сохраняются."""
+    rows = np.arange(len(values))[:, None]
+    last = np.where(np.isnan(values), -1, rows)
+    np.maximum.accumulate(last, axis=0, out=last)
+    filled = values[np.maximum(last, 0), np.arange(values.shape[1])[None, :]]
+    filled[last < 0] = np.nan
+    return filled
+
+
+def rebalance_rows(index, rebalance=None):
+    """
+    Определяет бары, на закрытии которых корзина ребалансируется.
+
+    :param index: Индекс дат баров.
+    :param rebalance: None — только формирование на первом баре; период pandas ('D', 'W', 'M', 'Q', 'Y') —
+        последний бар каждого периода; список дат — первый бар не раньше каждой даты.
+    :return: Отсортированный массив номеров баров, начинающийся с 0.
+    """
+    if not len(index):
+        raise ValueError("Нет баров для построения корзины.")
+    if rebalance is None:
+        rows = np.array([], dtype=int)
+    elif isinstance(rebalance, str):
+        dates = index.tz_localize(None) if index.tz is not None else index
+        periods = dates.to_period(rebalance).asi8
+        rows = np.flatnonzero(periods[1:] != periods[:-1])
+    else:
+        dates = pd.DatetimeIndex(rebalance)
+        if index.tz is not None and dates.tz is None:
+            dates = dates.tz_localize(index.tz)
+        rows = index.searchsorted(dates, side='left')
+        rows = rows[rows < len(index)]
+    return np.unique(np.concatenate([[0], rows])).astype(int)
+
+
+def target_weights(weights, tickers, dates):
+    """
+    Возвращает целевые веса тикеров на даты ребалансировок.
+
+    :param weights: None — равные веса; словарь или Series {тикер: вес}; DataFrame (даты x тикеры) с весами,
+        действующими с указанной даты.
+    :param tickers: Тикеры корзины (столбцы таблиц).
+    :param dates: Даты ребалансировок.
+    :return: Массив (ребалансировки x тикеры) ненормированных весов.
+    """
+    if weights is None:
+        return np.ones((len(dates), len(tickers)))
+
+    columns = weights.columns if isinstance(weights, pd.DataFrame) else pd.Index(pd.Series(weights).index)
+    unknown = columns.difference(tickers)
+    if len(unknown):
+        raise ValueError(f"Нет данных для тикеров {list(unknown)}.")
+
+    if not isinstance(weights, pd.DataFrame):
+        row = pd.Series(weights, dtype=float).reindex(tickers, fill_value=0.0).to_numpy()
+        return np.tile(row, (len(dates), 1))
+
+    table = weights.sort_index().reindex(columns=tickers, fill_value=0.0).fillna(0.0)
+    effective = table.index
+    if dates.tz is not None and effective.tz is None:
+        effective = effective.tz_localize(dates.tz)
+    positions = np.maximum(effective.searchsorted(dates, side='right') - 1, 0)
+    return table.to_numpy(dtype=float)[positions]
+
+
+def basket_ohlcv(panels, weights=None, rebalance=None, base=100.0):
+    """
+    Строит бары корзины из выровненных таблиц тикеров.
+
+    Цена корзины — стоимость портфеля, которая на первом баре равна base. Open, High и Low — стоимость
+    тех же акций по ценам открытия, максимумам и минимумам тикеров (High и Low корзины поэтому являются
+    границами: максимумы тикеров достигаются в разное время). Объем — оборот входящих в корзину тикеров,
+    выраженный в единицах корзины (оборот в деньгах / цену корзины), поэтому VWAP корзины взвешен по обороту.
+
+    Тикер без бара на дате считается неторгуемым: его цена протягивается с последнего бара, объем равен нулю.
+    Тикер без цены на дате ребалансировки (еще не торговался) получает нулевой вес, остальные веса
+    нормируются.
+
+    :param panels: Результат align.
+    :param weights: Целевые веса (см. target_weights; по умолчанию равные).
+    :param rebalance: Расписание ребалансировок (см. rebalance_rows). Если не задано и веса заданы
+        DataFrame, корзина ребалансируется на датах его строк.
+    :param base: Стоимость корзины на первом баре (по умолчанию 100).
+    :return: DataFrame с индексом дат и столбцами Open, High, Low, Close, Volume.
+    """
+    close_panel = panels['Close']
+    index, tickers = close_panel.index, close_panel.columns
+    if rebalance is None and isinstance(weights, pd.DataFrame):
+        rebalance = weights.index
+
+    close = close_panel.to_numpy(dtype=float)
+    missing = np.isnan(close)
+    gaps = missing.any()
+    if gaps:
+        close = _forward_fill(close)
+    rows = rebalance_rows(index, rebalance)
+
+    # Веса на каждой ребалансировке среди тикеров, у которых уже есть цена
+    start_close = close[rows]
+    available = ~np.isnan(start_close)
+    periods_weights = np.where(available, target_weights(weights, tickers, index[rows]), 0.0)
+    totals = periods_weights.sum(axis=1, keepdims=True)
+    if (totals == 0).any():
+        missing_dates = index[rows][totals[:, 0] == 0]
+        raise ValueError(f"На даты ребалансировки {list(missing_dates.astype(str))} нет тикеров с ненулевым весом.")
+    periods_weights /= totals
+
+    # Количество акций на единицу стоимости корзины в каждом периоде
+    np.copyto(start_close, 1.0, where=~available)
+    unit_shares = periods_weights / start_close
+    if gaps:
+        close = np.nan_to_num(close, nan=0.0)
+
+    # Стоимость корзины на каждой ребалансировке: произведение приростов предыдущих периодов
+    growth = np.einsum('ij,ij->i', unit_shares[:-1], close[rows[1:]])
+    levels = base * np.concatenate([[1.0], np.cumprod(growth)])
+    shares = unit_shares * levels[:, None]
+
+    # Период k действует с бара после k-й ребалансировки по бар следующей включительно: внутри бара
+    # ребалансировки еще держатся акции предыдущего периода
+    edges = np.concatenate([[0], rows[1:] + 1, [len(index)]])
+
+    def weighted(values, vectors):
+        """Сумма по тикерам values[t] * vectors[период t] для каждого бара (умножение блоков на вектор)."""
+        out = np.empty(len(values))
+        for k in range(len(vectors)):
+            np.dot(values[edges[k]:edges[k + 1]], vectors[k], out=out[edges[k]:edges[k + 1]])
+        return out
+
+    basket = {'Close': weighted(close, shares)}
+    for field in ('Open', 'High', 'Low'):
+        if field not in panels:
+            basket[field] = basket['Close'].copy()
+            continue
+        values = panels[field].to_numpy(dtype=float)
+        if gaps:
+            values = np.where(missing, close, values)
+        basket[field] = weighted(values, shares)
+
+    if 'Volume' in panels:
+        traded = panels['Volume'].to_numpy(dtype=float) * close
+        if gaps:
+            traded[missing] = 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            basket['Volume'] = weighted(traded, (shares != 0).astype(float)) / basket['Close']
+    else:
+        basket['Volume'] = np.zeros(len(index))
+
+    return pd.DataFrame(basket, index=index)[FIELDS]
+
+
+def basket_indicators(frames, weights=None, rebalance=None, base=100.0, cache=None):
+    """
+    Рассчитывает бары и все индикаторы корзины тикеров.
+
+    :param frames: Словарь {тикер: DataFrame с OHLCV}.
+    :param weights: Целевые веса (см. target_weights; по умолчанию равные).
+    :param rebalance: Расписание ребалансировок (см. rebalance_rows).
+    :param base: Стоимость корзины на первом баре (по умолчанию 100).
+    :param cache: Дисковый кэш индикаторов IndicatorCache (опционально).
+    :return: DataFrame с OHLCV корзины и столбцами numpy_backend.INDICATOR_COLUMNS.
+    """
+    basket = basket_ohlcv(align(frames), weights, rebalance, base)
+    return numpy_backend.add_indicators(basket, cache)
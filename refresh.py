@@ -0,0 +1,426 @@
+"""
+Фоновое обновление списка тикеров в течение торгового дня.
+
+Каждый тикер обновляется со своей периодичностью (cadence). Очередь — куча по времени следующего обновления;
+тикеры, которые пора обновить одновременно, обрабатываются в порядке приоритета. После ошибки тикер
+повторяется с экспоненциально растущей задержкой со случайным разбросом, чтобы повторы разных тикеров
+не совпадали.
+
+Из источника загружаются только бары начиная с последнего сохраненного (он перезагружается, так как
+внутридневной бар мог измениться). Индикаторы новых баров рассчитываются с перенесенным состоянием так же,
+как при расчете по частям (chunked.compute_block), без пересчета всей истории. Если среди новых баров есть
+сплит или дивиденд, история пересчитывается полностью (corporate_actions.adjust_history).
+
+Время берется из объекта clock с методами now() и sleep(seconds), поэтому планировщик можно проверять
+на имитированных часах (fixtures.SimulatedClock).
+"""
+import copy
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import corporate_actions
+import data_sources
+from chunked import HALO, CarriedState, compute_block
+from fetch_metrics import timed_history
+from numpy_backend import join_indicators
+from summary_statistics import SummaryStatistics
+
+# Сдвиг запаздывающей линии Ишимоку
+LAGGING_SHIFT = 26
+
+
+class SystemClock:
+    """
+    Часы реального времени; sleep прерывается методом wake.
+    """
+
+    def __init__(self):
+        self._wake = threading.Event()
+
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        self._wake.wait(seconds)
+
+    def wake(self):
+        self._wake.set()
+
+
+class IncrementalIndicators:
+    """
+    История баров тикера с индикаторами, которая дополняется новыми барами без пересчета всей истории.
+
+    Результат совпадает с numpy_backend.add_indicators для всей истории (с точностью до округления).
+    """
+
+    def __init__(self):
+        self.data = None
+        self.changed_from = None
+        self._reset()
+
+    def _reset(self):
+        self._state = CarriedState()
+        self._halo = None
+        self._summary = SummaryStatistics()
+        self._before_last = None
+
+    def _step(self, bars):
+        """Рассчитывает индикаторы баров и переносит состояние дальше."""
+        block = compute_block(self._halo, bars, None, self._state)
+        self._summary.update(bars['Close'])
+        self._halo = bars.iloc[-HALO:] if self._halo is None else pd.concat([self._halo, bars]).iloc[-HALO:]
+        return block
+
+    def _extend(self, bars):
+        """Рассчитывает индикаторы баров, следующих за сохраненными, и добавляет их к истории."""
+        blocks = [self._step(bars.iloc[:-1])] if len(bars) > 1 else []
+        # Состояние до последнего бара нужно, если этот бар потом изменится
+        self._before_last = copy.deepcopy((self._state, self._halo, self._summary))
+        blocks.append(self._step(bars.iloc[-1:]))
+
+        fresh = join_indicators(bars, np.vstack(blocks))
+        data = fresh if self.data is None or self.data.empty else pd.concat([self.data, fresh])
+
+        # Запаздывающая линия последних баров истории теперь известна по новым ценам закрытия
+        close = data['Close'].to_numpy(dtype=float)
+        start = max(0, len(data) - len(bars) - LAGGING_SHIFT)
+        lagging = np.full(len(data) - start, np.nan)
+        tail = close[start + LAGGING_SHIFT:]
+        lagging[:len(tail)] = tail
+        data.iloc[start:, data.columns.get_loc('Ichimoku_Lagging_Span')] = lagging
+
+        data['Mean_Closing_Price'] = self._summary.mean
+        data['Variance_Closing_Price'] = self._summary.variance
+        data['Coefficient_of_Variation'] = self._summary.coefficient_of_variation
+        self.data = data
+
+    def _rollback(self):
+        """Удаляет последний бар и возвращает состояние, предшествовавшее ему."""
+        self._state, self._halo, self._summary = self._before_last
+        self._before_last = None
+        self.data = self.data.iloc[:-1]
+
+    def rebuild(self, bars):
+        """
+        Рассчитывает индикаторы для всей истории заново.
+
+        :param bars: DataFrame с OHLCV.
+        :return: Количество баров.
+        """
+        self.data = None
+        self._reset()
+        if len(bars):
+            self._extend(bars)
+            self.changed_from = bars.index[0]
+        return len(bars)
+
+    def update(self, fresh):
+        """
+        Дополняет историю барами из источника.
+
+        Бары не позже последнего сохраненного, кроме него самого, игнорируются. Измененный последний бар
+        заменяется. После вызова changed_from — дата первого измененного бара.
+
+        :param fresh: Бары из источника начиная с последнего сохраненного.
+        :return: Количество добавленных или измененных баров.
+        """
+        if self.data is None or self.data.empty:
+            return self.rebuild(fresh)
+        if fresh.empty:
+            return 0
+
+        last = self.data.index[-1]
+        fresh = fresh[fresh.index >= last]
+        if fresh.empty:
+            return 0
+
+        if len(corporate_actions.new_actions(self.data, fresh)):
+            return self.rebuild(corporate_actions.adjust_history(self.data, fresh))
+
+        if fresh.index[0] == last:
+            columns = [column for column in fresh.columns if column in self.data.columns]
+            stored = self.data[columns].iloc[-1].to_numpy(dtype=float)
+            revised = fresh[columns].iloc[0].to_numpy(dtype=float)
+            if np.array_equal(stored, revised, equal_nan=True) or self._before_last is None:
+                fresh = fresh.iloc[1:]
+            else:
+                self._rollback()
+
+        if fresh.empty:
+            return 0
+        self._extend(fresh)
+        self.changed_from = fresh.index[0]
+        return len(fresh)
+
+
+class _Ticker:
+    """Состояние тикера в планировщике."""
+
+    def __init__(self, ticker, cadence, priority, added):
+        self.ticker = ticker
+        self.cadence = cadence
+        self.priority = priority
+        self.history = IncrementalIndicators()
+        self.added = added
+        self.due = added
+        self.sequence = None
+        self.failures = 0
+        self.last_success = None
+        self.last_error = None
+        self.unexported = None
+
+
+class RefreshDaemon:
+    """
+    Планировщик обновления тикеров.
+
+    Обновления выполняются последовательно в потоке, вызвавшем run; stop можно вызвать из другого потока.
+    """
+
+    def __init__(self, source=None, period='1mo', interval='1d', exports=(), clock=None, base_backoff=30.0,
+                 max_backoff=3600.0, jitter=0.2, seed=None):
+        """
+        :param source: Источник данных с методом history (по умолчанию yfinance).
+        :param period: Период первой загрузки истории (по умолчанию '1mo').
+        :param interval: Интервал баров (по умолчанию '1d').
+        :param exports: Функции export(ticker, data, changed_from), вызываемые после добавления баров.
+        :param clock: Часы с методами now() и sleep(seconds) (по умолчанию SystemClock).
+        :param base_backoff: Задержка повтора после первой ошибки в секундах (по умолчанию 30).
+        :param max_backoff: Наибольшая задержка повтора в секундах (по умолчанию 3600).
+        :param jitter: Относительный случайный разброс задержки повтора (по умолчанию 0.2, то есть ±20%).
+        :param seed: Начальное значение генератора случайного разброса (опционально).
+        """
+        self.source = source or data_sources.default_source
+        self.period = period
+        self.interval = interval
+        self.exports = list(exports)
+        self.clock = clock or SystemClock()
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.refreshes = 0
+        self.failures = 0
+        self.bars_added = 0
+        self.tickers = {}
+        self._queue = []
+        self._sequence = itertools.count()
+        self._random = random.Random(seed)
+        self._stopped = threading.Event()
+
+    def add(self, ticker, cadence, priority=0):
+        """
+        Добавляет тикер; первое обновление выполняется сразу.
+
+        :param ticker: Тикер.
+        :param cadence: Периодичность обновления в секундах.
+        :param priority: Приоритет среди тикеров, которые пора обновить одновременно (меньше — раньше).
+        """
+        if cadence <= 0:
+            raise ValueError("Периодичность обновления должна быть положительной.")
+        entry = _Ticker(ticker, cadence, priority, self.clock.now())
+        self.tickers[ticker] = entry
+        self._schedule(entry, entry.added)
+
+    def remove(self, ticker):
+        """Удаляет тикер из расписания."""
+        self.tickers.pop(ticker, None)
+
+    def _schedule(self, entry, due):
+        entry.due = due
+        entry.sequence = next(self._sequence)
+        heapq.heappush(self._queue, (due, entry.priority, entry.sequence, entry.ticker))
+
+    def _backoff(self, failures):
+        """Задержка повтора после failures ошибок подряд."""
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (failures - 1))
+        return delay * (1 + self.jitter * self._random.uniform(-1, 1))
+
+    def _fetch(self, entry):
+        """Загружает бары тикера начиная с последнего сохраненного (всю историю при первом обновлении)."""
+        data = entry.history.data
+        if data is None or data.empty:
+            return data_sources.download(self.source, entry.ticker, self.period, interval=self.interval)
+
+        start = data.index[-1]
+        end = pd.Timestamp.now(tz=start.tz) + pd.Timedelta(days=1)
+        if data_sources.is_intraday(self.interval):
+            return data_sources.fetch_range(self.source, entry.ticker, start, end, self.interval)
+        return timed_history(self.source, entry.ticker, self.interval, start=start, end=end)
+
+    def _refresh(self, entry):
+        """Обновляет тикер и планирует следующее обновление."""
+        try:
+            changed = entry.history.update(self._fetch(entry))
+            if changed:
+                changed_from = entry.history.changed_from
+                if entry.unexported is not None:
+                    changed_from = min(changed_from, entry.unexported)
+                entry.unexported = changed_from
+            if entry.unexported is not None:
+                for export in self.exports:
+                    export(entry.ticker, entry.history.data, entry.unexported)
+                entry.unexported = None
+        except Exception as e:
+            entry.failures += 1
+            entry.last_error = e
+            self.failures += 1
+            self._schedule(entry, self.clock.now() + self._backoff(entry.failures))
+            return
+
+        now = self.clock.now()
+        entry.failures = 0
+        entry.last_error = None
+        entry.last_success = now
+        self.refreshes += 1
+        self.bars_added += changed
+        # Следующее обновление отсчитывается от запланированного времени, чтобы расписание не сдвигалось
+        self._schedule(entry, max(entry.due + entry.cadence, now))
+
+    def queue_depth(self):
+        """Количество тикеров, которые уже пора обновить."""
+        now = self.clock.now()
+        return sum(1 for entry in self.tickers.values() if entry.due <= now)
+
+    def run_pending(self):
+        """
+        Обновляет все тикеры, которые пора обновить, в порядке приоритета.
+
+        :return: Количество обработанных тикеров.
+        """
+        now = self.clock.now()
+        due = []
+        while self._queue and self._queue[0][0] <= now:
+            _, _, sequence, ticker = heapq.heappop(self._queue)
+            entry = self.tickers.get(ticker)
+            if entry is not None and entry.sequence == sequence:
+                due.append(entry)
+
+        due.sort(key=lambda entry: (entry.priority, entry.due))
+        for entry in due:
+            if self._stopped.is_set():
+                self._schedule(entry, entry.due)
+                continue
+            self._refresh(entry)
+        return len(due)
+
+    def run(self, duration=None):
+        """
+        Обновляет тикеры по расписанию до вызова stop или истечения duration секунд.
+
+        :param duration: Длительность работы в секундах (по умолчанию без ограничения).
+        """
+        end = None if duration is None else self.clock.now() + duration
+        while not self._stopped.is_set() and self._queue:
+            now = self.clock.now()
+            due = self._queue[0][0]
+            if end is not None and due > end:
+                self.clock.sleep(max(0.0, end - now))
+                break
+            if due > now:
+                self.clock.sleep(due - now)
+                continue
+            self.run_pending()
+
+    def stop(self):
+        """Останавливает run после текущего обновления."""
+        self._stopped.set()
+        wake = getattr(self.clock, 'wake', None)
+        if wake is not None:
+            wake()
+
+    def metrics(self):
+        """
+        Возвращает показатели планировщика.
+
+        staleness_seconds — время с последнего успешного обновления тикера (или с добавления, если успешных
+        обновлений не было).
+        """
+        now = self.clock.now()
+        staleness = {ticker: now - (entry.last_success if entry.last_success is not None else entry.added)
+                     for ticker, entry in self.tickers.items()}
+        return {
+            'scheduled': len(self.tickers),
+            'queue_depth': self.queue_depth(),
+            'backing_off': sum(1 for entry in self.tickers.values() if entry.failures),
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'bars_added': self.bars_added,
+            'max_staleness_seconds': max(staleness.values(), default=0.0),
+            'staleness_seconds': staleness,
+        }
+
+    def to_prometheus(self, prefix='stock_refresh'):
+        """
+        Возвращает показатели в текстовом формате Prometheus.
+
+        :param prefix: Префикс имен метрик (по умолчанию 'stock_refresh').
+        """
+        metrics = self.metrics()
+        lines = []
+        for key, metric_type, description in [
+            ('scheduled', 'gauge', 'Количество тикеров в расписании'),
+            ('queue_depth', 'gauge', 'Количество тикеров, которые пора обновить'),
+            ('backing_off', 'gauge', 'Количество тикеров, ожидающих повтора после ошибки'),
+            ('refreshes', 'counter', 'Количество успешных обновлений'),
+            ('failures', 'counter', 'Количество ошибок обновления'),
+            ('bars_added', 'counter', 'Количество добавленных или измененных баров'),
+        ]:
+            name = f"{prefix}_{key}_total" if metric_type == 'counter' else f"{prefix}_{key}"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"{name} {metrics[key]}")
+
+        name = f"{prefix}_staleness_seconds"
+        lines.append(f"# HELP {name} Время с последнего успешного обновления тикера в секундах")
+        lines.append(f"# TYPE {name} gauge")
+        for ticker, seconds in sorted(metrics['staleness_seconds'].items()):
+            lines.append(f'{name}{{ticker="{ticker}"}} {seconds}')
+        return "\n".join(lines) + "\n"
+
+
+def csv_export(folder='Data_CSV', label='live'):
+    """
+    Создает экспорт, перезаписывающий CSV-файл тикера (столбцы статистик меняются во всех строках).
+
+    :param folder: Папка файлов (по умолчанию Data_CSV).
+    :param label: Часть имени файла после тикера (по умолчанию 'live').
+    """
+    def export(ticker, data, changed_from):
+        os.makedirs(folder, exist_ok=True)
+        data.to_csv(os.path.join(folder, f"{ticker}_{label}_stock_data.csv"))
+
+    return export
+
+
+def store_export(store):
+    """
+    Создает экспорт в хранилище SQLite; записываются только измененные бары.
+
+    :param store: Хранилище store.IndicatorStore.
+    """
+    def export(ticker, data, changed_from):
+        store.upsert(ticker, data[data.index >= changed_from])
+
+    return export
+
+
+def dataset_export(root='Dataset'):
+    """
+    Создает экспорт в набор данных Parquet (разделы тикера перезаписываются).
+
+    :param root: Каталог набора данных (по умолчанию Dataset).
+    """
+    def export(ticker, data, changed_from):
+        import dataset
+
+        dataset.write_frames({ticker: data}, root)
+
+    return export
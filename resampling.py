@@ -0,0 +1,140 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from constants import TIMEFRAMES
+
+# Правила агрегации столбцов при переходе на более крупный интервал
+OHLCV_AGGREGATION = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Volume': 'sum',
+    'Dividends': 'sum',
+    'Stock Splits': 'max',
+}
+
+
+def _aggregation_for(columns):
+    """Возвращает правила агрегации только для присутствующих столбцов."""
+    return {column: rule for column, rule in OHLCV_AGGREGATION.items() if column in columns}
+
+
+def resample_ohlcv(data, timeframe):
+    """
+    Агрегирует бары OHLCV в более крупный интервал (например, дневные бары в недельные).
+
+    Если в данных есть столбец 'Ticker', все тикеры агрегируются одной групповой операцией.
+    Интервалы без баров (выходные, праздники) в результат не попадают.
+
+    :param data: DataFrame с индексом дат и столбцами Open, High, Low, Close, Volume.
+    :param timeframe: Интервал yfinance ('1d', '1wk', '1mo') или частота pandas (например, '2W-FRI').
+    :return: DataFrame с агрегированными барами.
+    """
+    if 'Close' not in data.columns:
+        raise ValueError("Столбец 'Close' отсутствует в данных.")
+
+    if not isinstance(data.index, pd.DatetimeIndex):
+        raise ValueError("Индекс данных должен состоять из дат.")
+
+    rule = TIMEFRAMES.get(timeframe, timeframe)
+    aggregation = _aggregation_for(data.columns)
+
+    if 'Ticker' in data.columns:
+        grouped = data.groupby(['Ticker', pd.Grouper(freq=rule)], sort=True)
+        result = grouped.agg(aggregation).reset_index(level='Ticker')
+    else:
+        result = data.resample(rule).agg(aggregation)
+
+    return result[result['Close'].notna()]
+
+
+def resample_many(frames, timeframe):
+    """
+    Агрегирует данные нескольких тикеров за один проход.
+
+    :param frames: Словарь {тикер: DataFrame с OHLCV}.
+    :param timeframe: Интервал yfinance или частота pandas.
+    :return: Словарь {тикер: DataFrame с агрегированными барами}.
+    """
+    if not frames:
+        return {}
+
+    combined = pd.concat([frame.assign(Ticker=ticker) for ticker, frame in frames.items()])
+    resampled = resample_ohlcv(combined, timeframe)
+    return {ticker: group.drop(columns='Ticker') for ticker, group in resampled.groupby('Ticker', sort=False)}
+
+
+def _fingerprint(data):
+    """Возвращает дешевый отпечаток данных для проверки актуальности кэша."""
+    if data.empty:
+        return 0, None, None, 0.0, 0.0
+    volume = float(data['Volume'].sum()) if 'Volume' in data.columns else 0.0
+    return len(data), data.index[0], data.index[-1], float(data['Close'].sum()), volume
+
+
+class TimeframeCache:
+    """
+    Кэш агрегированных интервалов, рассчитанных из уже загруженных данных.
+
+    Запись считается актуальной, пока не изменились исходные данные (длина, границы и суммы Close и Volume).
+    """
+
+    def __init__(self, max_entries=256):
+        """
+        :param max_entries: Максимальное количество хранимых интервалов (по умолчанию 256).
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, data, timeframe):
+        """
+        Возвращает данные в интервале timeframe, рассчитывая их только при изменении исходных данных.
+
+        :param key: Ключ исходных данных (например, тикер).
+        :param data: Исходный DataFrame с OHLCV.
+        :param timeframe: Интервал yfinance или частота pandas.
+        :return: DataFrame с агрегированными барами.
+        """
+        cache_key = (key, timeframe)
+        fingerprint = _fingerprint(data)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        resampled = resample_ohlcv(data, timeframe)
+        with self._lock:
+            self._entries[cache_key] = (fingerprint, resampled)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return resampled
+
+    def derive(self, key, data, timeframes):
+        """
+        Возвращает несколько интервалов для одних исходных данных.
+
+        :param key: Ключ исходных данных (например, тикер).
+        :param data: Исходный DataFrame с OHLCV.
+        :param timeframes: Список интервалов (например, ['1wk', '1mo']).
+        :return: Словарь {интервал: DataFrame с агрегированными барами}.
+        """
+        return {timeframe: self.get(key, data, timeframe) for timeframe in timeframes}
+
+    def clear(self):
+        """Очищает кэш."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Общий кэш интервалов, которым пользуется fetch_stock_data
+timeframe_cache = TimeframeCache()
@@ -0,0 +1,352 @@
+"""
+Локальный HTTP-сервис для расчета индикаторов, построения графиков и экспорта CSV.
+
+Запуск: python3 service.py --port 8000
+
+Запросы:
+    GET /health
+    GET /indicators?ticker=AAPL&period=1mo&columns=Close,RSI,MACD
+    GET /chart?ticker=AAPL&period=1y
+    GET /csv?ticker=AAPL&period=1y
+    GET /metrics (показатели загрузки данных и кэшей в формате Prometheus)
+Дополнительные параметры запроса: start, end (для period=custom), interval, timeframe, backend.
+
+Коды ошибок: 400 — некорректные параметры, 404 — данных тикера нет, 503 — источник данных временно недоступен
+(сеть, тайм-аут, ограничение частоты запросов), 502 — иная ошибка источника.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+import data_download as dd
+import data_plotting as dplt
+from constants import BACKENDS, TIMEFRAMES, VALID_INTERVALS, VALID_PERIODS
+from fetch_metrics import categorize, fetch_metrics
+from singleflight import AsyncSingleFlight
+
+# Тексты статусов HTTP, которые возвращает сервис
+HTTP_STATUSES = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error',
+    502: 'Bad Gateway',
+    503: 'Service Unavailable',
+}
+
+# Категории ошибок источника (fetch_metrics.categorize), при которых источник временно недоступен
+UNAVAILABLE_CATEGORIES = ('rate_limit', 'timeout', 'connection')
+
+
+class TTLCache:
+    """
+    Потокобезопасный LRU-кэш с ограничением времени жизни записей.
+    """
+
+    def __init__(self, ttl=60.0, max_entries=256, clock=time.monotonic):
+        """
+        :param ttl: Время жизни записи в секундах (по умолчанию 60).
+        :param max_entries: Максимальное количество записей (по умолчанию 256).
+        :param clock: Функция текущего времени (для тестов).
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Возвращает значение по ключу или None, если записи нет или она устарела."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < self.clock():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """Сохраняет значение, вытесняя самые старые записи при переполнении."""
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _json_response(status, payload):
+    """Формирует ответ с телом в формате JSON."""
+    return status, 'application/json; charset=utf-8', json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+class IndicatorService:
+    """
+    Асинхронный HTTP-сервис над fetch_stock_data.
+
+    Сетевой ввод-вывод обрабатывается в цикле событий, загрузка данных, расчет индикаторов и построение графиков
+    выполняются в пуле потоков. Одновременные одинаковые запросы выполняют один общий расчет ответа
+    (AsyncSingleFlight), обогащенные данные и готовые ответы кэшируются на время cache_ttl.
+    """
+
+    def __init__(self, source=None, backend='numpy', cache_ttl=60.0, cache_size=256, max_workers=4):
+        """
+        :param source: Источник данных с методом history (по умолчанию yfinance).
+        :param backend: Способ расчета индикаторов по умолчанию (по умолчанию 'numpy').
+        :param cache_ttl: Время жизни кэшированных данных и ответов в секундах.
+        :param cache_size: Максимальное количество записей в каждом кэше.
+        :param max_workers: Количество потоков для загрузки и расчетов.
+        """
+        self.source = source
+        self.backend = backend
+        self.frames = TTLCache(cache_ttl, cache_size)
+        self.responses = TTLCache(cache_ttl, cache_size)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.requests_served = 0
+        self.flight = AsyncSingleFlight()
+        self.server = None
+        self.handlers = {
+            '/health': self.handle_health,
+            '/indicators': self.handle_indicators,
+            '/chart': self.handle_chart,
+            '/csv': self.handle_csv,
+            '/metrics': self.handle_metrics,
+        }
+        fetch_metrics.watch_cache('service_frames', self.frames)
+        fetch_metrics.watch_cache('service_responses', self.responses)
+
+    async def start(self, host='127.0.0.1', port=8000):
+        """
+        Запускает сервер.
+
+        :return: Кортеж (host, port), на котором принимаются соединения.
+        """
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        """Останавливает сервер и пул потоков."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False)
+
+    async def handle_connection(self, reader, writer):
+        """Обрабатывает запросы одного соединения с поддержкой keep-alive."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    status, content_type, body = _json_response(400, {'error': "Некорректная строка запроса."})
+                    keep_alive = False
+                else:
+                    method, target, version = parts
+                    status, content_type, body = await self.dispatch(method, target)
+                    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+                head = (f"HTTP/1.1 {status} {HTTP_STATUSES[status]}\r\n"
+                        f"Content-Type: {content_type}\r\n"
+                        f"Content-Length: {len(body)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+                writer.write(head.encode('latin-1') + body)
+                await writer.drain()
+                self.requests_served += 1
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target):
+        """
+        Выбирает обработчик по пути запроса и выполняет его в пуле потоков.
+
+        :return: Кортеж (статус, тип содержимого, тело ответа в байтах).
+        """
+        if method != 'GET':
+            return _json_response(405, {'error': "Поддерживаются только запросы GET."})
+
+        url = urlsplit(target)
+        handler = self.handlers.get(url.path)
+        if handler is None:
+            return _json_response(404, {'error': f"Путь {url.path} не найден."})
+
+        params = dict(parse_qsl(url.query))
+        if url.path == '/metrics':
+            return handler(params)
+
+        key = (url.path, tuple(sorted(params.items())))
+        cached = self.responses.get(key)
+        if cached is not None:
+            return cached
+
+        # Одинаковые одновременные запросы (в том числе построение графика) выполняются один раз; отключение
+        # клиента, начавшего расчет, не прерывает его для остальных
+        response, _ = await self.flight.do(key, self.respond, key, handler, params)
+        return response
+
+    async def respond(self, key, handler, params):
+        """
+        Выполняет обработчик в пуле потоков и кэширует успешный ответ.
+
+        :return: Кортеж (статус, тип содержимого, тело ответа в байтах).
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            response = await loop.run_in_executor(self.executor, handler, params)
+        except ValueError as ve:
+            return _json_response(400, {'error': str(ve)})
+        except dd.DataNotFoundError as nf:
+            return _json_response(404, {'error': str(nf)})
+        except ConnectionError as ce:
+            # Ошибка источника данных: временная недоступность — 503, иной сбой источника — 502
+            status = 503 if categorize(ce.__cause__ or ce) in UNAVAILABLE_CATEGORIES else 502
+            return _json_response(status, {'error': str(ce)})
+        except Exception as e:
+            return _json_response(500, {'error': str(e)})
+
+        self.responses.set(key, response)
+        return response
+
+    def fetch_arguments(self, params):
+        """
+        Проверяет параметры загрузки до обращения к источнику.
+
+        :param params: Словарь параметров запроса.
+        :return: Кортеж аргументов fetch_stock_data (ticker, period, start, end, backend, timeframe, interval).
+        """
+        ticker = params.get('ticker')
+        if not ticker:
+            raise ValueError("Параметр ticker обязателен.")
+        period = params.get('period', '1mo')
+        if period != 'custom' and period not in VALID_PERIODS:
+            raise ValueError(f"Период '{period}' невалиден, должен быть одним из {VALID_PERIODS} или 'custom'")
+        start, end = params.get('start'), params.get('end')
+        if period == 'custom':
+            if not start or not end:
+                raise ValueError("Для периода 'custom' нужно указать параметры start и end.")
+            for name, value in (('start', start), ('end', end)):
+                try:
+                    pd.Timestamp(value)
+                except ValueError:
+                    raise ValueError(f"Параметр {name} '{value}' не является датой.")
+        backend = params.get('backend', self.backend)
+        if backend not in BACKENDS:
+            raise ValueError(f"Способ расчета '{backend}' невалиден, должен быть одним из {BACKENDS}")
+        interval = params.get('interval', '1d')
+        if interval not in VALID_INTERVALS:
+            raise ValueError(f"Интервал '{interval}' невалиден, должен быть одним из {VALID_INTERVALS}")
+        timeframe = params.get('timeframe')
+        if timeframe is not None:
+            try:
+                to_offset(TIMEFRAMES.get(timeframe, timeframe))
+            except ValueError:
+                raise ValueError(f"Интервал агрегации '{timeframe}' невалиден.")
+        return ticker, period, start, end, backend, timeframe, interval
+
+    def load_data(self, params):
+        """
+        Загружает данные с индикаторами по параметрам запроса, используя кэш обогащенных данных.
+
+        Некорректные параметры вызывают ValueError до загрузки, отсутствие данных тикера — DataNotFoundError;
+        любая другая ошибка загрузки и расчета передается как ConnectionError с исходным исключением в __cause__.
+
+        :param params: Словарь параметров запроса.
+        :return: DataFrame с данными и индикаторами.
+        """
+        arguments = self.fetch_arguments(params)
+        data = self.frames.get(arguments)
+        if data is None:
+            try:
+                data = dd.fetch_stock_data_shared(*arguments, source=self.source, raise_errors=True)
+            except dd.DataNotFoundError:
+                raise
+            except Exception as e:
+                raise ConnectionError(f"Ошибка источника данных для тикера {arguments[0]}: {e}") from e
+            self.frames.set(arguments, data)
+        return data
+
+    def handle_health(self, params):
+        """Проверка работоспособности сервиса."""
+        return _json_response(200, {'status': 'ok', 'requests_served': self.requests_served})
+
+    def handle_metrics(self, params):
+        """Возвращает показатели загрузки данных и кэшей в текстовом формате Prometheus (без кэширования)."""
+        return 200, 'text/plain; version=0.0.4; charset=utf-8', fetch_metrics.to_prometheus().encode('utf-8')
+
+    def handle_indicators(self, params):
+        """Возвращает выбранные столбцы данных в формате JSON (orient='split')."""
+        data = self.load_data(params)
+        columns = [column for column in params.get('columns', '').split(',') if column]
+        if columns:
+            missing = [column for column in columns if column not in data.columns]
+            if missing:
+                raise ValueError(f"Столбцы {missing} отсутствуют в данных.")
+            data = data[columns]
+        body = data.to_json(orient='split', date_format='iso').encode('utf-8')
+        return 200, 'application/json; charset=utf-8', body
+
+    def handle_chart(self, params):
+        """Возвращает HTML-страницу с графиком всех индикаторов."""
+        data = self.load_data(params)
+        fig = dplt.build_figure(data, params['ticker'])
+        return 200, 'text/html; charset=utf-8', dplt.figure_html(fig, include_plotlyjs='cdn').encode('utf-8')
+
+    def handle_csv(self, params):
+        """Возвращает данные с индикаторами в формате CSV."""
+        data = self.load_data(params)
+        return 200, 'text/csv; charset=utf-8', data.to_csv().encode('utf-8')
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Локальный HTTP-сервис индикаторов и графиков.")
+    parser.add_argument('--host', default='127.0.0.1', help="Адрес для приема соединений (по умолчанию 127.0.0.1).")
+    parser.add_argument('--port', type=int, default=8000, help="Порт (по умолчанию 8000).")
+    parser.add_argument('--workers', type=int, default=4, help="Количество потоков для расчетов (по умолчанию 4).")
+    parser.add_argument('--cache-ttl', type=float, default=60.0,
+                        help="Время жизни кэша в секундах (по умолчанию 60).")
+    args = parser.parse_args()
+
+    async def serve():
+        service = IndicatorService(cache_ttl=args.cache_ttl, max_workers=args.workers)
+        host, port = await service.start(args.host, args.port)
+        print(f"Сервис запущен на http://{host}:{port}")
+        try:
+            await service.server.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("Сервис остановлен.")
+
+
+if __name__ == "__main__":
+    main()
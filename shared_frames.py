@@ -0,0 +1,198 @@
+"""
+Передача данных OHLCV и индикаторов рабочим процессам через общую память без сериализации.
+
+Родительский процесс копирует числовые столбцы DataFrame в один блок multiprocessing.shared_memory
+(индекс дат и столбцы float64, каждый столбец непрерывен) и передает процессам только небольшое описание блока.
+Рабочий процесс подключается к блоку и получает DataFrame только для чтения, столбцы которого ссылаются
+на общую память без копирования; функции calculate_* и построение графиков работают с ним как с обычным.
+
+Блок удаляет только владелец (SharedFrame.close, выход из with или сборка мусора). Аварийное завершение
+рабочего процесса блок не затрагивает: отображение памяти освобождается вместе с процессом. Если аварийно
+завершится сам владелец, блок удалит resource_tracker multiprocessing.
+"""
+import sys
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Блоки, подключенные в этом процессе: имя -> SharedMemory
+_attached = {}
+_attach_lock = threading.Lock()
+
+
+def _release(block):
+    """Закрывает и удаляет блок (вызывается владельцем один раз)."""
+    try:
+        block.close()
+    finally:
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedFrame:
+    """
+    Блок общей памяти с копией числовых столбцов DataFrame; владелец блока.
+    """
+
+    def __init__(self, data, columns=None):
+        """
+        :param data: DataFrame с индексом дат.
+        :param columns: Публикуемые столбцы (по умолчанию все числовые столбцы).
+        """
+        if not isinstance(data.index, pd.DatetimeIndex):
+            raise ValueError("Для публикации в общей памяти нужен DataFrame с индексом дат.")
+        if columns is None:
+            columns = [column for column in data.columns if pd.api.types.is_numeric_dtype(data[column])]
+        else:
+            missing = [column for column in columns if column not in data.columns]
+            if missing:
+                raise ValueError(f"Столбцы {missing} отсутствуют в данных.")
+        columns = list(columns)
+
+        rows = len(data)
+        size = 8 * rows * (len(columns) + 1)
+        self.block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self._finalizer = weakref.finalize(self, _release, self.block)
+
+        index, values = _views(self.block, rows, len(columns), writable=True)
+        index[:] = data.index.asi8
+        for i, column in enumerate(columns):
+            values[i] = data[column].to_numpy(dtype=float)
+
+        self.descriptor = {
+            'name': self.block.name,
+            'rows': rows,
+            'columns': columns,
+            'index_name': data.index.name,
+            'unit': data.index.unit,
+            'tz': str(data.index.tz) if data.index.tz is not None else None,
+        }
+
+    @property
+    def nbytes(self):
+        """Размер блока в байтах."""
+        return self.block.size
+
+    def close(self):
+        """Закрывает и удаляет блок; подключенные процессы сохраняют доступ до своего отключения."""
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def publish(data, columns=None):
+    """
+    Копирует числовые столбцы DataFrame в общую память.
+
+    :param data: DataFrame с индексом дат.
+    :param columns: Публикуемые столбцы (по умолчанию все числовые столбцы).
+    :return: SharedFrame; его descriptor передается рабочим процессам.
+    """
+    return SharedFrame(data, columns)
+
+
+def _views(block, rows, count, writable=False):
+    """Возвращает массивы индекса (int64) и столбцов (count x rows, float64) в блоке."""
+    index = np.ndarray((rows,), dtype=np.int64, buffer=block.buf)
+    values = np.ndarray((count, rows), dtype=np.float64, buffer=block.buf, offset=8 * rows)
+    if not writable:
+        index.flags.writeable = False
+        values.flags.writeable = False
+    return index, values
+
+
+def _skip_register(name, rtype):
+    pass
+
+
+def _attach_block(name):
+    """
+    Подключается к существующему блоку, не регистрируя его в resource_tracker.
+
+    До Python 3.13 SharedMemory регистрирует в resource_tracker и подключение, а не только создание блока.
+    Процесс с собственным трекером тогда удалил бы чужой блок при выходе. Отмена регистрации после
+    подключения тоже не подходит: дочерние процессы multiprocessing используют трекер родителя, и она
+    удалила бы регистрацию владельца. Поэтому на время подключения регистрация отключается, как track=False
+    в Python 3.13.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = _skip_register
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def attach(descriptor):
+    """
+    Возвращает DataFrame только для чтения, столбцы которого ссылаются на общую память.
+
+    Блок подключается один раз на процесс и остается подключенным до вызова detach, поэтому повторные
+    вызовы для того же описания ничего не копируют.
+
+    :param descriptor: SharedFrame.descriptor.
+    :return: DataFrame с индексом дат и опубликованными столбцами.
+    """
+    name = descriptor['name']
+    with _attach_lock:
+        block = _attached.get(name)
+        if block is None:
+            block = _attached[name] = _attach_block(name)
+
+    rows, columns = descriptor['rows'], descriptor['columns']
+    index_values, values = _views(block, rows, len(columns))
+    index = pd.DatetimeIndex(index_values.view(f"M8[{descriptor['unit']}]"), name=descriptor['index_name'])
+    if descriptor['tz'] is not None:
+        index = index.tz_localize('UTC').tz_convert(descriptor['tz'])
+    return pd.DataFrame(values.T, index=index, columns=columns, copy=False)
+
+
+def detach(descriptor):
+    """
+    Отключает процесс от блока. Все DataFrame, полученные из attach, должны быть уже удалены.
+
+    :param descriptor: SharedFrame.descriptor.
+    """
+    with _attach_lock:
+        block = _attached.pop(descriptor['name'], None)
+    if block is not None:
+        block.close()
+
+
+def _call(descriptor, function, kwargs):
+    """Выполняет function над данными из общей памяти в рабочем процессе."""
+    return function(attach(descriptor), **kwargs)
+
+
+def compute_in_workers(data, functions, max_workers=None, mp_context=None):
+    """
+    Выполняет функции над данными в пуле процессов, передавая данные через общую память.
+
+    Данные публикуются один раз; каждый рабочий процесс подключается к блоку один раз, сериализуются только
+    результаты. Блок удаляется и при аварийном завершении рабочего процесса (BrokenProcessPool).
+
+    :param data: DataFrame с индексом дат.
+    :param functions: Список функций function(data) или кортежей (функция, словарь параметров), например
+        calculate_rsi или (calculate_rsi, {'period': 7}). Данные передаются только для чтения; новые столбцы,
+        добавленные функцией, видны только в ее процессе.
+    :param max_workers: Количество процессов (по умолчанию количество процессоров).
+    :param mp_context: Контекст multiprocessing (по умолчанию контекст платформы).
+    :return: Список результатов в порядке functions.
+    """
+    calls = [task if isinstance(task, tuple) else (task, {}) for task in functions]
+    with publish(data) as shared:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+            futures = [executor.submit(_call, shared.descriptor, function, kwargs) for function, kwargs in calls]
+            return [future.result() for future in futures]
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+
+
+class _Call:
+    """Выполняющийся вызов, результат которого ожидают другие вызывающие."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.shared = 0
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные вызовы с одинаковым ключом в одно выполнение.
+
+    Первый вызывающий (лидер) выполняет функцию, остальные ждут и получают тот же результат или то же исключение.
+    После завершения ключ освобождается, и следующий вызов выполняется заново.
+    """
+
+    def __init__(self):
+        self.executions = 0
+        self.shared = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Выполняет func(*args, **kwargs) или присоединяется к уже выполняющемуся вызову с тем же ключом.
+
+        :param key: Хешируемый ключ вызова.
+        :param func: Функция для выполнения.
+        :return: Кортеж (результат, признак того, что результат получен от другого вызова).
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.shared += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, False
+
+    def in_flight(self):
+        """Возвращает количество выполняющихся вызовов."""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Вариант SingleFlight для задач asyncio одного цикла событий.
+
+    Корутина выполняется отдельной задачей, которую все вызывающие ожидают через asyncio.shield: отмена любого
+    вызывающего, в том числе первого, отменяет только его ожидание, а остальные получают результат.
+    """
+
+    def __init__(self):
+        self.executions = 0
+        self.shared = 0
+        self._tasks = {}
+
+    async def do(self, key, coroutine_function, *args, **kwargs):
+        """
+        Выполняет корутину или присоединяется к уже выполняющейся с тем же ключом.
+
+        :param key: Хешируемый ключ вызова.
+        :param coroutine_function: Асинхронная функция для выполнения.
+        :return: Кортеж (результат, признак того, что результат получен от другой задачи).
+        """
+        task = self._tasks.get(key)
+        shared = task is not None
+        if shared:
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(coroutine_function(*args, **kwargs))
+            self._tasks[key] = task
+            self.executions += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key, task):
+        """Освобождает ключ; исключение помечается полученным, даже если все ожидавшие были отменены."""
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self):
+        """Возвращает количество выполняющихся вызовов."""
+        return len(self._tasks)
@@ -0,0 +1,287 @@
+"""
+Локальное хранилище баров и индикаторов в SQLite для отбора тикеров без загрузки всех данных в pandas.
+
+Таблица bar хранит OHLCV и выбранные индикаторы; первичный ключ (ticker, date) служит индексом для выборок
+по тикеру, диапазону дат и последнему бару каждого тикера. Даты с часовым поясом хранятся в UTC без пояса:
+в местном времени бары часа перевода часов назад получили бы одинаковые даты и заменили бы друг друга.
+"""
+import operator
+import re
+
+import numpy as np
+import pandas as pd
+from peewee import CharField, CompositeKey, DateTimeField, FloatField, Model, SqliteDatabase, fn
+
+# Столбцы данных, которые сохраняются в хранилище
+STORE_COLUMNS = [
+    'Open', 'High', 'Low', 'Close', 'Volume', 'Moving_Average', 'RSI', 'MACD', 'Signal', 'Bollinger_Upper',
+    'Bollinger_Middle', 'Bollinger_Lower', 'Stochastic_K', 'Stochastic_D', 'VWAP', 'ATR', 'OBV', 'CCI', 'MFI', 'ADL',
+    'Parabolic_SAR',
+]
+
+# Операторы условий отбора
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+_CONDITION = re.compile(r'^\s*(\w+(?:\[-1\])?)\s*(<=|>=|==|!=|<|>)\s*(\S+)\s*$')
+
+# Суффикс столбца предыдущего бара тикера в условиях отбора: 'RSI[-1] < 30'
+PREVIOUS = '[-1]'
+
+
+def _field_name(column):
+    return column.lower()
+
+
+def _split_column(name):
+    """Возвращает кортеж (столбец хранилища, True для столбца предыдущего бара)."""
+    if name.endswith(PREVIOUS):
+        return name[:-len(PREVIOUS)], True
+    return name, False
+
+
+def _is_column(name):
+    return _split_column(name)[0] in STORE_COLUMNS
+
+
+def _bar_model(database):
+    """Создает модель таблицы bar, связанную с базой данных database."""
+    fields = {_field_name(column): FloatField(null=True, column_name=column) for column in STORE_COLUMNS}
+
+    class Meta:
+        primary_key = CompositeKey('ticker', 'date')
+        table_name = 'bar'
+
+    Meta.database = database
+    attributes = {'ticker': CharField(), 'date': DateTimeField(), 'Meta': Meta, **fields}
+    return type('Bar', (Model,), attributes)
+
+
+def parse_condition(condition):
+    """
+    Разбирает условие вида 'RSI < 30' или 'Close < Bollinger_Lower'.
+
+    Столбец с суффиксом [-1] ('RSI[-1] < 30') берется из предыдущего бара тикера, что позволяет отбирать
+    пересечения: ['RSI[-1] < 30', 'RSI >= 30'].
+
+    :return: Кортеж (столбец, оператор, число или столбец).
+    """
+    match = _CONDITION.match(condition)
+    if match is None:
+        raise ValueError(f"Условие '{condition}' должно иметь вид 'столбец оператор значение'.")
+    column, op, operand = match.groups()
+    if not _is_column(column):
+        raise ValueError(f"Столбец '{column}' отсутствует в хранилище.")
+    if not _is_column(operand):
+        try:
+            operand = float(operand)
+        except ValueError:
+            raise ValueError(f"Значение '{operand}' не является числом или столбцом хранилища.")
+    return column, op, operand
+
+
+def _utc_dates(index):
+    """Переводит даты с часовым поясом в UTC без пояса (SQLite хранит даты без пояса)."""
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index
+
+
+def _utc_timestamp(value):
+    value = pd.Timestamp(value)
+    if value.tzinfo is not None:
+        value = value.tz_convert('UTC').tz_localize(None)
+    return value
+
+
+def _date_value(value):
+    """Возвращает дату в текстовом виде, в котором она хранится в таблице."""
+    return str(_utc_timestamp(value).to_pydatetime())
+
+
+def _condition_columns(parsed):
+    """Столбцы, упомянутые в условиях, в порядке появления."""
+    columns = []
+    for column, _, operand in parsed:
+        for name in (column, operand):
+            if isinstance(name, str) and name not in columns:
+                columns.append(name)
+    return columns
+
+
+class IndicatorStore:
+    """
+    Хранилище баров и индикаторов многих тикеров в одном файле SQLite.
+    """
+
+    def __init__(self, path='stocks.db'):
+        """
+        :param path: Путь к файлу базы данных (':memory:' для базы в памяти).
+        """
+        self.database = SqliteDatabase(path, pragmas={'journal_mode': 'wal', 'synchronous': 'normal',
+                                                      'cache_size': -64 * 1024})
+        self.Bar = _bar_model(self.database)
+        self.database.connect(reuse_if_open=True)
+        self.database.create_tables([self.Bar])
+
+        columns = ', '.join(f'"{column}"' for column in ['ticker', 'date'] + STORE_COLUMNS)
+        placeholders = ', '.join('?' * (len(STORE_COLUMNS) + 2))
+        self._upsert_sql = f'INSERT OR REPLACE INTO "bar" ({columns}) VALUES ({placeholders})'
+
+    def close(self):
+        self.database.close()
+
+    def upsert(self, ticker, data):
+        """
+        Добавляет или заменяет бары тикера одной транзакцией.
+
+        Строки передаются в sqlite3 напрямую через executemany: преобразование каждого значения полями модели
+        peewee замедляет запись в десятки раз.
+
+        :param ticker: Тикер.
+        :param data: DataFrame из fetch_stock_data (отсутствующие столбцы сохраняются как NULL).
+        :return: Количество записанных баров.
+        """
+        if data.empty:
+            return 0
+
+        dates = map(str, _utc_dates(data.index).to_pydatetime())
+        values = data.reindex(columns=STORE_COLUMNS).to_numpy(dtype=float)
+        values = np.where(np.isnan(values), None, values).tolist()
+        rows = [(ticker, date, *row) for date, row in zip(dates, values)]
+
+        with self.database.atomic():
+            self.database.cursor().executemany(self._upsert_sql, rows)
+        return len(rows)
+
+    def upsert_many(self, frames):
+        """
+        Записывает данные нескольких тикеров.
+
+        :param frames: Словарь {тикер: DataFrame}.
+        :return: Количество записанных баров.
+        """
+        return sum(self.upsert(ticker, data) for ticker, data in frames.items())
+
+    def tickers(self):
+        """Возвращает список тикеров в хранилище."""
+        Bar = self.Bar
+        return [row.ticker for row in Bar.select(Bar.ticker).distinct().order_by(Bar.ticker)]
+
+    def _frame(self, query, columns):
+        """Преобразует результат запроса в DataFrame с индексом Date."""
+        rows = list(query.tuples())
+        data = pd.DataFrame(rows, columns=['Ticker', 'Date'] + columns)
+        data['Date'] = pd.to_datetime(data['Date'])
+        data[columns] = data[columns].astype(float)
+        return data.set_index('Date')
+
+    def history(self, ticker, columns=None, start=None, end=None):
+        """
+        Возвращает бары тикера за диапазон дат.
+
+        :param ticker: Тикер.
+        :param columns: Список столбцов (по умолчанию все столбцы хранилища).
+        :param start: Дата начала включительно (опционально).
+        :param end: Дата окончания не включительно (опционально).
+        :return: DataFrame с индексом Date (даты с часовым поясом возвращаются в UTC без пояса).
+        """
+        Bar = self.Bar
+        columns = list(columns or STORE_COLUMNS)
+        query = Bar.select(Bar.ticker, Bar.date, *(getattr(Bar, _field_name(column)) for column in columns))
+        query = query.where(Bar.ticker == ticker)
+        if start is not None:
+            query = query.where(Bar.date >= _date_value(start))
+        if end is not None:
+            query = query.where(Bar.date < _date_value(end))
+        return self._frame(query.order_by(Bar.date), columns).drop(columns='Ticker')
+
+    def screen(self, conditions, date='latest', columns=None):
+        """
+        Отбирает тикеры, бары которых удовлетворяют всем условиям.
+
+        Столбцы с суффиксом [-1] сравниваются по предыдущему бару того же тикера; тикеры без предыдущего бара
+        в такой отбор не попадают.
+
+        :param conditions: Список условий вида 'RSI < 30', 'Close < Bollinger_Lower' или 'RSI[-1] < 30'.
+        :param date: 'latest' — последний бар каждого тикера, или дата бара.
+        :param columns: Столбцы результата (по умолчанию столбцы из условий).
+        :return: DataFrame с индексом Date и столбцами Ticker и выбранными столбцами.
+        """
+        Bar = self.Bar
+        Previous = Bar.alias('previous')
+        parsed = [parse_condition(condition) for condition in conditions]
+        if columns is None:
+            columns = _condition_columns(parsed)
+
+        def field(name):
+            column, previous = _split_column(name)
+            return getattr(Previous if previous else Bar, _field_name(column))
+
+        query = Bar.select(Bar.ticker, Bar.date, *(field(column) for column in columns))
+        if date == 'latest':
+            latest = (Bar.select(Bar.ticker, fn.MAX(Bar.date).alias('last_date'))
+                      .group_by(Bar.ticker).alias('latest'))
+            query = query.join(latest, on=((Bar.ticker == latest.c.ticker) & (Bar.date == latest.c.last_date)))
+        else:
+            query = query.where(Bar.date == _date_value(date))
+
+        if any(_split_column(name)[1] for name in _condition_columns(parsed) + list(columns)):
+            # Предыдущий бар — бар того же тикера с наибольшей датой меньше даты отбираемого бара
+            Earlier = Bar.alias('earlier')
+            previous_date = (Earlier.select(fn.MAX(Earlier.date))
+                             .where((Earlier.ticker == Bar.ticker) & (Earlier.date < Bar.date)))
+            query = query.switch(Bar).join(Previous, on=((Previous.ticker == Bar.ticker)
+                                                         & (Previous.date == previous_date)))
+
+        for column, op, operand in parsed:
+            right = field(operand) if isinstance(operand, str) else operand
+            query = query.where(OPERATORS[op](field(column), right))
+        return self._frame(query.order_by(Bar.ticker), columns)
+
+
+def screen_frames(frames, conditions, date='latest', columns=None):
+    """
+    Выполняет тот же отбор, что и IndicatorStore.screen, по DataFrame в памяти (для сравнения).
+
+    :param frames: Словарь {тикер: DataFrame}.
+    """
+    parsed = [parse_condition(condition) for condition in conditions]
+    if columns is None:
+        columns = _condition_columns(parsed)
+
+    selected = []
+    for ticker in sorted(frames):
+        data = frames[ticker]
+        data = data.set_axis(_utc_dates(data.index))
+        if date == 'latest':
+            positions = np.array([len(data) - 1])
+        else:
+            positions = np.flatnonzero(data.index == _utc_timestamp(date))
+        rows = data.iloc[positions]
+        previous = data.shift(1).iloc[positions]
+
+        def values(name):
+            column, is_previous = _split_column(name)
+            return (previous if is_previous else rows)[column].to_numpy()
+
+        # Как в SQL-запросе, отбор по предыдущему бару исключает первый бар тикера
+        mask = np.ones(len(rows), dtype=bool)
+        if any(_split_column(name)[1] for name in _condition_columns(parsed) + list(columns)):
+            mask &= positions > 0
+        for column, op, operand in parsed:
+            right = values(operand) if isinstance(operand, str) else operand
+            mask &= OPERATORS[op](values(column), right)
+        if mask.any():
+            selected.append(pd.DataFrame({'Ticker': ticker, **{name: values(name)[mask] for name in columns}},
+                                         index=rows.index[mask]))
+
+    if not selected:
+        return pd.DataFrame(columns=['Ticker'] + columns, index=pd.DatetimeIndex([], name='Date'))
+    return pd.concat(selected).rename_axis('Date')
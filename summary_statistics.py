@@ -0,0 +1,147 @@
+"""
+Сводные статистики ряда (количество, среднее, дисперсия, стандартное отклонение, коэффициент вариации, минимум
+и максимум) за один проход.
+
+Статистики накапливаются по Уэлфорду: для каждого значения или блока значений хранятся количество, среднее и сумма
+квадратов отклонений от среднего (M2). Частичные статистики блоков или рабочих процессов объединяются формулой
+Чана, поэтому ряд можно обрабатывать по частям в любом порядке.
+"""
+import numpy as np
+
+
+class SummaryStatistics:
+    """
+    Накопитель сводных статистик. Пропуски (NaN) не учитываются, как в pandas.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean_value = 0.0
+        self.m2 = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        Создает накопитель и добавляет в него значения.
+
+        :param values: Массив, Series или список значений.
+        """
+        return cls().update(values)
+
+    @classmethod
+    def combine(cls, parts):
+        """
+        Объединяет накопители блоков в новый накопитель.
+
+        :param parts: Итерируемый объект с накопителями SummaryStatistics.
+        """
+        result = cls()
+        for part in parts:
+            result.merge(part)
+        return result
+
+    def add(self, value):
+        """
+        Добавляет одно значение (например, новый бар из потока).
+
+        :return: Этот же накопитель.
+        """
+        value = float(value)
+        if np.isnan(value):
+            return self
+        self.count += 1
+        delta = value - self.mean_value
+        self.mean_value += delta / self.count
+        self.m2 += delta * (value - self.mean_value)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        return self
+
+    def update(self, values):
+        """
+        Добавляет блок значений.
+
+        Статистики блока рассчитываются векторно и объединяются с накопленными; для первого блока результат
+        совпадает с mean и var(ddof=1) pandas.
+
+        :param values: Массив, Series или список значений.
+        :return: Этот же накопитель.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        missing = np.isnan(values)
+        count = len(values) - int(missing.sum())
+        if count == 0:
+            return self
+
+        # Пропуски заменяются нулями, а не удаляются: порядок суммирования тот же, что в pandas
+        if count < len(values):
+            values = np.where(missing, 0.0, values)
+        part = SummaryStatistics()
+        part.count = count
+        part.mean_value = values.sum() / count
+        deviations = values - part.mean_value
+        np.square(deviations, out=deviations)
+        if count < len(values):
+            deviations[missing] = 0.0
+        part.m2 = deviations.sum()
+        part.minimum = values[~missing].min() if count < len(values) else values.min()
+        part.maximum = values[~missing].max() if count < len(values) else values.max()
+        return self.merge(part)
+
+    def merge(self, other):
+        """
+        Добавляет статистики другого накопителя (формула Чана для среднего и M2).
+
+        :param other: Накопитель SummaryStatistics.
+        :return: Этот же накопитель.
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean_value, self.m2 = other.count, other.mean_value, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return self
+
+        total = self.count + other.count
+        shift = other.mean_value - self.mean_value
+        self.mean_value += shift * other.count / total
+        self.m2 += other.m2 + shift * shift * self.count * other.count / total
+        self.count = total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def mean(self):
+        """Среднее значение (NaN, если значений нет)."""
+        return float(self.mean_value) if self.count else np.nan
+
+    @property
+    def variance(self):
+        """Выборочная дисперсия, ddof=1 (NaN, если значений меньше двух)."""
+        return float(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        """Выборочное стандартное отклонение."""
+        return float(np.sqrt(self.variance))
+
+    @property
+    def coefficient_of_variation(self):
+        """Коэффициент вариации в процентах: std / mean * 100."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return float(np.float64(self.std) / self.mean * 100)
+
+    def to_dict(self):
+        """Возвращает все статистики словарем."""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'variance': self.variance,
+            'std': self.std,
+            'coefficient_of_variation': self.coefficient_of_variation,
+            'min': float(self.minimum) if self.count else np.nan,
+            'max': float(self.maximum) if self.count else np.nan,
+        }
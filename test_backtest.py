@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import backtest
+import data_download as dd
+from fixtures import make_ohlcv
+
+
+def loop_backtest(close, positions, cost):
+    """Эталонный расчет капитала и оборота циклом по барам."""
+    equity, held, turnover, curve = 1.0, 0.0, 0.0, []
+    for i in range(len(close)):
+        target = positions[i - 1] if i > 0 else 0.0
+        trade = abs(target - held)
+        held = target
+        asset_return = close[i] / close[i - 1] - 1 if i > 0 else 0.0
+        equity *= 1 + held * asset_return - cost * trade
+        turnover += trade
+        curve.append(equity)
+    return np.array(curve), turnover
+
+
+class TestBacktest(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = {ticker: dd.add_indicators(make_ohlcv(500, seed=seed), backend='numpy')
+                       for seed, ticker in enumerate(['AAPL', 'MSFT', 'GOOGL'])}
+
+    def test_hold_positions(self):
+        """Позиция удерживается от сигнала входа до сигнала выхода."""
+        entries = np.array([0, 1, 0, 0, 1, 0, 0], dtype=bool)
+        exits = np.array([1, 0, 0, 1, 0, 0, 1], dtype=bool)
+        np.testing.assert_array_equal(backtest.hold_positions(entries, exits), [0, 1, 1, 0, 1, 1, 0])
+
+    def test_rsi_rule_matches_loop(self):
+        """Векторное правило RSI совпадает с расчетом циклом."""
+        rsi = self.frames['AAPL']['RSI'].to_numpy()
+        expected, position = [], 0.0
+        for value in rsi:
+            if value < 30:
+                position = 1.0
+            elif value > 70:
+                position = 0.0
+            expected.append(position)
+        np.testing.assert_array_equal(backtest.rsi_rule(rsi), expected)
+
+    def test_backtest_matches_loop(self):
+        """Капитал и оборот по нескольким тикерам совпадают с расчетом циклом по каждому тикеру."""
+        close = backtest.stack_column(self.frames, 'Close')
+        positions = backtest.macd_rule(backtest.stack_column(self.frames, 'MACD'),
+                                       backtest.stack_column(self.frames, 'Signal'))
+        result = backtest.run_backtest(close, positions, cost=0.001)
+
+        self.assertEqual(list(result['summary'].index), ['AAPL', 'MSFT', 'GOOGL'])
+        for ticker in close.columns:
+            equity, turnover = loop_backtest(close[ticker].to_numpy(), positions[ticker].to_numpy(), 0.001)
+            np.testing.assert_allclose(result['equity'][ticker].to_numpy(), equity, rtol=1e-12)
+            self.assertAlmostEqual(result['summary'].loc[ticker, 'turnover'], turnover)
+            drawdown = result['drawdown'][ticker]
+            self.assertAlmostEqual(result['summary'].loc[ticker, 'max_drawdown'], drawdown.min())
+            self.assertTrue((drawdown <= 0).all())
+
+    def test_single_series(self):
+        """Одиночный тикер передается как Series и возвращается в той же форме."""
+        data = self.frames['MSFT']
+        positions = backtest.bollinger_rule(data['Close'], data['Bollinger_Lower'], data['Bollinger_Middle'])
+        result = backtest.run_backtest(data['Close'], positions)
+        self.assertIsInstance(result['equity'], pd.Series)
+        self.assertEqual(len(result['summary']), 1)
+
+    def test_shape_mismatch(self):
+        """Несовпадение форм цен и позиций вызывает ValueError."""
+        with self.assertRaises(ValueError):
+            backtest.run_backtest(np.ones(10), np.ones(9))
+
+
+if __name__ == "__main__":
+    unittest.main()
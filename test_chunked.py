@@ -0,0 +1,81 @@
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import chunked
+import numpy_backend
+from fixtures import make_ohlcv
+
+# Индикаторы с перенесенным состоянием и окнами без накопленных сумм совпадают побитово
+EXACT_COLUMNS = ['VWAP', 'OBV', 'ADL', 'Parabolic_SAR', 'Stochastic_K', 'Ichimoku_Conversion', 'Ichimoku_Base',
+                 'Ichimoku_Leading_Span_A', 'Ichimoku_Leading_Span_B', 'Ichimoku_Lagging_Span']
+
+
+def frame_chunks(data, size):
+    """Возвращает функцию, выдающую данные блоками заданного размера, как при чтении файла."""
+    return lambda: (data.iloc[start:start + size] for start in range(0, len(data), size))
+
+
+class TestChunked(unittest.TestCase):
+
+    def setUp(self):
+        self.data = make_ohlcv(1000)
+        self.expected = numpy_backend.add_indicators(self.data)
+
+    def assert_matches(self, result):
+        self.assertEqual(list(result.columns), list(self.expected.columns))
+        pd.testing.assert_index_equal(result.index, self.expected.index)
+        np.testing.assert_allclose(result.to_numpy(), self.expected.to_numpy(), rtol=1e-9, atol=1e-9)
+        for column in EXACT_COLUMNS:
+            np.testing.assert_array_equal(result[column].to_numpy(), self.expected[column].to_numpy(),
+                                          err_msg=column)
+
+    def test_matches_in_memory_for_any_chunk_size(self):
+        """Результат не зависит от размера блоков и совпадает с расчетом всего ряда."""
+        for chunk_size in (1, 25, 52, 97, 1000, 5000):
+            with self.subTest(chunk_size=chunk_size):
+                result = pd.concat(chunked.iter_indicator_chunks(frame_chunks(self.data, 33), chunk_size))
+                self.assert_matches(result)
+
+    def test_csv_round_trip(self):
+        """Файл результата совпадает с расчетом в памяти."""
+        with tempfile.TemporaryDirectory() as folder:
+            source = os.path.join(folder, 'source.csv')
+            target = os.path.join(folder, 'target.csv')
+            self.data.to_csv(source)
+            rows = chunked.add_indicators_chunked(source, target, chunk_size=128)
+            result = pd.read_csv(target, index_col=0, parse_dates=True, float_precision='round_trip')
+        self.assertEqual(rows, len(self.data))
+        result.index.freq = None
+        self.expected.index.freq = None
+        self.assert_matches(result)
+
+    def test_peak_memory_is_bounded_by_chunk(self):
+        """Пиковое потребление памяти определяется размером блока, а не длиной истории."""
+        data = make_ohlcv(40_000, freq='min')
+
+        tracemalloc.start()
+        numpy_backend.add_indicators(data)
+        in_memory_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        for _ in chunked.iter_indicator_chunks(frame_chunks(data, 1000), 2000):
+            pass
+        chunked_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertLess(chunked_peak, in_memory_peak / 4)
+
+    def test_invalid_chunk_size(self):
+        """Размер блока должен быть положительным."""
+        with self.assertRaises(ValueError):
+            list(chunked.iter_indicator_chunks(frame_chunks(self.data, 100), 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
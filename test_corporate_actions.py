@@ -0,0 +1,123 @@
+import unittest
+
+import numpy as np
+
+import corporate_actions
+import data_download as dd
+from fixtures import make_ohlcv
+
+
+def adjusted_view(raw, events, as_of):
+    """
+    Возвращает бары до даты as_of так, как их вернул бы yfinance в этот день.
+
+    :param raw: Нескорректированные бары OHLCV.
+    :param events: Словарь {дата: (дивиденд, коэффициент сплита)} в нескорректированных величинах.
+    :param as_of: Дата загрузки.
+    """
+    data = raw[raw.index <= as_of].copy()
+    n = len(data)
+    known = {date: event for date, event in events.items() if date <= as_of}
+
+    later_splits = np.ones(n)
+    for date, (_, split) in known.items():
+        if split:
+            later_splits[:data.index.get_loc(date)] *= split
+    split_close = data['Close'].to_numpy() / later_splits
+
+    multipliers = np.ones(n)
+    data['Dividends'] = 0.0
+    data['Stock Splits'] = 0.0
+    for date, (dividend, split) in known.items():
+        position = data.index.get_loc(date)
+        data.loc[date, 'Stock Splits'] = split
+        if dividend:
+            reported = dividend / later_splits[position]
+            data.loc[date, 'Dividends'] = reported
+            multipliers[:position] *= 1 - reported / split_close[position - 1]
+
+    for column in ['Open', 'High', 'Low', 'Close']:
+        data[column] = data[column].to_numpy() / later_splits * multipliers
+    data['Volume'] = data['Volume'].to_numpy() * later_splits
+    return data
+
+
+class TestCorporateActions(unittest.TestCase):
+
+    def setUp(self):
+        self.raw = make_ohlcv(300)
+        self.dates = self.raw.index
+        self.stored_until = self.dates[249]
+
+    def check_merge(self, events, overlap=0):
+        """Дополнение сохраненной истории совпадает с полной загрузкой в более поздний день."""
+        stored = dd.add_indicators(adjusted_view(self.raw, events, self.stored_until), 'numpy')
+        current = adjusted_view(self.raw, events, self.dates[-1])
+        fresh = current.iloc[250 - overlap:]
+
+        merged = corporate_actions.merge_history(stored, fresh)
+        expected = dd.add_indicators(current, 'numpy')
+        self.assertEqual(list(merged.columns), list(expected.columns))
+        np.testing.assert_allclose(merged.to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-9)
+
+    def test_append_without_actions(self):
+        """Без событий сохраненные бары не меняются."""
+        self.check_merge({}, overlap=3)
+
+    def test_split(self):
+        """Сплит 4:1 пересчитывает цены и объемы сохраненных баров."""
+        self.check_merge({self.dates[270]: (0.0, 4.0)})
+
+    def test_dividend_on_first_new_bar(self):
+        """Дивиденд на первом новом баре использует цену закрытия последнего сохраненного бара."""
+        self.check_merge({self.dates[250]: (1.5, 0.0)})
+
+    def test_several_actions(self):
+        """Несколько дивидендов и сплит в новых барах учитываются вместе."""
+        self.check_merge({self.dates[255]: (0.8, 0.0), self.dates[270]: (0.0, 2.0), self.dates[290]: (1.2, 0.0)},
+                         overlap=1)
+
+    def test_old_actions_are_not_applied_twice(self):
+        """События, уже учтенные в сохраненной истории, не применяются повторно."""
+        self.check_merge({self.dates[100]: (1.0, 0.0), self.dates[200]: (0.0, 3.0), self.dates[280]: (0.5, 0.0)},
+                         overlap=5)
+
+    def test_only_affected_tickers_are_refreshed(self):
+        """Истории тикеров без новых баров возвращаются без изменений."""
+        events = {self.dates[270]: (0.0, 2.0)}
+        stored = {ticker: dd.add_indicators(adjusted_view(self.raw, events, self.stored_until), 'numpy')
+                  for ticker in ('AAPL', 'MSFT')}
+        fresh = {'AAPL': adjusted_view(self.raw, events, self.dates[-1]).iloc[250:]}
+
+        merged, adjusted = corporate_actions.merge_histories(stored, fresh)
+        self.assertEqual(adjusted, ['AAPL'])
+        self.assertIs(merged['MSFT'], stored['MSFT'])
+        self.assertEqual(len(merged['AAPL']), len(self.raw))
+
+    def test_overlap_action_without_action_columns(self):
+        """Событие на повторно загруженном баре не применяется повторно, если в истории нет столбцов событий."""
+        raw = make_ohlcv(60)
+        events = {raw.index[-3]: (1.0, 0.0)}
+        stored = adjusted_view(raw, events, raw.index[-1]).drop(columns=['Dividends', 'Stock Splits'])
+        fresh = adjusted_view(raw, events, raw.index[-1]).iloc[-5:]
+
+        self.assertTrue(corporate_actions.new_actions(stored, fresh).empty)
+        merged = corporate_actions.merge_history(stored, fresh)
+        np.testing.assert_allclose(merged['Close'].to_numpy(), fresh['Close'].reindex(merged.index)
+                                   .fillna(stored['Close']).to_numpy(), rtol=1e-12)
+
+    def test_unchanged_bars_keep_history(self):
+        """Повторно загруженные бары без изменений не вызывают пересчет индикаторов."""
+        data = adjusted_view(self.raw, {self.dates[100]: (1.0, 0.0)}, self.stored_until)
+        stored = dd.add_indicators(data, 'numpy')
+        self.assertIs(corporate_actions.merge_history(stored, data.iloc[-3:]), stored)
+
+        changed = data.iloc[-3:].copy()
+        changed.loc[changed.index[-1], 'Close'] += 1.0
+        merged = corporate_actions.merge_history(stored, changed)
+        self.assertIsNot(merged, stored)
+        self.assertEqual(merged['Close'].iloc[-1], changed['Close'].iloc[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import data_plotting as dplt
+import numpy_backend
+from fixtures import make_ohlcv
+
+
+class TestChartEncoding(unittest.TestCase):
+
+    def setUp(self):
+        self.data = numpy_backend.add_indicators(make_ohlcv(300))
+        self.folder = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.folder.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.folder.cleanup()
+
+    def read_state(self, path):
+        with open(path, encoding='utf-8') as file:
+            text = file.read()
+        start = text.rindex(dplt.STATE_MARKER) + len(dplt.STATE_MARKER)
+        return text, json.loads(text[start:text.index(' -->', start)])
+
+    def test_traces_are_typed_arrays(self):
+        """Трассы сохраняются типизированными массивами base64, цены — во float32."""
+        fig = dplt.build_figure(self.data, 'AAPL')
+        self.assertEqual(len(fig.data), len(dplt.TRACE_COLUMNS))
+        self.assertEqual(fig.data[0].y.dtype, np.float32)
+
+        html = dplt.figure_html(fig, include_plotlyjs=False)
+        self.assertIn('"dtype":"f4"', html.replace(' ', ''))
+        self.assertIn('"dtype":"f8"', html.replace(' ', ''))
+        self.assertNotIn(str(self.data['Close'].iloc[0]), html)
+
+    def test_float32_only_when_precise(self):
+        """Ряд с малым размахом при большом уровне остается во float64."""
+        self.assertEqual(dplt.compact_values(np.linspace(100.0, 110.0, 50)).dtype, np.float32)
+        self.assertEqual(dplt.compact_values(1e9 + np.linspace(0.0, 1.0, 50)).dtype, np.float64)
+
+    def test_trailing_gaps_are_trimmed(self):
+        """Запаздывающая линия Ишимоку хранится только до последнего известного значения."""
+        fig = dplt.build_figure(self.data, 'AAPL')
+        lagging = fig.data[dplt.TRACE_COLUMNS.index('Ichimoku_Lagging_Span')]
+        self.assertEqual(len(lagging.x), len(self.data) - 26)
+
+    def test_update_appends_only_new_bars(self):
+        """Дополнение графика добавляет новые бары, не перестраивая файл."""
+        dplt.create_and_save_plot(self.data.iloc[:280], 'AAPL', '1y')
+        path = os.path.join('Chart', 'AAPL_1y_stock_price_chart.html')
+        original, _ = self.read_state(path)
+
+        added = dplt.update_chart_file(path, self.data)
+        self.assertEqual(added, 20)
+        text, state = self.read_state(path)
+        self.assertTrue(text.startswith(original[:original.rindex(dplt.STATE_MARKER)]))
+        self.assertIn('Plotly.extendTraces', text)
+        self.assertEqual(state['last'][0], int(dplt.date_values(self.data.index)[-1]))
+
+        # Повторное дополнение теми же данными ничего не меняет
+        self.assertEqual(dplt.update_chart_file(path, self.data), 0)
+        self.assertEqual(self.read_state(path)[0], text)
+
+    def test_update_requires_saved_bar(self):
+        """Если сохраненного бара нет в данных, график нужно построить заново."""
+        dplt.create_and_save_plot(self.data.iloc[:280], 'AAPL', '1y')
+        path = os.path.join('Chart', 'AAPL_1y_stock_price_chart.html')
+        with self.assertRaises(ValueError):
+            dplt.update_chart_file(path, self.data.iloc[:100])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+import pandas as pd
+
+import data_download as dd
+import data_sources
+from constants import INTRADAY_LIMITS
+from fixtures import FakeSource
+
+
+def intraday_source(start='2024-03-01'):
+    """Источник пятиминутных баров за 20 дней с ограничениями окон yfinance."""
+    limits = {interval: limit[0] for interval, limit in INTRADAY_LIMITS.items()}
+    return FakeSource(rows=20 * 24 * 12, start=start, freq='5min', window_limits=limits)
+
+
+class TestDataSources(unittest.TestCase):
+
+    def test_split_range(self):
+        """Диапазон делится на окна, не превышающие допустимую длину."""
+        windows = data_sources.split_range('2024-03-01', '2024-03-20', 7)
+        self.assertEqual(len(windows), 3)
+        self.assertEqual(windows[0], (pd.Timestamp('2024-03-01'), pd.Timestamp('2024-03-08')))
+        self.assertEqual(windows[-1][1], pd.Timestamp('2024-03-20'))
+
+    def test_fetch_range_stitches_windows(self):
+        """Окна загружаются по отдельности и склеиваются без повторов."""
+        source = intraday_source()
+        data = data_sources.fetch_range(source, 'AAPL', '2024-03-01', '2024-03-19', '1m')
+        self.assertEqual(len(source.calls), 3)
+        expected = source.frame('AAPL')
+        expected = expected[expected.index < pd.Timestamp('2024-03-19')]
+        pd.testing.assert_frame_equal(data, expected, check_freq=False)
+
+    def test_fetch_range_drops_duplicates(self):
+        """Бары, пришедшие в двух окнах, остаются в одном экземпляре."""
+        source = intraday_source()
+        source.window_limits['1m'] = 8
+        original_history = source.history
+
+        def overlapping_history(ticker, start=None, end=None, **kwargs):
+            return original_history(ticker, start=pd.Timestamp(start) - pd.Timedelta(hours=1), end=end, **kwargs)
+
+        source.history = overlapping_history
+        data = data_sources.fetch_range(source, 'AAPL', '2024-03-02', '2024-03-16', '1m')
+        self.assertTrue(data.index.is_unique)
+        self.assertTrue(data.index.is_monotonic_increasing)
+
+    def test_single_request_exceeding_limit_fails(self):
+        """Поддельный источник отклоняет окна длиннее допустимых, как yfinance."""
+        with self.assertRaises(ValueError):
+            intraday_source().history('AAPL', start='2024-03-01', end='2024-03-19', interval='1m')
+
+    def test_resolve_range_clamps_lookback(self):
+        """Начало диапазона ограничивается глубиной истории интервала."""
+        start, end = data_sources.resolve_range('1y', interval='1m', now='2024-06-30')
+        self.assertEqual(start, pd.Timestamp('2024-05-31'))
+        self.assertEqual(end, pd.Timestamp('2024-06-30'))
+
+    def test_fetch_stock_data_intraday(self):
+        """Индикаторы рассчитываются по склеенным внутридневным данным."""
+        source = intraday_source(start=(pd.Timestamp.now() - pd.Timedelta(days=20)).normalize())
+        data = dd.fetch_stock_data('AAPL', '1mo', backend='numpy', interval='1m', source=source)
+        self.assertEqual(len(source.calls), 5)
+        self.assertEqual(data.index[0], source.frame('AAPL').index[0])
+        self.assertIn('RSI', data.columns)
+        self.assertTrue(data.index.is_unique)
+
+    def test_invalid_interval(self):
+        """Невалидный интервал отклоняется до загрузки данных."""
+        with self.assertRaises(ValueError):
+            dd.fetch_stock_data('AAPL', '1mo', interval='7m', source=FakeSource())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import numpy_backend
+from fixtures import make_ohlcv
+
+try:
+    import pyarrow  # noqa: F401
+    import dataset
+except ImportError:
+    dataset = None
+
+
+@unittest.skipIf(dataset is None, "pyarrow не установлен")
+class TestDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.folder.name, 'Dataset')
+        self.frames = {ticker: numpy_backend.add_indicators(make_ohlcv(400, start='2022-06-01', seed=seed))
+                       for seed, ticker in enumerate(['AAPL', 'MSFT', 'GOOGL'])}
+        dataset.write_frames(self.frames, self.root)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_partitions_by_ticker_and_year(self):
+        """Каждому тикеру и году соответствует отдельный каталог."""
+        self.assertEqual(sorted(os.listdir(self.root)), ['ticker=AAPL', 'ticker=GOOGL', 'ticker=MSFT'])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.root, 'ticker=AAPL'))),
+                         ['year=2022', 'year=2023'])
+
+    def test_read_with_pushdown(self):
+        """Чтение возвращает только выбранные столбцы, тикеры и даты."""
+        data = dataset.read_dataset(self.root, columns=['Close', 'RSI'], tickers=['MSFT'],
+                                    start='2023-01-01', end='2023-07-01')
+        expected = self.frames['MSFT'].loc['2023-01-01':'2023-06-30', ['Close', 'RSI']]
+
+        self.assertEqual(list(data.columns), ['Ticker', 'Close', 'RSI'])
+        self.assertEqual(set(data['Ticker']), {'MSFT'})
+        np.testing.assert_array_equal(data.index.to_numpy(), expected.index.to_numpy())
+        np.testing.assert_allclose(data[['Close', 'RSI']].to_numpy(), expected.to_numpy(), equal_nan=True)
+
+    def test_unselected_partitions_are_not_read(self):
+        """Файлы разделов, не подходящих под условие, не открываются."""
+        with open(os.path.join(self.root, 'ticker=GOOGL', 'year=2023', 'part-0.parquet'), 'wb') as file:
+            file.write(b'not parquet')
+        data = dataset.read_dataset(self.root, columns=['Close'], tickers=['AAPL'], start='2023-03-01')
+        self.assertEqual(len(data), len(self.frames['AAPL'].loc['2023-03-01':]))
+
+    def test_rewrite_replaces_partitions(self):
+        """Повторный экспорт тикера заменяет его разделы, а не дублирует строки."""
+        dataset.write_frames({'AAPL': self.frames['AAPL']}, self.root)
+        data = dataset.read_dataset(self.root, tickers=['AAPL'])
+        self.assertEqual(len(data), len(self.frames['AAPL']))
+        pd.testing.assert_frame_equal(data.drop(columns='Ticker'), self.frames['AAPL'].rename_axis('Date'),
+                                      check_freq=False, check_index_type=False)
+
+    def test_shorter_period_keeps_earlier_bars(self):
+        """Экспорт короткого периода не удаляет более ранние бары того же года; новые значения заменяют старые."""
+        recent = self.frames['AAPL'].loc['2023-06-01':].copy()
+        recent['Close'] += 1.0
+        dataset.write_frames({'AAPL': recent}, self.root)
+        data = dataset.read_dataset(self.root, tickers=['AAPL'])
+        self.assertEqual(len(data), len(self.frames['AAPL']))
+        np.testing.assert_allclose(data.loc[:'2023-05-31', 'Close'], self.frames['AAPL'].loc[:'2023-05-31', 'Close'])
+        np.testing.assert_allclose(data.loc['2023-06-01':, 'Close'], recent['Close'])
+
+
+if __name__ == '__main__':
+    unittest.main()
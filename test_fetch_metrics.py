@@ -0,0 +1,94 @@
+import socket
+import unittest
+
+import data_download as dd
+import data_sources
+from fetch_metrics import FetchMetrics, categorize, fetch_metrics, timed_history
+from fixtures import FakeSource
+
+
+class HTTPError(Exception):
+    """Исключение с ответом сервера, как requests.HTTPError."""
+
+    def __init__(self, status_code):
+        super().__init__(status_code)
+        self.response = type('Response', (), {'status_code': status_code})()
+
+
+class ReadTimeout(ConnectionError):
+    """Имитация requests.ReadTimeout (подкласс ConnectionError)."""
+
+
+class TestFetchMetrics(unittest.TestCase):
+
+    def setUp(self):
+        fetch_metrics.reset()
+
+    def test_histogram_and_counters(self):
+        """Задержки попадают в корзины гистограммы, строки и байты суммируются."""
+        metrics = FetchMetrics(buckets=(0.1, 1.0))
+        metrics.observe('AAPL', '1d', 0.05, rows=10, nbytes=800)
+        metrics.observe('AAPL', '1d', 0.5, rows=5, nbytes=400)
+        metrics.observe('AAPL', '1d', 3.0, error='timeout')
+        metrics.observe('MSFT', '1h', 0.1, error='empty')
+
+        snapshot = metrics.snapshot()
+        aapl, msft = snapshot['requests']
+        self.assertEqual((aapl['ticker'], aapl['interval'], msft['ticker']), ('AAPL', '1d', 'MSFT'))
+        self.assertEqual(aapl['latency_buckets'], [(0.1, 1), (1.0, 2), (float('inf'), 3)])
+        self.assertEqual(msft['latency_buckets'][0], (0.1, 1))
+        self.assertEqual((aapl['requests'], aapl['rows'], aapl['bytes']), (3, 15, 1200))
+        self.assertAlmostEqual(aapl['mean_seconds'], 3.55 / 3)
+        self.assertEqual(aapl['max_seconds'], 3.0)
+        self.assertEqual(snapshot['errors']['timeout'], 1)
+        self.assertEqual(snapshot['errors']['empty'], 1)
+
+        text = metrics.to_prometheus()
+        self.assertIn('# TYPE stock_fetch_request_seconds histogram', text)
+        self.assertIn('stock_fetch_request_seconds_bucket{ticker="AAPL",interval="1d",le="1.0"} 2', text)
+        self.assertIn('stock_fetch_request_seconds_bucket{ticker="AAPL",interval="1d",le="+Inf"} 3', text)
+        self.assertIn('stock_fetch_request_seconds_count{ticker="AAPL",interval="1d"} 3', text)
+        self.assertIn('stock_fetch_bytes_total{ticker="AAPL",interval="1d"} 1200', text)
+        self.assertIn('stock_fetch_errors_total{ticker="MSFT",interval="1h",category="empty"} 1', text)
+
+    def test_categorize(self):
+        """Ошибки распределяются по категориям без импорта requests и yfinance."""
+        self.assertEqual(categorize(socket.timeout()), 'timeout')
+        self.assertEqual(categorize(ReadTimeout()), 'timeout')
+        self.assertEqual(categorize(ConnectionError()), 'connection')
+        self.assertEqual(categorize(HTTPError(429)), 'rate_limit')
+        self.assertEqual(categorize(HTTPError(503)), 'http')
+        self.assertEqual(categorize(ValueError()), 'parse')
+        self.assertEqual(categorize(RuntimeError()), 'other')
+
+    def test_cache_hit_ratio(self):
+        """Счетчики зарегистрированных кэшей читаются при каждом снимке."""
+        metrics = FetchMetrics()
+        cache = type('Cache', (), {'hits': 3, 'misses': 1})()
+        metrics.watch_cache('frames', cache)
+        self.assertEqual(metrics.snapshot()['caches']['frames'], {'hits': 3, 'misses': 1, 'hit_ratio': 0.75})
+        cache.hits = 4
+        self.assertIn('stock_fetch_cache_hits_total{cache="frames"} 4', metrics.to_prometheus())
+
+    def test_fetch_path_is_instrumented(self):
+        """Каждое окно внутридневной загрузки, пустые ответы и ошибки источника записываются."""
+        source = FakeSource(rows=2000, start='2024-01-01', freq='h', missing=['NONE'], failing=['DOWN'])
+        data = data_sources.fetch_range(source, 'AAPL', '2024-01-01', '2024-03-31', '1h', max_workers=2)
+        self.assertFalse(dd.fetch_stock_data('NONE', source=source).size)
+        self.assertFalse(dd.fetch_stock_data('DOWN', source=source).size)
+        with self.assertRaises(ConnectionError):
+            timed_history(source, 'DOWN', '1d', period='1mo')
+
+        series = {(entry['ticker'], entry['interval']): entry for entry in fetch_metrics.snapshot()['requests']}
+        hourly = series[('AAPL', '1h')]
+        self.assertEqual(hourly['requests'], len(source.calls) - 3)
+        self.assertEqual(hourly['rows'], len(data))
+        self.assertGreater(len(data), 0)
+        self.assertGreater(hourly['bytes'], 0)
+        self.assertEqual(series[('NONE', '1d')]['errors']['empty'], 1)
+        self.assertEqual(series[('DOWN', '1d')]['errors']['connection'], 2)
+        self.assertIn('timeframe', fetch_metrics.snapshot()['caches'])
+
+
+if __name__ == '__main__':
+    unittest.main()
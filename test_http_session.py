@@ -0,0 +1,154 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_session
+from data_sources import YahooSource
+from http_session import HttpCache, create_session, freshness_lifetime
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Сервер-заменитель Yahoo: заголовки кэширования задаются путем запроса."""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests.append((self.path, dict(self.headers)))
+        headers = {'/fresh': {'Cache-Control': 'max-age=60'},
+                   '/etag': {'Cache-Control': 'no-cache', 'ETag': '"v1"'},
+                   '/no-store': {'Cache-Control': 'no-store'},
+                   '/expires': {'Date': formatdate(1_000, usegmt=True), 'Expires': formatdate(1_030, usegmt=True)}}
+        path = self.path.split('?')[0]
+        extra = headers.get(path, {})
+        if path == '/etag' and self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('ETag', '"v1"')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = f'{{"path": "{self.path}", "served": {len(self.server.requests)}}}'.encode()
+        self.send_response_only(200)
+        if 'Date' not in extra:
+            self.send_header('Date', self.date_time_string())
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in extra.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpSession(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.server.lock = threading.Lock()
+        self.server.connections = 0
+        self.server.requests = []
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.folder = tempfile.mkdtemp()
+        self.now = [1_000.0]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.folder)
+
+    def session(self, pool_size=4):
+        return create_session(pool_size, HttpCache(self.folder, clock=lambda: self.now[0]))
+
+    def test_connection_pooling(self):
+        """Последовательные и одновременные запросы переиспользуют соединения пула."""
+        session = create_session(pool_size=4)
+        for i in range(20):
+            self.assertEqual(session.get(f"{self.base_url}/data?i={i}").status_code, 200)
+        self.assertEqual(self.server.connections, 1)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda i: session.get(f"{self.base_url}/data?i={i}").json(), range(80)))
+        self.assertLessEqual(self.server.connections, 5)
+        self.assertEqual(len(self.server.requests), 100)
+        session.close()
+
+    def test_fresh_response_is_served_from_disk(self):
+        """Свежий ответ берется из кэша без запроса, в том числе другой сессией; после max-age — запрос."""
+        first = self.session().get(f"{self.base_url}/fresh?ticker=AAPL")
+        second = self.session().get(f"{self.base_url}/fresh?ticker=AAPL")
+        self.assertEqual(second.json(), first.json())
+        self.assertTrue(second.from_cache)
+        self.assertEqual(len(self.server.requests), 1)
+
+        self.session().get(f"{self.base_url}/fresh?ticker=MSFT")
+        self.assertEqual(len(self.server.requests), 2)
+
+        self.now[0] += 61
+        session = self.session()
+        self.assertEqual(session.get(f"{self.base_url}/fresh?ticker=AAPL").json()['served'], 3)
+        cache = session.get_adapter(self.base_url).cache
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+    def test_conditional_revalidation(self):
+        """Ответ с no-cache и ETag проверяется условным запросом; на 304 тело берется из кэша."""
+        session = self.session()
+        first = session.get(f"{self.base_url}/etag")
+        second = session.get(f"{self.base_url}/etag")
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertTrue(second.from_cache)
+        self.assertEqual(self.server.requests[1][1].get('If-None-Match'), '"v1"')
+        self.assertEqual(session.get_adapter(self.base_url).cache.revalidations, 1)
+
+    def test_no_store_and_expires(self):
+        """no-store не сохраняется; Expires задает время свежести относительно Date."""
+        session = self.session()
+        session.get(f"{self.base_url}/no-store")
+        session.get(f"{self.base_url}/no-store")
+        self.assertEqual(len(self.server.requests), 2)
+
+        session.get(f"{self.base_url}/expires")
+        session.get(f"{self.base_url}/expires")
+        self.assertEqual(len(self.server.requests), 3)
+        self.now[0] += 31
+        session.get(f"{self.base_url}/expires")
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_freshness_lifetime(self):
+        """Время свежести: max-age, затем Expires - Date, затем эвристика по Last-Modified."""
+        self.assertEqual(freshness_lifetime({'cache-control': 'public, max-age=300'}), 300)
+        self.assertEqual(freshness_lifetime({'Cache-Control': 'no-cache, max-age=300'}), 0)
+        self.assertEqual(freshness_lifetime({'Date': formatdate(1_000, usegmt=True),
+                                             'Expires': formatdate(1_100, usegmt=True)}), 100)
+        self.assertEqual(freshness_lifetime({'Date': formatdate(1_000, usegmt=True),
+                                             'Last-Modified': formatdate(0, usegmt=True)}), 100)
+        self.assertEqual(freshness_lifetime({}), 0)
+
+    def test_shared_session(self):
+        """Источник yfinance по умолчанию использует общую сессию; configure подключает дисковый кэш."""
+        self.assertIsNone(YahooSource().session)
+        self.assertIs(http_session.shared_session(), http_session.shared_session())
+        session = http_session.configure(cache_dir=os.path.join(self.folder, 'http'))
+        try:
+            self.assertIs(http_session.shared_session(), session)
+            self.assertIsInstance(session.get_adapter('https://query1.finance.yahoo.com').cache, HttpCache)
+        finally:
+            http_session.configure()
+
+
+if __name__ == '__main__':
+    unittest.main()
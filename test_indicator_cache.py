@@ -0,0 +1,117 @@
+import inspect
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import data_download as dd
+import indicator_cache
+import time_windows
+from fixtures import make_ohlcv
+from indicator_cache import IndicatorCache
+
+
+class TestIndicatorCache(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.cache = IndicatorCache(self.folder.name)
+        self.data = make_ohlcv(300)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_pandas_results_match_and_load_from_cache(self):
+        """Индикаторы из кэша совпадают с рассчитанными, повторный расчет не выполняется."""
+        expected = dd.add_indicators(self.data.copy())
+        first = dd.add_indicators(self.data.copy(), cache=self.cache)
+        self.assertEqual(self.cache.hits, 0)
+
+        second = dd.add_indicators(self.data.copy(), cache=self.cache)
+        pd.testing.assert_frame_equal(first, expected)
+        pd.testing.assert_frame_equal(second, expected)
+        # Каждый индикатор второго прогона загружен из кэша
+        self.assertGreater(self.cache.hits, 0)
+        self.assertEqual(self.cache.misses, self.cache.hits)
+
+    def test_numpy_block_is_cached(self):
+        """Блок индикаторов NumPy сохраняется одной записью и загружается без расчета."""
+        expected = dd.add_indicators(self.data, 'numpy')
+        dd.add_indicators(self.data, 'numpy', self.cache)
+        with mock.patch('numpy_backend.compute_indicators', side_effect=AssertionError("Блок рассчитан повторно")):
+            cached = dd.add_indicators(self.data, 'numpy', self.cache)
+        pd.testing.assert_frame_equal(cached, expected)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_changed_data_misses(self):
+        """Изменение исходных данных меняет ключ записи."""
+        changed = self.data.copy()
+        changed.iloc[-1, changed.columns.get_loc('Close')] += 1.0
+        self.assertNotEqual(indicator_cache.input_digest(self.data), indicator_cache.input_digest(changed))
+
+        dd.add_indicators(self.data, 'numpy', self.cache)
+        dd.add_indicators(changed, 'numpy', self.cache)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_changed_implementation_misses(self):
+        """Изменение исходного кода реализации делает старые записи недоступными."""
+        dd.add_indicators(self.data.copy(), cache=self.cache)
+        with mock.patch.object(indicator_cache, 'source_version', return_value='changed'):
+            cache = IndicatorCache(self.folder.name)
+            dd.add_indicators(self.data.copy(), cache=cache)
+        self.assertEqual(cache.hits, 0)
+
+    def test_dependency_change_changes_version(self):
+        """Изменение вспомогательного модуля (time_windows) меняет версию функций, которые его используют."""
+        version = indicator_cache.source_version(dd.calculate_rsi)
+        original = inspect.getsource
+
+        def edited(obj):
+            source = original(obj)
+            return source + "\n# изменение" if obj is time_windows else source
+
+        with mock.patch.object(indicator_cache.inspect, 'getsource', side_effect=edited):
+            self.assertNotEqual(indicator_cache.source_version(dd.calculate_rsi), version)
+
+    def test_object_index_digest_is_stable(self):
+        """Хеш данных с индексом из строк не зависит от адресов объектов в памяти процесса."""
+        data = self.data.reset_index(drop=True)
+        data.index = [f"bar{i}" for i in range(len(data))]
+        code = ("import pandas as pd, indicator_cache; from fixtures import make_ohlcv; "
+                "d = make_ohlcv(300).reset_index(drop=True); d.index = [f'bar{i}' for i in range(len(d))]; "
+                "print(indicator_cache.input_digest(d))")
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        self.assertEqual(output, indicator_cache.input_digest(data))
+
+    def test_eviction_keeps_recent_entries(self):
+        """При превышении размера удаляются записи, к которым дольше всего не обращались."""
+        column = np.arange(10_000, dtype=float)
+        self.cache.store('old', [column])
+        self.cache.store('recent', [column])
+        entry_size = os.path.getsize(self.cache.path('old'))
+        past = time.time() - 60
+        os.utime(self.cache.path('old'), (past, past))
+
+        self.cache.max_bytes = 2 * entry_size
+        self.cache.store('new', [column])
+        self.assertIsNone(self.cache.load('old'))
+        self.assertIsNotNone(self.cache.load('recent'))
+        self.assertIsNotNone(self.cache.load('new'))
+        self.assertLessEqual(self.cache.size(), self.cache.max_bytes)
+
+    def test_corrupted_entry_is_a_miss(self):
+        """Поврежденный файл записи считается промахом."""
+        with open(self.cache.path('broken'), 'wb') as file:
+            file.write(b'not a zip')
+        self.assertIsNone(self.cache.load('broken'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+import data_download as dd
+import indicator_sweep
+from fixtures import make_ohlcv
+
+
+class TestIndicatorSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.data = make_ohlcv(400, seed=7)
+
+    def test_sma_sweep(self):
+        """Каждый столбец сетки SMA совпадает с rolling(window).mean()."""
+        result = indicator_sweep.sma_sweep(self.data, range(5, 201, 15))
+        self.assertEqual(result.shape, (400, 14))
+        for window in result.columns:
+            expected = self.data['Close'].rolling(window=window).mean()
+            np.testing.assert_allclose(result[window], expected, rtol=1e-10, equal_nan=True)
+
+    def test_ema_sweep(self):
+        """Каждый столбец сетки EMA совпадает с ewm(span, adjust=False)."""
+        result = indicator_sweep.ema_sweep(self.data, [2, 5, 12, 26, 50, 200])
+        for span in result.columns:
+            expected = self.data['Close'].ewm(span=span, adjust=False).mean()
+            np.testing.assert_allclose(result[span], expected, rtol=1e-10)
+
+    def test_rsi_sweep(self):
+        """Столбец сетки RSI совпадает с calculate_rsi для того же периода."""
+        result = indicator_sweep.rsi_sweep(self.data, [7, 14, 21])
+        for period in result.columns:
+            expected = dd.calculate_rsi(self.data, period=period)
+            np.testing.assert_allclose(result[period], expected, rtol=1e-9, equal_nan=True)
+
+    def test_macd_sweep(self):
+        """Пара периодов сетки MACD совпадает с calculate_macd."""
+        macd, signal = indicator_sweep.macd_sweep(self.data, short_periods=[8, 12], long_periods=[10, 26])
+        self.assertEqual(list(macd.columns), [(8, 10), (8, 26), (12, 26)])
+        expected_macd, expected_signal = dd.calculate_macd(self.data, 12, 26, 9)
+        np.testing.assert_allclose(macd[(12, 26)], expected_macd, rtol=1e-9, atol=1e-10)
+        np.testing.assert_allclose(signal[(12, 26)], expected_signal, rtol=1e-9, atol=1e-10)
+
+    def test_invalid_grid(self):
+        """Пустая сетка или неположительные окна вызывают ValueError."""
+        with self.assertRaises(ValueError):
+            indicator_sweep.sma_sweep(self.data, [])
+        with self.assertRaises(ValueError):
+            indicator_sweep.rsi_sweep(self.data, [0, 14])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+
+import data_download as dd
+import instrumentation
+from fixtures import make_ohlcv
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def tearDown(self):
+        instrumentation.stop_profiling()
+
+    def test_disabled_by_default(self):
+        """Без включения профилирования шаги не измеряются."""
+        self.assertIsNone(instrumentation.get_profiler())
+        self.assertIs(instrumentation.stage('download'), instrumentation.stage('plot'))
+        dd.calculate_rsi(make_ohlcv(50))
+        self.assertIsNone(instrumentation.get_profiler())
+
+    def test_records_indicator_steps(self):
+        """Каждый вызов calculate_* записывается как отдельный шаг."""
+        data = make_ohlcv(120)
+        profiler = instrumentation.start_profiling()
+        dd.calculate_rsi(data)
+        dd.calculate_rsi(data)
+        dd.calculate_atr(data)
+        with instrumentation.stage('download') as download_stage:
+            download_stage.rows = 7
+        instrumentation.stop_profiling()
+
+        stages = {stage['stage']: stage for stage in profiler.to_dict()['stages']}
+        self.assertEqual(list(stages), ['calculate_rsi', 'calculate_atr', 'download'])
+        self.assertEqual(stages['calculate_rsi']['calls'], 2)
+        self.assertEqual(stages['calculate_rsi']['rows'], 240)
+        self.assertEqual(stages['download']['rows'], 7)
+        self.assertGreater(stages['calculate_atr']['allocated_bytes'], 0)
+        self.assertGreaterEqual(stages['calculate_atr']['wall_seconds'], 0)
+
+    def test_nested_stage_keeps_outer_peak(self):
+        """Вложенный шаг не сбрасывает пик внешнего: память, выделенная до вложенного шага, учитывается."""
+        profiler = instrumentation.start_profiling()
+        with instrumentation.stage('outer'):
+            buffer = bytearray(8 * 1024 * 1024)
+            del buffer
+            with instrumentation.stage('inner'):
+                small = bytearray(1024)
+            del small
+        instrumentation.stop_profiling()
+
+        stages = {stage['stage']: stage for stage in profiler.to_dict()['stages']}
+        self.assertGreaterEqual(stages['outer']['allocated_bytes'], 8 * 1024 * 1024)
+        self.assertLess(stages['inner']['allocated_bytes'], 1024 * 1024)
+
+    def test_external_tracemalloc_not_stopped(self):
+        """Профилировщик не останавливает tracemalloc, запущенный до него."""
+        tracemalloc.start()
+        try:
+            instrumentation.start_profiling()
+            dd.calculate_rsi(make_ohlcv(50))
+            instrumentation.stop_profiling()
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+        instrumentation.start_profiling()
+        dd.calculate_rsi(make_ohlcv(50))
+        instrumentation.stop_profiling()
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_reports(self):
+        """Отчет сохраняется в форматах JSON и Prometheus."""
+        profiler = instrumentation.start_profiling(track_memory=False)
+        dd.calculate_macd(make_ohlcv(60))
+        instrumentation.stop_profiling()
+
+        folder = tempfile.mkdtemp()
+        try:
+            json_path, prom_path = profiler.save_report(folder, 'AAPL_1mo_profile')
+            with open(json_path, encoding='utf-8') as file:
+                report = json.load(file)
+            self.assertEqual(report['stages'][0]['stage'], 'calculate_macd')
+            self.assertEqual(report['stages'][0]['allocated_bytes'], 0)
+            with open(prom_path, encoding='utf-8') as file:
+                prometheus = file.read()
+            self.assertIn('# TYPE stock_pipeline_stage_wall_seconds_total counter', prometheus)
+            self.assertIn('stock_pipeline_stage_calls_total{stage="calculate_macd"} 1', prometheus)
+            self.assertTrue(os.path.exists(prom_path))
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    unittest.main()
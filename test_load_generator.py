@@ -0,0 +1,125 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import data_download as dd
+from load_generator import SyntheticFeed, run_load
+
+
+class TestSyntheticFeed(unittest.TestCase):
+
+    def test_deterministic_per_ticker(self):
+        """Бары тикера зависят только от seed и тикера, а не от набора и порядка тикеров."""
+        first = SyntheticFeed(['AAA', 'BBB'], history=50)
+        second = SyntheticFeed(['BBB', 'AAA', 'CCC'], history=50)
+        second.advance('CCC', 10)
+        first.advance('AAA', 5)
+        second.advance('AAA', 5)
+        pd.testing.assert_frame_equal(first.history('AAA'), second.history('AAA'))
+        self.assertFalse(SyntheticFeed(['AAA'], history=50, seed=1).history('AAA').equals(first.history('AAA')))
+
+    def test_anagram_tickers_differ(self):
+        """Тикеры из одних и тех же символов получают разные потоки цен."""
+        feed = SyntheticFeed(['SYN0012', 'SYN0021', 'SYN0003'], history=50)
+        closes = [tuple(feed.history(ticker)['Close']) for ticker in feed.tickers]
+        self.assertEqual(len(set(closes)), 3)
+
+    def test_bars_are_consistent(self):
+        """High и Low ограничивают Open и Close; окно истории не превышает history."""
+        feed = SyntheticFeed(['AAA'], history=100)
+        feed.advance('AAA', 30)
+        data = feed.history('AAA')
+        self.assertEqual(len(data), 100)
+        self.assertTrue(data.index.is_monotonic_increasing)
+        self.assertTrue((data['High'] >= data[['Open', 'Close']].max(axis=1)).all())
+        self.assertTrue((data['Low'] <= data[['Open', 'Close']].min(axis=1)).all())
+        self.assertTrue((data['Volume'] >= 0).all())
+
+    def test_gaps_and_session(self):
+        """Пропущенные бары не создаются; вне торговой сессии и в выходные баров нет."""
+        feed = SyntheticFeed(['AAA'], bar_seconds=300, start='2024-01-05 09:30', history=2_000,
+                             gap_probability=0.2, session=('09:30', '16:00'))
+        data = feed.history('AAA')
+        steps = data.index.to_series().diff().dropna()
+        self.assertGreater((steps > pd.Timedelta(minutes=5)).sum(), 0)
+        self.assertLess(len(data) / 2_000, 0.9)
+        minutes = data.index.hour * 60 + data.index.minute
+        self.assertTrue(((minutes >= 9 * 60 + 30) & (minutes < 16 * 60)).all())
+        self.assertTrue((data.index.dayofweek < 5).all())
+
+    def test_volatility_regimes(self):
+        """Доходности в волатильном режиме заметно больше, чем в спокойном."""
+        feed = SyntheticFeed(['AAA'], history=10, regimes=(('calm', 0.001), ('volatile', 0.01)),
+                             switch_probability=0)
+        self.assertEqual(feed.regime('AAA'), 'calm')
+        calm = np.log(feed.advance('AAA', 500)['Close']).diff().std()
+        feed.switch_probability = 1
+        feed.advance('AAA', 1)
+        feed.switch_probability = 0
+        self.assertEqual(feed.regime('AAA'), 'volatile')
+        volatile = np.log(feed.advance('AAA', 500)['Close']).diff().std()
+        self.assertGreater(volatile, calm * 5)
+
+    def test_invalid_parameters(self):
+        """Некорректные параметры вызывают ValueError."""
+        with self.assertRaises(ValueError):
+            SyntheticFeed([])
+        with self.assertRaises(ValueError):
+            SyntheticFeed(['AAA'], gap_probability=1)
+
+    def test_feed_as_source(self):
+        """Поток используется как источник fetch_stock_data."""
+        feed = SyntheticFeed(['AAA'], history=120)
+        data = dd.fetch_stock_data('AAA', '1mo', backend='numpy', source=feed)
+        self.assertEqual(len(data), 120)
+        self.assertIn('RSI', data.columns)
+
+
+class TestRunLoad(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_fixed_rate(self):
+        """Обновления подаются с заданной частотой; экспорт и графики выполняются; показатели заполнены."""
+        feed = SyntheticFeed(['AAA', 'BBB', 'CCC'], history=100)
+        report = run_load(feed, duration=1.0, rate=20, workers=2, export_dir=self.folder, chart_every=10,
+                          sample_interval=0.1)
+        self.assertEqual(report['updates'], 20)
+        self.assertEqual(report['errors'], 0)
+        self.assertEqual(report['charts'], 2)
+        self.assertEqual(set(report['stage_ms']), {'generate', 'fetch', 'export', 'chart'})
+        latency = report['latency_ms']
+        self.assertLessEqual(latency['p50'], latency['p99'])
+        self.assertLessEqual(latency['p99'], latency['max'])
+        self.assertGreater(report['rss_peak_mb'], 0)
+
+    def test_failing_update_does_not_stop_workers(self):
+        """Исключение в обновлении учитывается как ошибка, подача обновлений не блокируется."""
+        feed = SyntheticFeed(['AAA', 'BBB'], history=100)
+
+        def advance(ticker, count=1):
+            raise RuntimeError("сбой генерации")
+
+        feed.advance = advance
+        report = run_load(feed, duration=0.3, workers=1)
+        self.assertGreater(report['errors'], 2)
+        self.assertEqual(report['updates'], 0)
+
+    def test_saturation(self):
+        """Без частоты обновления подаются по мере обработки."""
+        feed = SyntheticFeed(['AAA', 'BBB'], history=100)
+        report = run_load(feed, duration=0.5, workers=2)
+        self.assertGreater(report['updates'], 0)
+        self.assertEqual(report['bars'], feed.bars_generated - 200)
+        self.assertEqual(set(report['stage_ms']), {'generate', 'fetch'})
+
+
+if __name__ == '__main__':
+    unittest.main()
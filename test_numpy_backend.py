@@ -0,0 +1,95 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import data_download as dd
+import numpy_backend
+from fixtures import make_ohlcv
+
+
+class TestNumpyBackend(unittest.TestCase):
+
+    def assert_backends_equal(self, data):
+        expected = dd.add_indicators(data.copy(), backend='pandas')
+        result = dd.add_indicators(data.copy(), backend='numpy')
+        self.assertEqual(list(result.columns), list(expected.columns))
+        for column in numpy_backend.INDICATOR_COLUMNS:
+            np.testing.assert_allclose(result[column].to_numpy(), expected[column].to_numpy(), rtol=1e-9,
+                                       atol=1e-6, equal_nan=True, err_msg=column)
+
+    def test_equivalence(self):
+        """Расчет по массивам NumPy совпадает с расчетом функциями calculate_*."""
+        self.assert_backends_equal(make_ohlcv(600, seed=1))
+
+    def test_equivalence_short_history(self):
+        """История короче окон индикаторов дает те же NaN, что и pandas."""
+        self.assert_backends_equal(make_ohlcv(30, seed=2))
+
+    def test_equivalence_flat_prices(self):
+        """Участки без изменения цены обрабатываются так же, как в pandas."""
+        data = make_ohlcv(200, seed=3)
+        data.iloc[50:80, :4] = 100.0
+        self.assert_backends_equal(data)
+
+    def test_equivalence_zero_volume(self):
+        """Окна с барами снижения без объема дают NaN в MFI, как в pandas."""
+        data = make_ohlcv(120, seed=0)
+        data.iloc[40:71, data.columns.get_loc('Volume')] = 0
+        self.assert_backends_equal(data)
+
+    def test_equivalence_missing_values(self):
+        """Пропуск цены делает NaN только окна, которые его содержат, как в pandas."""
+        data = make_ohlcv(200, seed=5)
+        data.iloc[50, data.columns.get_loc('Close')] = np.nan
+        expected = data['Close'].rolling(20).std().to_numpy()
+        result = numpy_backend.rolling_std(data['Close'].to_numpy(), 20, np.empty(len(data)))
+        np.testing.assert_allclose(result, expected, rtol=1e-9, equal_nan=True)
+        self.assertEqual(int(np.isnan(result[19:]).sum()), 20)
+
+        expected = dd.add_indicators(data.copy(), backend='pandas')
+        result = dd.add_indicators(data.copy(), backend='numpy')
+        for column in ('Bollinger_Upper', 'Bollinger_Middle', 'Bollinger_Lower', 'Std_Deviation'):
+            np.testing.assert_allclose(result[column].to_numpy(), expected[column].to_numpy(), rtol=1e-9,
+                                       atol=1e-6, equal_nan=True, err_msg=column)
+
+    def test_ewm_long_series(self):
+        """Блочный расчет EMA не теряет точность на длинном ряде."""
+        values = np.random.default_rng(4).normal(100, 5, 20_000)
+        for span in (2, 9, 26, 200):
+            expected = pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+            result = numpy_backend.ewm_mean(values, span, np.empty(len(values)))
+            np.testing.assert_allclose(result, expected, rtol=1e-10)
+
+    def test_input_not_modified(self):
+        """Исходный DataFrame не изменяется."""
+        data = make_ohlcv(100)
+        columns = list(data.columns)
+        numpy_backend.add_indicators(data)
+        self.assertEqual(list(data.columns), columns)
+
+    def test_pandas_input_not_modified(self):
+        """Расчет функциями calculate_* тоже не изменяет исходные данные, а имеющиеся индикаторы заменяются."""
+        data = make_ohlcv(100)
+        columns = list(data.columns)
+        enriched = dd.add_indicators(data)
+        self.assertEqual(list(data.columns), columns)
+        self.assertEqual(list(enriched.columns), columns + numpy_backend.INDICATOR_COLUMNS)
+
+        again = dd.add_indicators(enriched)
+        self.assertEqual(list(again.columns), list(enriched.columns))
+        pd.testing.assert_frame_equal(again, enriched)
+
+    def test_missing_columns(self):
+        """Отсутствие нужных столбцов вызывает ValueError."""
+        with self.assertRaises(ValueError):
+            numpy_backend.add_indicators(pd.DataFrame({'Close': [1.0, 2.0]}))
+
+    def test_invalid_backend(self):
+        """Неизвестный способ расчета отклоняется до загрузки данных."""
+        with self.assertRaises(ValueError):
+            dd.fetch_stock_data('AAPL', '1mo', backend='invalid_backend')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import instrumentation
+import pipeline
+from fixtures import FakeSource
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_stages_run_concurrently(self):
+        """Этапы с задержками выполняются одновременно, а не последовательно."""
+        def slow(item):
+            time.sleep(0.05)
+            return item
+
+        line = pipeline.Pipeline([('a', slow, 2), ('b', slow, 2), ('c', slow, 2), ('d', slow, 2)])
+        start = time.perf_counter()
+        results = line.run(range(8))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(sorted(results), list(range(8)))
+        # Последовательная обработка заняла бы 8 * 4 * 0.05 = 1.6 с
+        self.assertLess(elapsed, 0.8)
+        self.assertEqual([stats['processed'] for stats in line.report()], [8, 8, 8, 8])
+
+    def test_back_pressure_bounds_items_in_flight(self):
+        """Медленный последний этап останавливает первый, и число необработанных элементов ограничено."""
+        lock = threading.Lock()
+        counters = {'started': 0, 'finished': 0, 'in_flight': 0}
+
+        def produce(item):
+            with lock:
+                counters['started'] += 1
+                counters['in_flight'] = max(counters['in_flight'], counters['started'] - counters['finished'])
+            return item
+
+        def consume(item):
+            time.sleep(0.01)
+            with lock:
+                counters['finished'] += 1
+            return item
+
+        line = pipeline.Pipeline([('produce', produce, 1), ('consume', consume, 1)], queue_size=2)
+        line.run(range(30))
+
+        # Очередь на 2 элемента, один элемент в обработке и один ожидающий места в очереди
+        self.assertLessEqual(counters['in_flight'], 4)
+        self.assertGreater(line.report()[0]['blocked_seconds'], 0.0)
+
+    def test_errors_skip_only_failed_item(self):
+        """Ошибка обработки одного элемента не останавливает конвейер."""
+        def check(item):
+            if item == 3:
+                raise ValueError("Ошибка элемента")
+            return item
+
+        line = pipeline.Pipeline([('check', check, 2), ('double', lambda item: item * 2, 1)])
+        results = line.run(range(6))
+
+        self.assertEqual(sorted(results), [0, 2, 4, 8, 10])
+        self.assertEqual([(stage, item) for stage, item, _ in line.errors], [('check', 3)])
+        self.assertEqual(line.report()[0]['failed'], 1)
+
+    def test_worker_exit_forwards_done(self):
+        """Поток, завершенный исключением не от Exception, не останавливает передачу признака окончания."""
+        def check(item):
+            if item == 3:
+                raise SystemExit
+            return item
+
+        line = pipeline.Pipeline([('check', check, 2), ('double', lambda item: item * 2, 1)])
+        results = []
+        thread = threading.Thread(target=lambda: results.extend(line.run(range(6))), daemon=True)
+        thread.start()
+        thread.join(10)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(sorted(results), [0, 2, 4, 8, 10])
+
+    def test_watchlist_shares_identical_downloads(self):
+        """Одновременные загрузки одного тикера выполняются один раз и измеряются шагом download."""
+        source = FakeSource(delay=0.2)
+        download = pipeline.watchlist_stages(period='1y', source=source, plot=False)[0][1]
+        profiler = instrumentation.start_profiling(track_memory=False)
+        try:
+            results = pipeline.Pipeline([('download', download, 2)]).run(['AAPL', 'AAPL'])
+        finally:
+            instrumentation.stop_profiling()
+
+        self.assertEqual(len(results), 2)
+        self.assertIsNot(results[0]['data'], results[1]['data'])
+        self.assertEqual(len(source.calls), 1)
+        stages = {stage['stage']: stage for stage in profiler.to_dict()['stages']}
+        self.assertEqual(stages['download']['calls'], 2)
+
+    def test_watchlist_exports_every_ticker(self):
+        """Конвейер списка тикеров загружает, рассчитывает и экспортирует данные каждого тикера."""
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as folder:
+            os.chdir(folder)
+            try:
+                source = FakeSource(missing={'NONE'})
+                results, line = pipeline.run_watchlist(['AAPL', 'MSFT', 'NONE', 'GOOGL'], period='1y',
+                                                       source=source, plot=False)
+                files = sorted(os.listdir('Data_CSV'))
+            finally:
+                os.chdir(cwd)
+
+        self.assertEqual(sorted(result['ticker'] for result in results), ['AAPL', 'GOOGL', 'MSFT'])
+        self.assertEqual(files, ['AAPL_1y_stock_data.csv', 'GOOGL_1y_stock_data.csv', 'MSFT_1y_stock_data.csv'])
+        self.assertEqual([(stage, item) for stage, item, _ in line.errors], [('download', 'NONE')])
+
+    def test_watchlist_store_and_cache(self):
+        """Конвейер записывает данные в хранилище SQLite и рассчитывает индикаторы через дисковый кэш."""
+        from indicator_cache import IndicatorCache
+        from store import IndicatorStore
+
+        with tempfile.TemporaryDirectory() as folder:
+            store = IndicatorStore(os.path.join(folder, 'stocks.db'))
+            cache = IndicatorCache(os.path.join(folder, 'Cache'))
+            try:
+                results, line = pipeline.run_watchlist(['AAPL', 'MSFT'], period='1y', source=FakeSource(),
+                                                       plot=False, dataset=os.path.join(folder, 'Dataset'),
+                                                       store=store, cache=cache)
+                self.assertEqual(line.errors, [])
+                self.assertEqual(store.tickers(), ['AAPL', 'MSFT'])
+                self.assertEqual(len(store.history('AAPL', columns=['RSI'])), results[0]['rows'])
+                self.assertGreater(cache.misses, 0)
+            finally:
+                store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import numpy_backend
+import portfolio
+from fixtures import make_ohlcv
+
+
+def reference_close(frames, weights, rebalance_dates, base=100.0):
+    """Стоимость корзины, рассчитанная циклом по барам и тикерам (для сравнения)."""
+    close = pd.concat({ticker: frame['Close'] for ticker, frame in frames.items()}, axis=1).sort_index().ffill()
+    shares = {}
+    values = []
+    for date, prices in close.iterrows():
+        value = sum(count * prices[ticker] for ticker, count in shares.items()) if shares else base
+        values.append(value)
+        if not shares or date in rebalance_dates:
+            listed = {ticker: weight for ticker, weight in weights.items() if not np.isnan(prices[ticker])}
+            total = sum(listed.values())
+            shares = {ticker: value * weight / total / prices[ticker] for ticker, weight in listed.items()}
+    return pd.Series(values, index=close.index)
+
+
+class TestPortfolio(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = {ticker: make_ohlcv(260, seed=seed) for seed, ticker in enumerate(['AAPL', 'MSFT', 'GOOGL'])}
+        # Третий тикер начинает торговаться позже и пропускает несколько баров
+        self.frames['GOOGL'] = self.frames['GOOGL'].iloc[40:].drop(self.frames['GOOGL'].index[100:103])
+        self.weights = {'AAPL': 0.5, 'MSFT': 0.3, 'GOOGL': 0.2}
+
+    def test_matches_loop_reference(self):
+        """Стоимость корзины совпадает с расчетом циклом при разных расписаниях ребалансировки."""
+        panels = portfolio.align(self.frames)
+        index = panels['Close'].index
+        for rebalance in (None, 'M', 'W', 'D', ['2020-03-15', '2020-07-01']):
+            with self.subTest(rebalance=rebalance):
+                basket = portfolio.basket_ohlcv(panels, self.weights, rebalance)
+                rows = portfolio.rebalance_rows(index, rebalance)
+                expected = reference_close(self.frames, self.weights, set(index[rows[1:]]))
+                np.testing.assert_allclose(basket['Close'].to_numpy(), expected.to_numpy(), rtol=1e-12)
+                self.assertEqual(basket['Close'].iloc[0], 100.0)
+
+    def test_monthly_rebalance_rows(self):
+        """Ежемесячная ребалансировка выполняется на последнем баре каждого месяца."""
+        index = pd.date_range('2020-01-01', periods=70, freq='B')
+        rows = portfolio.rebalance_rows(index, 'M')
+        self.assertEqual(list(index[rows].strftime('%Y-%m-%d')), ['2020-01-01', '2020-01-31', '2020-02-28',
+                                                                  '2020-03-31'])
+
+    def test_weights_over_time(self):
+        """Веса DataFrame применяются с дат своих строк."""
+        weights = pd.DataFrame({'AAPL': [1.0, 0.0], 'MSFT': [0.0, 1.0]},
+                               index=pd.to_datetime(['2020-01-01', '2020-06-01']))
+        basket = portfolio.basket_ohlcv(portfolio.align(self.frames), weights)
+        close = {ticker: frame['Close'] for ticker, frame in self.frames.items()}
+        switch = close['MSFT'].index.searchsorted(pd.Timestamp('2020-06-01'))
+
+        aapl = 100 * close['AAPL'] / close['AAPL'].iloc[0]
+        np.testing.assert_allclose(basket['Close'].iloc[:switch + 1], aapl.iloc[:switch + 1], rtol=1e-12)
+        msft = basket['Close'].iloc[switch] * close['MSFT'] / close['MSFT'].iloc[switch]
+        np.testing.assert_allclose(basket['Close'].iloc[switch:], msft.iloc[switch:], rtol=1e-12)
+
+    def test_single_ticker_basket_indicators(self):
+        """Корзина из одного тикера — масштабированный тикер: RSI, стохастик и ADL совпадают."""
+        data = self.frames['AAPL']
+        result = portfolio.basket_indicators({'AAPL': data})
+        expected = numpy_backend.add_indicators(data)
+        scale = 100 / data['Close'].iloc[0]
+        np.testing.assert_allclose(result['Close'], data['Close'] * scale, rtol=1e-12)
+        np.testing.assert_allclose(result['High'], data['High'] * scale, rtol=1e-12)
+        np.testing.assert_allclose(result['Volume'], data['Volume'] / scale, rtol=1e-12)
+        for column in ('RSI', 'Stochastic_K', 'MFI', 'CCI'):
+            np.testing.assert_allclose(result[column], expected[column], rtol=1e-9, atol=1e-9, err_msg=column)
+        np.testing.assert_allclose(result['VWAP'], expected['VWAP'] * scale, rtol=1e-9)
+        np.testing.assert_allclose(result['ATR'], expected['ATR'] * scale, rtol=1e-9)
+
+    def test_invalid_weights(self):
+        """Веса для тикеров без данных и корзина без тикеров с весом отклоняются."""
+        panels = portfolio.align(self.frames)
+        with self.assertRaises(ValueError):
+            portfolio.basket_ohlcv(panels, {'TSLA': 1.0})
+        with self.assertRaises(ValueError):
+            portfolio.basket_ohlcv(panels, {'GOOGL': 1.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import corporate_actions
+import numpy_backend
+from fetch_metrics import fetch_metrics
+from fixtures import FakeSource, SimulatedClock, make_ohlcv
+from refresh import IncrementalIndicators, RefreshDaemon
+
+# Столбцы, которые при расчете с перенесенным состоянием совпадают побитово
+EXACT_COLUMNS = ['VWAP', 'OBV', 'ADL', 'Parabolic_SAR', 'Stochastic_K', 'Ichimoku_Lagging_Span']
+
+
+class TestIncrementalIndicators(unittest.TestCase):
+
+    def setUp(self):
+        self.data = make_ohlcv(400, seed=7)
+
+    def assert_matches(self, result, data):
+        expected = numpy_backend.add_indicators(data)
+        self.assertEqual(list(result.columns), list(expected.columns))
+        pd.testing.assert_index_equal(result.index, expected.index)
+        np.testing.assert_allclose(result.to_numpy(dtype=float), expected.to_numpy(dtype=float),
+                                   rtol=1e-9, atol=1e-9)
+        for column in EXACT_COLUMNS:
+            np.testing.assert_array_equal(result[column].to_numpy(), expected[column].to_numpy(), err_msg=column)
+
+    def test_delta_updates_match_full_calculation(self):
+        """Дополнение истории порциями новых баров совпадает с расчетом всей истории."""
+        history = IncrementalIndicators()
+        self.assertEqual(history.update(self.data.iloc[:200]), 200)
+        position = 200
+        for size in (1, 3, 1, 30, 52, 113):
+            # Источник возвращает бары начиная с последнего сохраненного
+            added = history.update(self.data.iloc[position - 1:position + size])
+            self.assertEqual(added, size)
+            self.assertEqual(history.changed_from, self.data.index[position])
+            position += size
+        self.assertEqual(history.update(self.data.iloc[position - 1:]), 0)
+        self.assert_matches(history.data, self.data)
+
+    def test_revised_last_bar_is_replaced(self):
+        """Измененный последний бар (незакрытый внутридневной бар) пересчитывается."""
+        history = IncrementalIndicators()
+        partial = self.data.iloc[:300].copy()
+        partial.iloc[-1, partial.columns.get_loc('Close')] *= 1.01
+        history.update(partial)
+
+        self.assertEqual(history.update(self.data.iloc[299:301]), 2)
+        self.assertEqual(history.changed_from, self.data.index[299])
+        self.assert_matches(history.data, self.data.iloc[:301])
+
+    def test_split_recalculates_history(self):
+        """Сплит в новых барах пересчитывает сохраненную историю так же, как merge_history."""
+        stored = self.data.iloc[:300]
+        fresh = self.data.iloc[299:320].copy()
+        fresh[['Open', 'High', 'Low', 'Close']] /= 2
+        fresh['Volume'] *= 2
+        fresh['Stock Splits'] = 0.0
+        fresh.iloc[5, fresh.columns.get_loc('Stock Splits')] = 2.0
+
+        history = IncrementalIndicators()
+        history.update(stored)
+        self.assertEqual(history.update(fresh), 320)
+        self.assertEqual(history.changed_from, self.data.index[0])
+        expected = corporate_actions.merge_history(stored, fresh)
+        np.testing.assert_allclose(history.data[expected.columns].to_numpy(dtype=float),
+                                   expected.to_numpy(dtype=float), rtol=1e-9, atol=1e-9)
+
+
+class TestRefreshDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = SimulatedClock()
+        self.source = FakeSource(rows=300, visible=250)
+        self.exported = []
+        self.daemon = RefreshDaemon(self.source, period='1y', clock=self.clock, base_backoff=10.0,
+                                    max_backoff=80.0, jitter=0.2, seed=1,
+                                    exports=[lambda ticker, data, changed_from: self.exported.append(
+                                        (ticker, len(data), changed_from))])
+
+    def calls(self, ticker):
+        return [call for call in self.source.calls if call['ticker'] == ticker]
+
+    def test_each_ticker_on_its_cadence(self):
+        """Каждый тикер обновляется со своей периодичностью; повторные загрузки начинаются с последнего бара."""
+        self.daemon.add('AAPL', cadence=60)
+        self.daemon.add('MSFT', cadence=300)
+        self.daemon.run(duration=600)
+
+        self.assertEqual(self.clock.now(), 600)
+        self.assertEqual(len(self.calls('AAPL')), 11)
+        self.assertEqual(len(self.calls('MSFT')), 3)
+        self.assertEqual(self.calls('AAPL')[0]['period'], '1y')
+        last_bar = self.source.frame('AAPL').index[249]
+        self.assertTrue(all(call['start'] == last_bar for call in self.calls('AAPL')[1:]))
+
+    def test_new_bars_are_exported(self):
+        """Новые бары добавляются к истории и передаются в экспорт с датой первого измененного бара."""
+        self.daemon.add('AAPL', cadence=60)
+        self.daemon.run(duration=30)
+        self.source.visible = 260
+        self.daemon.run(duration=60)
+        self.daemon.run(duration=60)
+
+        frame = self.source.frame('AAPL')
+        self.assertEqual(self.exported, [('AAPL', 250, frame.index[0]), ('AAPL', 260, frame.index[250])])
+        self.assertEqual(self.daemon.bars_added, 260)
+        self.assertEqual(self.daemon.refreshes, 3)
+
+    def test_delta_fetches_are_timed(self):
+        """Загрузки новых баров после первой записываются в показатели запросов к источнику."""
+        fetch_metrics.reset()
+        self.daemon.add('AAPL', cadence=60)
+        self.daemon.run(duration=150)
+        requests = fetch_metrics.snapshot()['requests']
+        self.assertEqual(sum(entry['requests'] for entry in requests if entry['ticker'] == 'AAPL'), 3)
+
+    def test_priority_among_due_tickers(self):
+        """Тикеры, которые пора обновить одновременно, обрабатываются в порядке приоритета."""
+        self.daemon.add('LOW', cadence=60, priority=5)
+        self.daemon.add('HIGH', cadence=60, priority=0)
+        self.daemon.add('MID', cadence=60, priority=1)
+        self.assertEqual(self.daemon.queue_depth(), 3)
+        self.assertEqual(self.daemon.run_pending(), 3)
+        self.assertEqual([call['ticker'] for call in self.source.calls], ['HIGH', 'MID', 'LOW'])
+
+    def test_jittered_backoff_after_failures(self):
+        """После ошибок задержка растет вдвое (с разбросом ±20%) до предела, после успеха сбрасывается."""
+        self.source.failing.add('AAPL')
+        self.daemon.add('AAPL', cadence=60)
+        attempts = []
+        while len(attempts) < 6:
+            self.daemon.run_pending()
+            attempts.append(self.clock.now())
+            self.clock.sleep(self.daemon.tickers['AAPL'].due - self.clock.now())
+
+        delays = np.diff(attempts)
+        for delay, base in zip(delays, [10, 20, 40, 80, 80]):
+            self.assertTrue(base * 0.8 <= delay <= base * 1.2, (delay, base))
+        self.assertEqual(len(set(np.round(delays / [10, 20, 40, 80, 80], 6))), 5)
+
+        metrics = self.daemon.metrics()
+        self.assertEqual((metrics['failures'], metrics['backing_off'], metrics['refreshes']), (6, 1, 0))
+        self.assertIsInstance(self.daemon.tickers['AAPL'].last_error, ConnectionError)
+
+        self.source.failing.clear()
+        self.daemon.run_pending()
+        self.assertEqual(self.daemon.tickers['AAPL'].failures, 0)
+        self.assertEqual(self.daemon.tickers['AAPL'].due, self.clock.now() + 60)
+
+    def test_metrics(self):
+        """Показатели: глубина очереди и время с последнего успешного обновления."""
+        self.source.failing.add('MSFT')
+        self.daemon.add('AAPL', cadence=60)
+        self.daemon.add('MSFT', cadence=60)
+        self.daemon.run_pending()
+        self.clock.sleep(90)
+
+        metrics = self.daemon.metrics()
+        self.assertEqual(metrics['queue_depth'], 2)
+        self.assertEqual(metrics['staleness_seconds'], {'AAPL': 90, 'MSFT': 90})
+        self.assertEqual(metrics['max_staleness_seconds'], 90)
+        text = self.daemon.to_prometheus()
+        self.assertIn('stock_refresh_queue_depth 2', text)
+        self.assertIn('stock_refresh_failures_total 1', text)
+        self.assertIn('stock_refresh_staleness_seconds{ticker="AAPL"} 90', text)
+
+    def test_removed_ticker_is_not_refreshed(self):
+        """Удаленный тикер больше не обновляется."""
+        self.daemon.add('AAPL', cadence=60)
+        self.daemon.remove('AAPL')
+        self.daemon.run(duration=120)
+        self.assertEqual(self.source.calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+import pandas as pd
+
+import data_download as dd
+import resampling
+from fixtures import make_ohlcv
+
+
+class TestResampling(unittest.TestCase):
+
+    def test_weekly_aggregation(self):
+        """Недельные бары агрегируются как first/max/min/last/sum."""
+        data = make_ohlcv(20, start='2024-01-01')
+        weekly = resampling.resample_ohlcv(data, '1wk')
+        self.assertEqual(len(weekly), 4)
+
+        first_week = data.loc['2024-01-01':'2024-01-05']
+        self.assertEqual(weekly.index[0], pd.Timestamp('2024-01-05'))
+        self.assertEqual(weekly['Open'].iloc[0], first_week['Open'].iloc[0])
+        self.assertEqual(weekly['High'].iloc[0], first_week['High'].max())
+        self.assertEqual(weekly['Low'].iloc[0], first_week['Low'].min())
+        self.assertEqual(weekly['Close'].iloc[0], first_week['Close'].iloc[-1])
+        self.assertEqual(weekly['Volume'].iloc[0], first_week['Volume'].sum())
+
+    def test_intraday_to_daily_skips_empty_days(self):
+        """Дни без баров не попадают в результат."""
+        data = make_ohlcv(8 * 10, start='2024-01-05 09:30', freq='h')
+        data = data[data.index.dayofweek < 5]
+        daily = resampling.resample_ohlcv(data, '1d')
+        self.assertTrue((daily.index.dayofweek < 5).all())
+        self.assertAlmostEqual(daily['Volume'].sum(), data['Volume'].sum())
+
+    def test_many_tickers_match_single(self):
+        """Агрегация нескольких тикеров за один проход совпадает с агрегацией по отдельности."""
+        frames = {'AAPL': make_ohlcv(120, seed=1), 'MSFT': make_ohlcv(90, seed=2, start='2020-02-03')}
+        monthly = resampling.resample_many(frames, '1mo')
+        self.assertEqual(set(monthly), {'AAPL', 'MSFT'})
+        for ticker, frame in frames.items():
+            pd.testing.assert_frame_equal(monthly[ticker], resampling.resample_ohlcv(frame, '1mo'),
+                                          check_freq=False)
+
+    def test_cache(self):
+        """Повторный запрос интервала берется из кэша, а изменение данных его обновляет."""
+        cache = resampling.TimeframeCache()
+        data = make_ohlcv(60)
+        first = cache.get('AAPL', data, '1wk')
+        self.assertIs(cache.get('AAPL', data, '1wk'), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        updated = pd.concat([data, make_ohlcv(5, start='2020-03-25', seed=9)])
+        self.assertGreater(len(cache.get('AAPL', updated, '1wk')), len(first))
+        self.assertEqual(cache.misses, 2)
+
+    def test_indicators_on_weekly_bars(self):
+        """Индикаторы рассчитываются по агрегированным барам."""
+        weekly = resampling.resample_ohlcv(make_ohlcv(400), '1wk')
+        enriched = dd.add_indicators(weekly.copy(), backend='numpy')
+        self.assertEqual(len(enriched), len(weekly))
+        self.assertTrue(enriched['RSI'].iloc[-1] >= 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
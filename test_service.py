@@ -0,0 +1,163 @@
+import asyncio
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from fixtures import FakeSource
+from service import IndicatorService, TTLCache
+
+
+def failing_history(error):
+    """Возвращает метод history, вызывающий исключение error."""
+    def history(*args, **kwargs):
+        raise error
+
+    return history
+
+
+class ServiceThread:
+    """Запускает сервис в отдельном потоке со своим циклом событий."""
+
+    def __init__(self, service):
+        self.service = service
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        host, port = asyncio.run_coroutine_threadsafe(self.service.start('127.0.0.1', 0), self.loop).result(10)
+        self.base_url = f"http://{host}:{port}"
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        asyncio.run_coroutine_threadsafe(self.service.close(), self.loop).result(10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(10)
+
+    def get(self, path):
+        try:
+            with urllib.request.urlopen(self.base_url + path, timeout=10) as response:
+                return response.status, response.headers.get_content_type(), response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.headers.get_content_type(), error.read()
+
+
+class TestService(unittest.TestCase):
+
+    def setUp(self):
+        self.source = FakeSource(rows=250)
+
+    def test_indicators(self):
+        """Индикаторы возвращаются в формате JSON, повторный запрос берется из кэша."""
+        with ServiceThread(IndicatorService(source=self.source)) as server:
+            status, content_type, body = server.get('/indicators?ticker=AAPL&period=1y&columns=Close,RSI')
+            self.assertEqual(status, 200)
+            self.assertEqual(content_type, 'application/json')
+            payload = json.loads(body)
+            self.assertEqual(payload['columns'], ['Close', 'RSI'])
+            self.assertEqual(len(payload['data']), 250)
+            self.assertIsNone(payload['data'][0][1])
+
+            server.get('/indicators?ticker=AAPL&period=1y&columns=Close,RSI')
+            server.get('/csv?ticker=AAPL&period=1y')
+            self.assertEqual(len(self.source.calls), 1)
+
+    def test_chart_and_csv(self):
+        """График и CSV строятся по тем же данным."""
+        with ServiceThread(IndicatorService(source=self.source)) as server:
+            status, content_type, body = server.get('/chart?ticker=MSFT&period=1y')
+            self.assertEqual((status, content_type), (200, 'text/html'))
+            self.assertIn(b'plotly', body)
+            status, content_type, body = server.get('/csv?ticker=MSFT&period=1y')
+            self.assertEqual((status, content_type), (200, 'text/csv'))
+            self.assertEqual(len(body.decode('utf-8').splitlines()), 251)
+
+    def test_concurrent_identical_requests(self):
+        """Одновременные одинаковые запросы строят ответ один раз."""
+        service = IndicatorService(source=FakeSource(rows=250, delay=0.2))
+
+        async def requests():
+            try:
+                return await asyncio.gather(*[service.dispatch('GET', '/chart?ticker=AAPL&period=1y')
+                                              for _ in range(5)])
+            finally:
+                await service.close()
+
+        responses = asyncio.run(requests())
+        self.assertEqual({response[0] for response in responses}, {200})
+        self.assertEqual(len({response[2] for response in responses}), 1)
+        self.assertEqual(service.flight.executions, 1)
+        self.assertEqual(len(service.source.calls), 1)
+        self.assertEqual(service.flight.in_flight(), 0)
+
+    def test_errors(self):
+        """Ошибки ввода, отсутствие данных и неизвестный путь дают коды 400 и 404."""
+        source = FakeSource(missing=['NONE'])
+        with ServiceThread(IndicatorService(source=source)) as server:
+            self.assertEqual(server.get('/indicators?ticker=AAPL&period=invalid_period')[0], 400)
+            self.assertEqual(server.get('/indicators?period=1y')[0], 400)
+            self.assertEqual(server.get('/indicators?ticker=AAPL&columns=Unknown')[0], 400)
+            self.assertEqual(server.get('/indicators?ticker=AAPL&interval=7m')[0], 400)
+            self.assertEqual(server.get('/indicators?ticker=AAPL&timeframe=bad')[0], 400)
+            self.assertEqual(server.get('/indicators?ticker=AAPL&period=custom&start=2024-01-01')[0], 400)
+            self.assertEqual(server.get('/indicators?ticker=AAPL&period=custom&start=x&end=2024-02-01')[0], 400)
+            self.assertEqual(server.get('/indicators?ticker=NONE')[0], 404)
+            self.assertEqual(server.get('/unknown')[0], 404)
+            self.assertEqual(server.get('/health')[0], 200)
+
+    def test_source_errors(self):
+        """Недоступный источник дает 503, иная ошибка источника — 502, а не 404 как для неизвестного тикера."""
+        source = FakeSource(failing=['DOWN'], missing=['NONE'])
+        broken = FakeSource()
+        broken.history = lambda *args, **kwargs: 1 / 0
+        with ServiceThread(IndicatorService(source=source)) as server:
+            status, _, body = server.get('/indicators?ticker=DOWN')
+            self.assertEqual(status, 503)
+            self.assertIn('DOWN', json.loads(body)['error'])
+            self.assertEqual(server.get('/indicators?ticker=NONE')[0], 404)
+            self.assertEqual(server.get('/indicators?ticker=AAPL')[0], 200)
+        with ServiceThread(IndicatorService(source=broken)) as server:
+            self.assertEqual(server.get('/chart?ticker=AAPL')[0], 502)
+
+        # Ошибки источника с типами ошибок ввода и поиска не выдаются за 400 и 404
+        for error in (KeyError('chart'), IndexError('list index out of range'), ValueError('No timezone found')):
+            source = FakeSource()
+            source.history = failing_history(error)
+            with self.subTest(error=error), ServiceThread(IndicatorService(source=source)) as server:
+                self.assertEqual(server.get('/indicators?ticker=AAPL')[0], 502)
+
+    def test_handler_errors(self):
+        """Исключение в коде обработчика, кроме ошибки ввода, дает 500."""
+        service = IndicatorService(source=self.source)
+        service.handlers['/csv'] = lambda params: {}['missing']
+        with ServiceThread(service) as server:
+            self.assertEqual(server.get('/csv?ticker=AAPL')[0], 500)
+
+    def test_metrics(self):
+        """Показатели загрузки отдаются в формате Prometheus и не кэшируются."""
+        with ServiceThread(IndicatorService(source=self.source)) as server:
+            server.get('/indicators?ticker=NVDA&period=1y')
+            status, content_type, body = server.get('/metrics')
+            self.assertEqual((status, content_type), (200, 'text/plain'))
+            text = body.decode('utf-8')
+            self.assertIn('stock_fetch_request_seconds_count{ticker="NVDA",interval="1d"}', text)
+            self.assertIn('stock_fetch_cache_misses_total{cache="service_frames"}', text)
+
+            server.get('/indicators?ticker=NVDA&period=1y&columns=Close')
+            text = server.get('/metrics')[2].decode('utf-8')
+            self.assertIn('stock_fetch_cache_hits_total{cache="service_frames"} 1', text)
+
+    def test_ttl_cache(self):
+        """Запись кэша устаревает по истечении времени жизни."""
+        now = [0.0]
+        cache = TTLCache(ttl=10, clock=lambda: now[0])
+        cache.set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
+        now[0] = 11.0
+        self.assertIsNone(cache.get('key'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+import unittest
+import multiprocessing
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+import data_download as dd
+import numpy_backend
+import shared_frames
+from fixtures import make_ohlcv
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def crash(data):
+    """Имитирует аварийное завершение рабочего процесса."""
+    os._exit(1)
+
+
+def block_exists(name):
+    return os.path.exists(os.path.join('/dev/shm', name.lstrip('/')))
+
+
+class TestSharedFrames(unittest.TestCase):
+
+    def setUp(self):
+        data = make_ohlcv(500, seed=2)
+        data.index = data.index.tz_localize('America/New_York')
+        data['Volume'] = data['Volume'].astype('int64')
+        self.data = numpy_backend.add_indicators(data)
+
+    def test_attach_is_zero_copy_and_read_only(self):
+        """Подключенный DataFrame совпадает с исходным, ссылается на общую память и доступен только для чтения."""
+        with shared_frames.publish(self.data) as shared:
+            data = shared_frames.attach(shared.descriptor)
+            pd.testing.assert_frame_equal(data, self.data.astype(float), check_freq=False)
+            close = data['Close'].to_numpy()
+            block = shared_frames._attached[shared.descriptor['name']]
+            self.assertTrue(np.shares_memory(close, np.frombuffer(block.buf, dtype=np.uint8)))
+            with self.assertRaises(ValueError):
+                close[0] = 0.0
+            del data, close, block
+            shared_frames.detach(shared.descriptor)
+
+    def test_compute_in_workers(self):
+        """Функции в рабочих процессах дают те же результаты, что и в текущем процессе."""
+        functions = [dd.calculate_rsi, (dd.calculate_rsi, {'period': 7}), dd.calculate_coefficient_of_variation]
+        for method in ('fork', 'spawn'):
+            with self.subTest(method=method):
+                rsi, rsi_7, coefficient = shared_frames.compute_in_workers(
+                    self.data, functions, max_workers=2, mp_context=multiprocessing.get_context(method))
+                pd.testing.assert_series_equal(rsi, dd.calculate_rsi(self.data), check_freq=False)
+                pd.testing.assert_series_equal(rsi_7, dd.calculate_rsi(self.data, period=7), check_freq=False)
+                self.assertEqual(coefficient, dd.calculate_coefficient_of_variation(self.data))
+
+    @unittest.skipUnless(os.path.isdir('/dev/shm'), "нужна файловая система /dev/shm")
+    def test_worker_crash_releases_block(self):
+        """Аварийное завершение рабочего процесса не оставляет блок в общей памяти."""
+        names = []
+        publish = shared_frames.publish
+
+        def tracked(data, columns=None):
+            shared = publish(data, columns)
+            names.append(shared.descriptor['name'])
+            return shared
+
+        shared_frames.publish = tracked
+        try:
+            with self.assertRaises(BrokenProcessPool):
+                shared_frames.compute_in_workers(self.data, [crash], max_workers=1)
+        finally:
+            shared_frames.publish = publish
+        self.assertFalse(block_exists(names[0]))
+
+    @unittest.skipUnless(os.path.isdir('/dev/shm'), "нужна файловая система /dev/shm")
+    def test_clean_exit_and_owner_crash(self):
+        """Без предупреждений resource_tracker при обычной работе; блок упавшего владельца удаляется."""
+        script = textwrap.dedent("""
+            import multiprocessing, os, sys
+            import data_download as dd, shared_frames
+            from fixtures import make_ohlcv
+
+            if __name__ == '__main__':
+                data = make_ohlcv(200)
+                shared_frames.compute_in_workers(data, [dd.calculate_rsi], max_workers=2,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+                shared = shared_frames.publish(data)
+                print(shared.descriptor['name'], flush=True)
+                if sys.argv[1] == 'crash':
+                    os._exit(1)
+                shared.close()
+        """)
+        for mode in ('exit', 'crash'):
+            with self.subTest(mode=mode):
+                result = subprocess.run([sys.executable, '-c', script, mode], cwd=HERE, capture_output=True,
+                                        text=True, timeout=120)
+                name = result.stdout.strip()
+                deadline = time.monotonic() + 10
+                while block_exists(name) and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                self.assertFalse(block_exists(name))
+                if mode == 'exit':
+                    self.assertEqual(result.returncode, 0, result.stderr)
+                    self.assertNotIn('resource_tracker', result.stderr)
+                    self.assertNotIn('KeyError', result.stderr)
+
+    def test_requires_date_index(self):
+        """Данные без индекса дат отклоняются."""
+        with self.assertRaises(ValueError):
+            shared_frames.publish(self.data.reset_index(drop=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pandas as pd
+
+import data_download as dd
+from fixtures import FakeSource
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def run_concurrently(self, function, count=8):
+        """Запускает function одновременно в count потоках и возвращает результаты или исключения."""
+        barrier = threading.Barrier(count)
+
+        def call():
+            barrier.wait()
+            try:
+                return function()
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            return list(executor.map(lambda _: call(), range(count)))
+
+    def test_concurrent_fetches_share_one_download(self):
+        """Одновременные одинаковые запросы загружают данные и рассчитывают индикаторы один раз."""
+        source = FakeSource(delay=0.2)
+        results = self.run_concurrently(
+            lambda: dd.fetch_stock_data_shared('AAPL', '1y', backend='numpy', source=source))
+
+        self.assertEqual(len(source.calls), 1)
+        for data in results:
+            pd.testing.assert_frame_equal(data, results[0])
+        # Каждый участник получает собственный объект данных
+        self.assertEqual(len({id(data) for data in results}), len(results))
+
+    def test_leader_gets_copy(self):
+        """Выполнивший загрузку тоже получает копию: общий результат не передается никому."""
+        frame = pd.DataFrame({'Close': [1.0, 2.0]})
+        with patch.object(dd, 'fetch_stock_data', return_value=frame) as fetch:
+            data = dd.fetch_stock_data_shared('AAPL', '1y', cache='cache')
+        self.assertIsNot(data, frame)
+        pd.testing.assert_frame_equal(data, frame)
+        self.assertEqual(fetch.call_args.args[8], 'cache')
+
+    def test_different_requests_are_not_merged(self):
+        """Запросы с разными параметрами выполняются отдельно."""
+        source = FakeSource(delay=0.1)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(lambda ticker: dd.fetch_stock_data_shared(ticker, '1y', source=source),
+                              ['AAPL', 'MSFT']))
+        self.assertEqual(sorted(call['ticker'] for call in source.calls), ['AAPL', 'MSFT'])
+
+    def test_sequential_calls_fetch_again(self):
+        """После завершения загрузки следующий запрос выполняется заново."""
+        source = FakeSource()
+        dd.fetch_stock_data_shared('AAPL', '1y', source=source)
+        dd.fetch_stock_data_shared('AAPL', '1y', source=source)
+        self.assertEqual(len(source.calls), 2)
+
+    def test_error_is_shared(self):
+        """Все участники получают исключение общего вызова."""
+        flight = SingleFlight()
+        calls = []
+
+        def failing():
+            calls.append(1)
+            threading.Event().wait(0.2)
+            raise ValueError("Ошибка загрузки")
+
+        results = self.run_concurrently(lambda: flight.do('key', failing))
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(len({id(result) for result in results}), 1)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_async_tasks_share_one_call(self):
+        """Одновременные задачи asyncio с одинаковым ключом выполняют корутину один раз."""
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 42
+
+        async def run():
+            return await asyncio.gather(*(flight.do('key', compute) for _ in range(5)))
+
+        results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([value for value, _ in results], [42] * 5)
+        self.assertEqual(sum(shared for _, shared in results), 4)
+
+    def test_async_leader_cancellation(self):
+        """Отмена первой задачи не отменяет общий вызов: остальные задачи получают результат."""
+        flight = AsyncSingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return 42
+
+        async def run():
+            leader = asyncio.ensure_future(flight.do('key', compute))
+            await asyncio.sleep(0)
+            followers = [asyncio.ensure_future(flight.do('key', compute)) for _ in range(3)]
+            await asyncio.sleep(0)
+            leader.cancel()
+            results = await asyncio.gather(*followers)
+            return leader.cancelled(), results
+
+        cancelled, results = asyncio.run(run())
+        self.assertTrue(cancelled)
+        self.assertEqual(results, [(42, True)] * 3)
+        self.assertEqual(flight.in_flight(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
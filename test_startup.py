@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+import unittest
+
+# Бюджет времени импорта модуля main (накопленное время по -X importtime), микросекунды
+IMPORT_TIME_BUDGET_US = 100_000
+
+# Библиотеки, которые не должны загружаться при старте программы
+HEAVY_MODULES = ('pandas', 'numpy', 'yfinance', 'plotly', 'matplotlib')
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_python(*args):
+    """Запускает интерпретатор с -X importtime в папке проекта и возвращает результат."""
+    return subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=PROJECT_DIR, capture_output=True,
+                          text=True, timeout=60)
+
+
+def imported_modules(importtime_output):
+    """Возвращает словарь {модуль: накопленное время в микросекундах} из вывода -X importtime."""
+    modules = {}
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_import_time_budget(self):
+        """Импорт main укладывается в бюджет времени и не загружает тяжелые библиотеки."""
+        result = run_python('-c', 'import main')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        modules = imported_modules(result.stderr)
+        self.assertLess(modules['main'], IMPORT_TIME_BUDGET_US)
+        for heavy in HEAVY_MODULES:
+            self.assertNotIn(heavy, modules)
+
+    def test_help_is_lightweight(self):
+        """Справка --help выводится без загрузки тяжелых библиотек."""
+        result = run_python('main.py', '--help')
+        self.assertEqual(result.returncode, 0)
+        self.assertIn('--period', result.stdout)
+        modules = imported_modules(result.stderr)
+        for heavy in HEAVY_MODULES:
+            self.assertNotIn(heavy, modules)
+
+    def test_invalid_period_fails_fast(self):
+        """Невалидный период отклоняется до загрузки тяжелых библиотек."""
+        result = run_python('main.py', 'AAPL', '--period', 'invalid_period')
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("Период 'invalid_period' невалиден", result.stderr)
+        modules = imported_modules(result.stderr)
+        for heavy in HEAVY_MODULES:
+            self.assertNotIn(heavy, modules)
+
+    def test_incompatible_options_rejected(self):
+        """--refresh без --watchlist и неподдерживаемые вместе с ним параметры отклоняются с ошибкой."""
+        for args, message in [(('AAPL', '--refresh', '60'), '--watchlist'),
+                              (('--watchlist', 'AAPL', '--refresh', '0'), 'положительным'),
+                              (('--watchlist', 'AAPL', '--refresh', '60', '--cache-dir', 'Cache'), '--cache-dir')]:
+            with self.subTest(args=args):
+                result = run_python('main.py', *args)
+                self.assertEqual(result.returncode, 2)
+                self.assertIn(message, result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
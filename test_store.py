@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import numpy_backend
+from fixtures import make_ohlcv
+from store import IndicatorStore, STORE_COLUMNS, parse_condition, screen_frames
+
+
+class TestIndicatorStore(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.store = IndicatorStore(os.path.join(self.folder.name, 'stocks.db'))
+        self.frames = {ticker: numpy_backend.add_indicators(make_ohlcv(300, seed=seed))
+                       for seed, ticker in enumerate(['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'NVDA'])}
+        self.store.upsert_many(self.frames)
+
+    def tearDown(self):
+        self.store.close()
+        self.folder.cleanup()
+
+    def test_history_round_trip(self):
+        """История тикера читается без потерь, NaN сохраняются как NULL."""
+        data = self.store.history('MSFT')
+        expected = self.frames['MSFT'][STORE_COLUMNS].astype(float)
+        pd.testing.assert_frame_equal(data, expected, check_names=False, check_freq=False)
+        self.assertTrue(np.isnan(data['RSI'].iloc[0]))
+
+    def test_upsert_replaces_existing_bars(self):
+        """Повторная запись тех же дат заменяет бары, а не добавляет их."""
+        changed = self.frames['AAPL'].iloc[-5:].copy()
+        changed['Close'] = 1.0
+        self.store.upsert('AAPL', changed)
+        data = self.store.history('AAPL', columns=['Close'])
+        self.assertEqual(len(data), 300)
+        self.assertTrue((data['Close'].iloc[-5:] == 1.0).all())
+        self.assertEqual(self.store.tickers(), sorted(self.frames))
+
+    def test_history_date_range(self):
+        """Диапазон дат: начало включительно, окончание не включительно."""
+        index = self.frames['GOOGL'].index
+        data = self.store.history('GOOGL', columns=['Close'], start=index[10], end=index[20])
+        self.assertEqual(list(data.index), list(index[10:20]))
+
+    def test_screen_matches_pandas(self):
+        """Отбор в хранилище совпадает с отбором по DataFrame в памяти."""
+        date = self.frames['AAPL'].index[-2]
+        cases = [(['RSI < 50'], 'latest'), (['RSI < 60', 'Close < Bollinger_Middle'], 'latest'),
+                 (['Close > Moving_Average', 'Volume >= 1000'], date), (['RSI > 1000'], 'latest'),
+                 (['RSI[-1] < 50', 'RSI >= 50'], 'latest'), (['Close > Close[-1]'], date),
+                 (['Close[-1] < Bollinger_Middle[-1]'], self.frames['AAPL'].index[0])]
+        for conditions, on in cases:
+            with self.subTest(conditions=conditions, date=on):
+                expected = screen_frames(self.frames, conditions, on)
+                result = self.store.screen(conditions, on)
+                self.assertEqual(list(result['Ticker']), list(expected['Ticker']))
+                pd.testing.assert_frame_equal(result.drop(columns='Ticker'), expected.drop(columns='Ticker'),
+                                              check_names=False, check_dtype=False, check_index_type=False,
+                                              check_freq=False)
+
+    def test_screen_latest_uses_last_bar_of_each_ticker(self):
+        """Для 'latest' берется последний бар каждого тикера, даже если даты тикеров различаются."""
+        self.store.upsert('IBM', numpy_backend.add_indicators(make_ohlcv(100, seed=9)))
+        result = self.store.screen(['Close > 0'])
+        self.assertEqual(len(result), 7)
+        self.assertEqual(result.loc[result['Ticker'] == 'IBM'].index[0], make_ohlcv(100).index[-1])
+
+    def test_screen_previous_bar_crossing(self):
+        """Условия с [-1] сравнивают предыдущий бар тикера: отбирается пересечение уровня."""
+        index = pd.date_range('2024-01-02', periods=3, freq='D')
+        self.store.upsert('UP', pd.DataFrame({'Close': [1.0, 1.0, 1.0], 'RSI': [20.0, 25.0, 35.0]}, index=index))
+        self.store.upsert('FLAT', pd.DataFrame({'Close': [1.0, 1.0, 1.0], 'RSI': [35.0, 20.0, 25.0]}, index=index))
+        result = self.store.screen(['RSI[-1] < 30', 'RSI >= 30'], index[-1])
+        self.assertEqual(list(result['Ticker']), ['UP'])
+        self.assertEqual(list(result.columns), ['Ticker', 'RSI[-1]', 'RSI'])
+        self.assertEqual(result.iloc[0]['RSI[-1]'], 25.0)
+        self.assertTrue(self.store.screen(['RSI[-1] < 100'], index[0]).empty)
+
+    def test_dst_fall_back_bars_are_kept(self):
+        """Бары повторяющегося часа при переводе часов назад сохраняются в UTC и не заменяют друг друга."""
+        index = pd.date_range('2024-11-03 00:00', periods=8, freq='30min', tz='America/New_York')
+        data = make_ohlcv(8).set_axis(index)
+        self.assertEqual(self.store.upsert('SPY', data), 8)
+        stored = self.store.history('SPY', columns=['Close'])
+        self.assertEqual(len(stored), 8)
+        self.assertEqual(list(stored.index), list(index.tz_convert('UTC').tz_localize(None)))
+        self.assertEqual(len(self.store.history('SPY', columns=['Close'], start=index[2], end=index[6])), 4)
+
+    def test_invalid_conditions(self):
+        """Условия с неизвестными столбцами или нечисловыми значениями отклоняются."""
+        self.assertEqual(parse_condition('Close < Bollinger_Lower'), ('Close', '<', 'Bollinger_Lower'))
+        self.assertEqual(parse_condition('RSI[-1] < RSI'), ('RSI[-1]', '<', 'RSI'))
+        for condition in ['RSI < 30; DROP TABLE bar', 'Ticker == 1', 'RSI ~ 30', 'RSI < abc', 'RSI[-2] < 30']:
+            with self.subTest(condition=condition):
+                with self.assertRaises(ValueError):
+                    self.store.screen([condition])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import pickle
+import unittest
+
+import numpy as np
+
+import data_download as dd
+from fixtures import make_ohlcv
+from summary_statistics import SummaryStatistics
+
+
+class TestSummaryStatistics(unittest.TestCase):
+
+    def setUp(self):
+        self.data = make_ohlcv(1000, seed=4)
+        self.data.iloc[[3, 500], self.data.columns.get_loc('Close')] = np.nan
+        self.close = self.data['Close']
+
+    def test_matches_pandas(self):
+        """Статистики одного блока совпадают с pandas побитово."""
+        summary = SummaryStatistics.from_values(self.close)
+        self.assertEqual(summary.count, 998)
+        self.assertEqual(summary.mean, self.close.mean())
+        self.assertEqual(summary.variance, self.close.var())
+        self.assertEqual(summary.std, self.close.std())
+        self.assertEqual(summary.coefficient_of_variation, self.close.std() / self.close.mean() * 100)
+        self.assertEqual(summary.to_dict()['min'], self.close.min())
+        self.assertEqual(summary.to_dict()['max'], self.close.max())
+
+    def test_merge_of_chunks(self):
+        """Статистики блоков, объединенные в любом порядке, совпадают со статистиками всего ряда."""
+        parts = [SummaryStatistics.from_values(chunk) for chunk in np.array_split(self.close.to_numpy(), 7)]
+        parts = [pickle.loads(pickle.dumps(part)) for part in parts]
+        for order in (parts, parts[::-1]):
+            with self.subTest(reversed=order is not parts):
+                merged = SummaryStatistics.combine(order)
+                self.assertEqual(merged.count, 998)
+                self.assertAlmostEqual(merged.mean, self.close.mean(), delta=1e-12 * self.close.mean())
+                self.assertAlmostEqual(merged.variance, self.close.var(), delta=1e-12 * self.close.var())
+                self.assertEqual(merged.minimum, self.close.min())
+                self.assertEqual(merged.maximum, self.close.max())
+
+    def test_add_single_values(self):
+        """Добавление по одному значению дает те же статистики."""
+        summary = SummaryStatistics()
+        for value in self.close:
+            summary.add(value)
+        self.assertEqual(summary.count, 998)
+        self.assertAlmostEqual(summary.mean, self.close.mean(), delta=1e-12 * self.close.mean())
+        self.assertAlmostEqual(summary.variance, self.close.var(), delta=1e-12 * self.close.var())
+
+    def test_empty_and_single_value(self):
+        """Без значений все статистики — NaN; для одного значения дисперсия — NaN."""
+        self.assertTrue(all(np.isnan(value) for key, value in SummaryStatistics().to_dict().items()
+                            if key != 'count'))
+        single = SummaryStatistics.from_values([5.0, np.nan])
+        self.assertEqual((single.count, single.mean), (1, 5.0))
+        self.assertTrue(np.isnan(single.variance))
+
+    def test_data_download_functions(self):
+        """Функции data_download возвращают те же значения, что и pandas."""
+        self.assertEqual(dd.calculate_mean_closing_price(self.data), self.close.mean())
+        self.assertEqual(dd.calculate_variance_closing_price(self.data), self.close.var())
+        self.assertEqual(dd.calculate_coefficient_of_variation(self.data),
+                         self.close.std() / self.close.mean() * 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
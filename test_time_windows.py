@@ -0,0 +1,105 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import data_download as dd
+import time_windows
+from fixtures import make_ohlcv
+
+
+def irregular_ohlcv(rows=3_000, seed=0):
+    """Минутные бары с пропусками, сокращенными сессиями и повторяющейся меткой времени."""
+    data = make_ohlcv(rows * 2, start='2024-01-02 09:30', freq='min', seed=seed)
+    keep = np.sort(np.random.default_rng(seed).choice(len(data), rows, replace=False))
+    data = data.iloc[keep]
+    return pd.concat([data.iloc[:100], data.iloc[99:100], data.iloc[100:]])
+
+
+class TestTimeWindows(unittest.TestCase):
+
+    def assert_series_close(self, result, expected, rtol=1e-7):
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=rtol, atol=1e-9, equal_nan=True)
+        self.assertTrue(result.index.equals(expected.index))
+
+    def test_matches_pandas_offset_rolling(self):
+        """Сумма, среднее, отклонение, минимум и максимум совпадают с rolling по времени в pandas."""
+        series = irregular_ohlcv()['Close']
+        series.iloc[[5, 6, 700, 1_500]] = np.nan
+        for window in ('1s', '30min', '2h', '20D', pd.Timedelta(minutes=45)):
+            engine = time_windows.rolling(series, window)
+            expected = series.rolling(window)
+            for method in ('sum', 'mean', 'std', 'min', 'max'):
+                with self.subTest(window=window, method=method):
+                    self.assert_series_close(getattr(engine, method)(), getattr(expected, method)(), rtol=1e-6)
+
+    def test_window_bounds(self):
+        """Окно (t - окно, t]: бар на левой границе не входит, бары после пропуска не видят бары до него."""
+        index = pd.DatetimeIndex(['2024-01-02 09:30', '2024-01-02 09:40', '2024-01-02 10:00', '2024-01-03 09:30'])
+        series = pd.Series([1.0, 2.0, 4.0, 8.0], index=index)
+        np.testing.assert_array_equal(time_windows.window_starts(index, '30min'), [0, 0, 1, 3])
+        np.testing.assert_array_equal(time_windows.rolling(series, '30min').sum(), [1.0, 3.0, 6.0, 8.0])
+
+    def test_shared_bounds(self):
+        """Начала окон, найденные один раз, дают те же результаты для производных Series того же индекса."""
+        data = irregular_ohlcv(500)
+        starts = time_windows.window_bounds(data.index, '30min')
+        np.testing.assert_array_equal(starts, time_windows.window_starts(data.index, '30min'))
+        self.assertIsNone(time_windows.window_bounds(data.index, 14))
+        delta = data['Close'].diff()
+        self.assert_series_close(time_windows.rolling(delta, '30min', starts).mean(), delta.rolling('30min').mean())
+        # Индекс другой длины с тем же первым баром получает собственные границы
+        head = data['Close'].iloc[:100]
+        self.assert_series_close(time_windows.rolling(head, '2h').sum(), head.rolling('2h').sum())
+
+    def test_integer_window_uses_pandas(self):
+        """Окно в барах рассчитывается как раньше, средствами pandas."""
+        series = make_ohlcv(50)['Close']
+        pd.testing.assert_series_equal(time_windows.rolling(series, 5).mean(), series.rolling(5).mean())
+
+    def test_invalid_windows(self):
+        """Окно переменной длины, неотсортированный индекс и индекс без дат вызывают ValueError."""
+        series = irregular_ohlcv(100)['Close']
+        with self.assertRaises(ValueError):
+            time_windows.rolling(series, '1ME')
+        with self.assertRaises(ValueError):
+            time_windows.rolling(series, '0min')
+        with self.assertRaises(ValueError):
+            time_windows.rolling(series.iloc[::-1], '30min')
+        with self.assertRaises(ValueError):
+            time_windows.rolling(series.reset_index(drop=True), '30min')
+
+    def test_indicators_with_time_windows(self):
+        """Индикаторы с окном по времени совпадают с расчетом через rolling по времени в pandas."""
+        data = irregular_ohlcv(seed=1)
+        window = '30min'
+        close = data['Close']
+        delta = close.diff()
+        gain = delta.where(delta > 0, 0).rolling(window).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window).mean()
+        self.assert_series_close(dd.calculate_rsi(data, window), 100 - 100 / (1 + gain / loss))
+
+        upper, middle, lower = dd.calculate_bollinger_bands(data, window)
+        self.assert_series_close(middle, close.rolling(window).mean())
+        self.assert_series_close(upper - lower, 4 * close.rolling(window).std(), rtol=1e-6)
+        self.assert_series_close(dd.calculate_std_deviation(data, window), close.rolling(window).std(), rtol=1e-6)
+
+        true_range = pd.concat([data['High'] - data['Low'], (data['High'] - close.shift()).abs(),
+                                (data['Low'] - close.shift()).abs()], axis=1).max(axis=1)
+        self.assert_series_close(dd.calculate_atr(data, window), true_range.rolling(window).mean())
+
+        money_flow = (data['High'] + data['Low'] + close) / 3 * data['Volume']
+        positive = money_flow.where(close > close.shift(1), 0).rolling(window).sum()
+        negative = money_flow.where(close < close.shift(1), 0).rolling(window).sum()
+        expected_mfi = 100 - 100 / (1 + positive / negative.replace(0, np.nan))
+        self.assert_series_close(dd.calculate_mfi(data, window), expected_mfi)
+
+        k, d = dd.calculate_stochastic_oscillator(data, window, '10min')
+        low_min, high_max = data['Low'].rolling(window).min(), data['High'].rolling(window).max()
+        expected_k = 100 * (close - low_min) / (high_max - low_min)
+        self.assert_series_close(k, expected_k)
+        self.assert_series_close(d, expected_k.rolling('10min').mean())
+
+
+if __name__ == '__main__':
+    unittest.main()
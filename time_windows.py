@@ -0,0 +1,233 @@
+"""
+Скользящие окна, заданные временем ('30min', '20D'), для нерегулярных внутридневных данных.
+
+Окно бара со временем t содержит бары со временем в полуинтервале (t - окно, t], как rolling('30min') в pandas:
+на данных с пропусками и сокращенными сессиями окно охватывает один и тот же отрезок времени, а не одно
+и то же количество баров. Границы окон находятся одним бинарным поиском по массиву времени, суммы, средние
+и стандартные отклонения считаются через накопленные суммы, минимумы и максимумы — по разреженной таблице
+(sparse table), поэтому каждый показатель рассчитывается векторно за O(n) или O(n log окна) без цикла по барам.
+
+Значение рассчитывается, если в окне есть хотя бы одно известное значение (для стандартного отклонения — два),
+как при min_periods=1, принятом в pandas для окон по времени.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+
+def is_time_window(window):
+    """Проверяет, задано ли окно временем (строка смещения, Timedelta или смещение pandas), а не числом баров."""
+    return isinstance(window, (str, timedelta, pd.DateOffset))
+
+
+def window_nanoseconds(window):
+    """
+    Переводит окно по времени в наносекунды.
+
+    :param window: Строка смещения ('30min', '20D'), Timedelta или смещение pandas фиксированной длины.
+    :return: Длина окна в наносекундах.
+    """
+    try:
+        length = pd.Timedelta(window).value if isinstance(window, timedelta) else to_offset(window).nanos
+    except (TypeError, ValueError):
+        raise ValueError(f"Окно '{window}' должно иметь фиксированную длительность, например '30min' или '20D'.")
+    if length <= 0:
+        raise ValueError(f"Окно '{window}' должно быть положительным.")
+    return length
+
+
+# Количество баров, окна которых рассчитываются по одним накопленным суммам. Суммы накапливаются заново для
+# каждой части и по значениям, центрированным относительно среднего части, поэтому погрешность вычитания
+# накопленных сумм определяется разбросом цен внутри части, а не за всю историю
+CHUNK_SIZE = 4096
+
+
+def window_starts(index, window):
+    """
+    Находит начало окна (t - окно, t] для каждого бара.
+
+    :param index: DatetimeIndex, отсортированный по возрастанию (повторяющиеся метки допускаются).
+    :param window: Окно по времени.
+    :return: Массив индексов первого бара окна; окно бара i — бары starts[i]..i.
+    """
+    if not isinstance(index, pd.DatetimeIndex):
+        raise ValueError("Окна по времени требуют индекса с датами (DatetimeIndex).")
+    if not index.is_monotonic_increasing:
+        raise ValueError("Индекс с датами должен быть отсортирован по возрастанию.")
+    if index.hasnans:
+        raise ValueError("Индекс с датами не должен содержать пропусков (NaT).")
+    # Время сравнивается в единицах индекса, чтобы не копировать его; для целых меток t_j > t_i - w
+    # равносильно t_j > t_i - ceil(w)
+    times = index.asi8
+    length = -(-window_nanoseconds(window) // pd.Timedelta(1, unit=index.unit).value)
+    return np.searchsorted(times, times - length, side='right')
+
+
+def window_bounds(index, window):
+    """
+    Находит начала окон по времени для передачи в rolling нескольким показателям одного индекса.
+
+    :return: Массив начал окон (см. window_starts) или None для окна в барах.
+    """
+    return window_starts(index, window) if is_time_window(window) else None
+
+
+def _window_moments(values, starts, squares=False):
+    """
+    Количество известных значений, их сумма и сумма квадратов отклонений от среднего в каждом окне.
+
+    :return: Кортеж (counts, sums, squared_deviations); squared_deviations равно None, если squares=False.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    counts = np.zeros(n, dtype=np.int64)
+    sums = np.zeros(n)
+    deviations = np.zeros(n) if squares else None
+    if not n:
+        return counts, sums, deviations
+
+    # Часть охватывает не меньше четырех самых длинных окон, чтобы повторно обрабатываемые начала окон
+    # не увеличивали объем работы больше чем на четверть
+    step = max(CHUNK_SIZE, 4 * int((np.arange(1, n + 1) - starts).max()))
+    for first in range(0, n, step):
+        last = min(first + step, n)
+        origin = starts[first]
+        segment = values[origin:last]
+        finite = ~np.isnan(segment)
+        if not finite.any():
+            continue
+        reference = segment[finite].mean()
+        centered = np.where(finite, segment - reference, 0.0)
+        local_starts = starts[first:last] - origin
+        ends = slice(first - origin + 1, None)
+
+        prefix = np.zeros(len(segment) + 1, dtype=np.int64)
+        np.cumsum(finite, out=prefix[1:])
+        count = prefix[ends] - prefix[local_starts]
+        counts[first:last] = count
+
+        prefix = np.zeros(len(segment) + 1)
+        np.cumsum(centered, out=prefix[1:])
+        total = prefix[ends] - prefix[local_starts]
+        sums[first:last] = total + count * reference
+
+        if squares:
+            np.cumsum(centered * centered, out=prefix[1:])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                deviations[first:last] = prefix[ends] - prefix[local_starts] - total * total / count
+    return counts, sums, deviations
+
+
+def rolling_sum(values, starts):
+    """Скользящая сумма по окнам starts, как rolling(окно).sum() в pandas."""
+    counts, sums, _ = _window_moments(values, starts)
+    sums[counts == 0] = np.nan
+    return sums
+
+
+def rolling_mean(values, starts):
+    """Скользящее среднее по окнам starts, как rolling(окно).mean() в pandas."""
+    counts, sums, _ = _window_moments(values, starts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return sums / np.where(counts == 0, np.nan, counts)
+
+
+def rolling_std(values, starts):
+    """Скользящее стандартное отклонение (ddof=1) по окнам starts, как rolling(окно).std() в pandas."""
+    counts, _, deviations = _window_moments(values, starts, squares=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = deviations / (counts - 1)
+    variance[counts < 2] = np.nan
+    np.maximum(variance, 0.0, out=variance)
+    return np.sqrt(variance)
+
+
+def _rolling_extreme(values, starts, function):
+    """
+    Минимум или максимум по окнам через разреженную таблицу.
+
+    Уровень k таблицы хранит экстремум 2^k баров, начиная с каждого бара; окно длины L покрывается двумя
+    перекрывающимися отрезками уровня floor(log2 L). Уровни строятся только до самого длинного окна.
+    NaN пропускаются (функции np.fmin и np.fmax).
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if not n:
+        return values.copy()
+    lengths = np.arange(1, n + 1) - starts
+    levels = np.zeros(n, dtype=np.int64)
+    np.log2(lengths, out=levels, casting='unsafe')
+    # Поправка на погрешность log2 у точных степеней двойки
+    levels -= (1 << levels) > lengths
+
+    table = np.empty((int(levels.max()) + 1, n))
+    table[0] = values
+    for level in range(1, len(table)):
+        half = 1 << (level - 1)
+        table[level, :n - half] = function(table[level - 1, :n - half], table[level - 1, half:])
+        table[level, n - half:] = table[level - 1, n - half:]
+
+    ends = np.arange(1, n + 1) - (1 << levels)
+    return function(table[levels, starts], table[levels, ends])
+
+
+def rolling_min(values, starts):
+    """Скользящий минимум по окнам starts, как rolling(окно).min() в pandas."""
+    return _rolling_extreme(values, starts, np.fmin)
+
+
+def rolling_max(values, starts):
+    """Скользящий максимум по окнам starts, как rolling(окно).max() в pandas."""
+    return _rolling_extreme(values, starts, np.fmax)
+
+
+class TimeRolling:
+    """
+    Скользящее окно по времени для Series с DatetimeIndex с методами объекта rolling pandas.
+
+    Границы окон рассчитываются один раз при создании, если не переданы готовые для того же индекса.
+    """
+
+    def __init__(self, series, window, starts=None):
+        self.series = series
+        self.window = window
+        self.starts = window_starts(series.index, window) if starts is None else starts
+
+    def _result(self, values):
+        return pd.Series(values, index=self.series.index, name=self.series.name)
+
+    def sum(self):
+        return self._result(rolling_sum(self.series.to_numpy(dtype=float), self.starts))
+
+    def mean(self):
+        return self._result(rolling_mean(self.series.to_numpy(dtype=float), self.starts))
+
+    def std(self):
+        return self._result(rolling_std(self.series.to_numpy(dtype=float), self.starts))
+
+    def min(self):
+        return self._result(rolling_min(self.series.to_numpy(dtype=float), self.starts))
+
+    def max(self):
+        return self._result(rolling_max(self.series.to_numpy(dtype=float), self.starts))
+
+    def apply(self, function, raw=False):
+        """Произвольная функция окна; выполняется средствами pandas."""
+        return self.series.rolling(self.window).apply(function, raw=raw)
+
+
+def rolling(series, window, starts=None):
+    """
+    Скользящее окно по количеству баров или по времени.
+
+    :param series: Series с данными.
+    :param window: Количество баров (int) или окно по времени ('30min', '20D', Timedelta).
+    :param starts: Начала окон из window_bounds для индекса series; позволяет не искать границы заново для
+        каждого показателя (опционально).
+    :return: Rolling pandas для окна по количеству баров или TimeRolling для окна по времени.
+    """
+    if is_time_window(window):
+        return TimeRolling(series, window, starts)
+    return series.rolling(window=window)